@@ -0,0 +1,67 @@
+"""
+Lazy loading for heavy optional dependencies (dspy, google.generativeai,
+langgraph, groq, ...).
+
+    genai = lazy_import("google.generativeai")   # nothing imported yet
+    genai.configure(api_key=...)                  # imported here, once
+
+module_available() answers "is it installed?" via importlib.util.find_spec
+without executing the package, so *_AVAILABLE flags stay cheap.
+"""
+
+import importlib
+import importlib.util
+import threading
+import time
+import types
+
+_lock = threading.Lock()
+_load_times_ms = {}
+
+
+class LazyModule(types.ModuleType):
+    """Module proxy that imports the real module on first attribute access."""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__['_lazy_name'] = name
+        self.__dict__['_lazy_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_lazy_module']
+        if module is None:
+            with _lock:
+                module = self.__dict__['_lazy_module']
+                if module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self.__dict__['_lazy_name'])
+                    _load_times_ms[self.__dict__['_lazy_name']] = round((time.perf_counter() - start) * 1000, 1)
+                    self.__dict__['_lazy_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_lazy_module'] is not None else 'not loaded'
+        return f"<lazy module '{self.__dict__['_lazy_name']}' ({state})>"
+
+
+def lazy_import(name):
+    return LazyModule(name)
+
+
+def module_available(name):
+    """True if `name` is importable, without importing it."""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def lazy_load_times():
+    """{module: first-use import time in ms} for lazily loaded modules."""
+    return dict(_load_times_ms)
@@ -114,6 +114,49 @@ DATABASES = {
     }
 }
 
+# Caches
+# 'default' is per-process (Google Maps geocode/places, density baseline).
+# 'llm' is the shared, durable Gemini response cache used by the screen profiler.
+# 'place_details' holds Google Place Details by place_id (shared by nearby screens).
+# 'ratelimit' holds the cross-process API rate windows (see RATE_LIMIT_CACHE_ALIAS).
+# Create their tables once per database: python manage.py createcachetable
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'llm': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'llm_response_cache',
+        'TIMEOUT': 60 * 60 * 24 * 14,
+        'OPTIONS': {
+            'MAX_ENTRIES': 20000,
+            'CULL_FREQUENCY': 4,
+        },
+    },
+    'place_details': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'place_details_cache',
+        'TIMEOUT': 60 * 60 * 24 * 30,
+        'OPTIONS': {
+            'MAX_ENTRIES': 50000,
+            'CULL_FREQUENCY': 4,
+        },
+    },
+    'ratelimit': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'ratelimit_cache',
+        'TIMEOUT': 60,
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+        },
+    },
+}
+# Cache alias behind GOOGLE_MAPS_SHARED_LIMIT=1. It must be shared by every worker
+# process (not LocMem). The DB cache works anywhere but its incr is read-then-write,
+# so bursts can slightly overshoot; point this at a Redis/Memcached alias for an
+# exact cross-process limit.
+RATE_LIMIT_CACHE_ALIAS = os.environ.get('RATE_LIMIT_CACHE_ALIAS', 'ratelimit')
+
 # REST FRAMEWORK & JWT
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
@@ -166,15 +209,61 @@ AUTH_USER_MODEL = 'console.CustomUser'
 # Google Maps Config (From env)
 # Google Maps Config (From env)
 GOOGLE_MAPS_API_KEY = os.environ.get('GOOGLE_MAPS_API_KEY', '')
+GOOGLE_PLACES_CACHE_ALIAS = 'place_details'
+GOOGLE_PLACES_DETAILS_CONCURRENCY = int(os.environ.get('GOOGLE_PLACES_DETAILS_CONCURRENCY', '5'))
+# Batch profiling: rule analyses run in parallel, LLM resolutions are packed per Gemini call
+SCREEN_PROFILE_BATCH_CONCURRENCY = int(os.environ.get('SCREEN_PROFILE_BATCH_CONCURRENCY', '4'))
+SCREEN_PROFILE_BATCH_MAX = int(os.environ.get('SCREEN_PROFILE_BATCH_MAX', '200'))
+# Screens analysed + saved per chunk; a failing chunk does not discard finished ones
+SCREEN_PROFILE_BATCH_CHUNK = int(os.environ.get('SCREEN_PROFILE_BATCH_CHUNK', '25'))
+# Single-flight profiling: identical rounded coordinates share one analysis,
+# and a finished analysis is reused for this many seconds
+SCREEN_PROFILE_COORD_PRECISION = 4  # decimals, ~11 m
+SCREEN_PROFILE_REUSE_WINDOW_SEC = int(os.environ.get('SCREEN_PROFILE_REUSE_WINDOW_SEC', '300'))
+SCREEN_PROFILE_REUSE_CACHE_ALIAS = 'default'
+# Change-aware reprofiling: moves under this distance replay the stored place archive
+REPROFILE_REUSE_DISTANCE_M = float(os.environ.get('REPROFILE_REUSE_DISTANCE_M', '25'))
+REPROFILE_BACKGROUND = env.bool('REPROFILE_BACKGROUND', default=True)
+REPROFILE_WORKERS = int(os.environ.get('REPROFILE_WORKERS', '1'))
+# Offline geoContext: path to a district/city boundary GeoJSON (not shipped, e.g. a
+# census district layer). Unset means every profile reverse-geocodes.
+ADMIN_BOUNDARIES_FILE = os.environ.get('ADMIN_BOUNDARIES_FILE', '')
+ADMIN_BOUNDARIES_CELL_DEG = 0.25
+# Per-stage profiling telemetry (one ProfileTelemetry row per run)
+PROFILE_TELEMETRY_ENABLED = env.bool('PROFILE_TELEMETRY_ENABLED', default=True)
+PROFILE_TELEMETRY_MAX_ROWS = int(os.environ.get('PROFILE_TELEMETRY_MAX_ROWS', '20000'))
 
 # Gemini API (for LLM Hybrid Mode)
 GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY', '')
+LLM_CACHE_ALIAS = 'llm'
+LLM_CACHE_TTL = int(os.environ.get('LLM_CACHE_TTL', str(60 * 60 * 24 * 14)))
+LLM_CACHE_MEMORY_ENTRIES = int(os.environ.get('LLM_CACHE_MEMORY_ENTRIES', '512'))
 
 # ── XIA Settings ──
 XIA_SCREENS_API_URL = os.environ.get('XIA_SCREENS_API_URL', 'http://localhost:8000/api/console/screens/')
 XIA_SCREEN_SOURCE_MODEL = 'console.ScreenSpec'
+# Rows per bulk upsert / profiles per export page in the XIA sync
+XIA_SYNC_BATCH_SIZE = int(os.environ.get('XIA_SYNC_BATCH_SIZE', '500'))
+# Incremental syncs re-read this many seconds behind the watermark (rows committed late)
+XIA_SYNC_WATERMARK_LAG_SECONDS = int(os.environ.get('XIA_SYNC_WATERMARK_LAG_SECONDS', '300'))
+# 'outbox': console writes append ReplicationOutbox events, applied by `manage.py replicate_outbox`
+# 'signals': legacy synchronous ScreenMaster writes inside the saving request
+XIA_REPLICATION = os.environ.get('XIA_REPLICATION', 'outbox')
+XIA_REPLICATION_BATCH_SIZE = int(os.environ.get('XIA_REPLICATION_BATCH_SIZE', '500'))
+# Discover results (per process); invalidated by the 'discover' DataVersion, the TTL only bounds memory
+XIA_DISCOVER_CACHE_ALIAS = 'default'
+XIA_DISCOVER_CACHE_TTL = int(os.environ.get('XIA_DISCOVER_CACHE_TTL', '900'))
+# Call #1 filter menu, keyed by the 'filter_menu' DataVersion; point at a shared
+# cache alias so the sync_screens pre-warm reaches every worker process
+XIA_FILTER_MENU_CACHE_ALIAS = os.environ.get('XIA_FILTER_MENU_CACHE_ALIAS', 'default')
 GROQ_API_KEY = os.environ.get('GROQ_API_KEY', '')
 
+# ── Startup budget (python manage.py startup_benchmark) ──
+# Cold import of Main.wsgi + ROOT_URLCONF must stay within these, and the
+# lazily loaded LLM SDKs (dspy, google.generativeai, langgraph, groq) must not load.
+STARTUP_IMPORT_BUDGET_MS = int(os.environ.get('STARTUP_IMPORT_BUDGET_MS', '4000'))
+STARTUP_IMPORT_BUDGET_MB = int(os.environ.get('STARTUP_IMPORT_BUDGET_MB', '150'))
+
 # ── Email Configuration (Gmail SMTP) ──
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'
@@ -11,7 +11,9 @@ Schedule via Windows Task Scheduler or Linux cron to run daily at midnight.
 """
 from datetime import date
 from django.core.management.base import BaseCommand
+from django.utils import timezone
 from console.models import ScreenSpec
+from console.utils import update_with_outbox
 
 
 class Command(BaseCommand):
@@ -32,7 +34,7 @@ class Command(BaseCommand):
             return
 
         # Flip them all to BLOCKED
-        updated = due_screens.update(status='BLOCKED')
+        updated = update_with_outbox(due_screens, 'screen', status='BLOCKED', updated_at=timezone.now())
         self.stdout.write(
             self.style.SUCCESS(
                 f'✅ Blocked {updated} screen(s) that were scheduled to block on or before {today}.'
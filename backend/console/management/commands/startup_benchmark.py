@@ -0,0 +1,143 @@
+"""
+Management command: startup_benchmark
+-------------------------------------
+Measures cold-start cost of a worker: importing Main.wsgi (django.setup)
+plus the ROOT_URLCONF (what the first request loads), in fresh interpreters.
+
+- Pass 1: python -X importtime  -> wall time + heaviest import trees
+- Pass 2: tracemalloc           -> peak memory allocated by imports
+- Fails if the lazily loaded LLM SDKs were imported at startup, or if the
+  STARTUP_IMPORT_BUDGET_MS / STARTUP_IMPORT_BUDGET_MB budgets are exceeded
+
+Usage:
+    python manage.py startup_benchmark
+    python manage.py startup_benchmark --top 25 --budget-ms 3000 --json startup.json
+"""
+
+import json
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Must only be imported on first use (see Main/lazy_imports.py)
+LAZY_HEAVY_MODULES = ['dspy', 'google.generativeai', 'langgraph', 'groq']
+
+_CHILD = r'''
+import json, os, sys, time
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Main.settings')
+track_memory = sys.argv[1] == 'mem'
+if track_memory:
+    import tracemalloc
+    tracemalloc.start()
+t0 = time.perf_counter()
+import Main.wsgi
+import importlib
+from django.conf import settings
+importlib.import_module(settings.ROOT_URLCONF)
+elapsed_ms = (time.perf_counter() - t0) * 1000
+peak = tracemalloc.get_traced_memory()[1] if track_memory else None
+heavy = json.loads(sys.argv[2])
+print(json.dumps({
+    'elapsed_ms': elapsed_ms,
+    'peak_bytes': peak,
+    'modules_loaded': len(sys.modules),
+    'heavy_loaded': [m for m in heavy if m in sys.modules],
+}))
+'''
+
+
+def _run_child(mode, extra_args=()):
+    proc = subprocess.run(
+        [sys.executable, *extra_args, '-c', _CHILD, mode, json.dumps(LAZY_HEAVY_MODULES)],
+        cwd=str(settings.BASE_DIR), capture_output=True, text=True, timeout=300,
+    )
+    if proc.returncode != 0:
+        raise CommandError(f'Startup import failed:\n{proc.stderr[-2000:]}')
+    return json.loads(proc.stdout.strip().splitlines()[-1]), proc.stderr
+
+
+def _parse_importtime(stderr):
+    """-X importtime lines: 'import time: self_us | cumulative_us | <indent>name'."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3:
+            continue
+        self_us, cum_us, name = parts
+        # One separator space, then two spaces per nesting level
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        try:
+            rows.append({
+                'module': name.strip(),
+                'self_us': int(self_us.strip()),
+                'cumulative_us': int(cum_us.strip()),
+                'depth': depth,
+            })
+        except ValueError:
+            continue
+    return rows
+
+
+def measure_startup(top=15):
+    """Run both passes and return a report dict (used by tests too)."""
+    timing, stderr = _run_child('time', ('-X', 'importtime'))
+    memory, _ = _run_child('mem')
+    rows = _parse_importtime(stderr)
+    top_level = sorted((r for r in rows if r['depth'] == 0), key=lambda r: r['cumulative_us'], reverse=True)
+    return {
+        'elapsed_ms': round(timing['elapsed_ms'], 1),
+        'import_self_total_ms': round(sum(r['self_us'] for r in rows) / 1000, 1),
+        'peak_memory_mb': round((memory['peak_bytes'] or 0) / (1024 * 1024), 1),
+        'modules_loaded': timing['modules_loaded'],
+        'heavy_loaded': sorted(set(timing['heavy_loaded']) | set(memory['heavy_loaded'])),
+        'top_imports': [
+            {'module': r['module'], 'cumulative_ms': round(r['cumulative_us'] / 1000, 1)}
+            for r in top_level[:top]
+        ],
+    }
+
+
+def budget_violations(report, budget_ms, budget_mb):
+    problems = []
+    if report['heavy_loaded']:
+        problems.append(f"lazy modules imported at startup: {', '.join(report['heavy_loaded'])}")
+    if report['elapsed_ms'] > budget_ms:
+        problems.append(f"cold start {report['elapsed_ms']}ms > budget {budget_ms}ms")
+    if report['peak_memory_mb'] > budget_mb:
+        problems.append(f"import memory {report['peak_memory_mb']}MB > budget {budget_mb}MB")
+    return problems
+
+
+class Command(BaseCommand):
+    help = 'Benchmark worker cold start (Main.wsgi + URLConf imports) against the startup budget'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=15, help='Show the N heaviest top-level imports')
+        parser.add_argument('--budget-ms', type=int, default=getattr(settings, 'STARTUP_IMPORT_BUDGET_MS', 4000))
+        parser.add_argument('--budget-mb', type=int, default=getattr(settings, 'STARTUP_IMPORT_BUDGET_MB', 150))
+        parser.add_argument('--json', dest='json_path', help='Also write the report to this file')
+
+    def handle(self, *args, **options):
+        report = measure_startup(top=options['top'])
+
+        self.stdout.write(f"Cold start:      {report['elapsed_ms']} ms (import self-time {report['import_self_total_ms']} ms)")
+        self.stdout.write(f"Import memory:   {report['peak_memory_mb']} MB peak")
+        self.stdout.write(f"Modules loaded:  {report['modules_loaded']}")
+        self.stdout.write('Heaviest imports:')
+        for row in report['top_imports']:
+            self.stdout.write(f"   {row['cumulative_ms']:>8.1f} ms  {row['module']}")
+
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as fh:
+                json.dump(report, fh, indent=2)
+
+        problems = budget_violations(report, options['budget_ms'], options['budget_mb'])
+        if problems:
+            raise CommandError('Startup budget exceeded: ' + '; '.join(problems))
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Within budget ({options['budget_ms']} ms / {options['budget_mb']} MB), no lazy SDKs loaded."
+        ))
@@ -0,0 +1,27 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('console', '0056_slotbooking_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReplicationOutbox',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('entity', models.CharField(choices=[('screen', 'Screen'), ('profile', 'Screen profile'), ('booking', 'Slot booking')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('op', models.CharField(choices=[('upsert', 'Upsert'), ('delete', 'Delete')], default='upsert', max_length=6)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'console_replication_outbox',
+                'ordering': ['id'],
+            },
+        ),
+    ]
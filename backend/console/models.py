@@ -399,7 +399,7 @@ class ScreenSpec(models.Model):
     
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # XIA incremental sync watermark
     SOURCE_CHOICES = [
         ('INTERNAL', 'Internal'),
         ('EXTERNAL', 'External'),
@@ -583,6 +583,8 @@ class SlotBooking(models.Model):
     payment = models.CharField(max_length=20, choices=PAYMENT_CHOICES, default='UNPAID', help_text="Payment status")
     notes = models.TextField(blank=True, default='', help_text="Reason for booking. Partners describe why, Xigi bookings say 'Xigi Campaigns'.")
     created_at = models.DateTimeField(auto_now_add=True)
+    # Queryset .update() skips auto_now - set it explicitly there (XIA sync watermark)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         ordering = ['-created_at']
@@ -591,6 +593,38 @@ class SlotBooking(models.Model):
         return f"{self.screen.screen_name} | {self.num_slots} slots | {self.start_date} to {self.end_date} | {self.status} | {self.payment}"
 
 
+class ReplicationOutbox(models.Model):
+    """
+    Change events for XIA replication (transactional outbox).
+    Appended in the same transaction as the console write - by the signal
+    handlers in xia/signals.py or record_outbox_changes() for queryset
+    updates - and drained into xia_db by `manage.py replicate_outbox`.
+    Events only name the row; the replicator reads its current state.
+    """
+    ENTITY_CHOICES = [
+        ('screen', 'Screen'),
+        ('profile', 'Screen profile'),  # object_id is the screen id
+        ('booking', 'Slot booking'),
+    ]
+    OP_CHOICES = [
+        ('upsert', 'Upsert'),
+        ('delete', 'Delete'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    entity = models.CharField(max_length=10, choices=ENTITY_CHOICES)
+    object_id = models.BigIntegerField()
+    op = models.CharField(max_length=6, choices=OP_CHOICES, default='upsert')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'console_replication_outbox'
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.entity}:{self.object_id} {self.op}"
+
+
 class CampaignAsset(models.Model):
     """One row = one slot on one screen for one campaign. Tracks upload + validation."""
     
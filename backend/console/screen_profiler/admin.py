@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ScreenProfile
+from .models import ProfileTelemetry, ScreenProfile
 
 
 @admin.register(ScreenProfile)
@@ -40,3 +40,10 @@ class ScreenProfileAdmin(admin.ModelAdmin):
             'fields': ('profiled_at', 'api_calls_made', 'cached', 'processing_time_ms', 'api_key_configured', 'warnings', 'version', 'created_at', 'updated_at'),
         }),
     )
+
+
+@admin.register(ProfileTelemetry)
+class ProfileTelemetryAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'mode', 'screen_id', 'total_ms', 'network_calls', 'llm_calls', 'shared', 'error')
+    list_filter = ('mode', 'llm_used', 'maps_cached')
+    readonly_fields = ('created_at', 'stages')
@@ -0,0 +1,216 @@
+"""
+Offline administrative-boundary lookup for geoContext
+
+Answers city / state / country / cityTier for a coordinate with a local
+point-in-polygon test over district/city boundary polygons, instead of a
+paid Google reverse geocode.
+
+- Data: GeoJSON FeatureCollection (Polygon / MultiPolygon) at
+  ADMIN_BOUNDARIES_FILE, e.g. a census district layer. Property names
+  commonly used by Indian boundary datasets are recognised (see *_KEYS).
+- Index: uniform lat/lng grid (ADMIN_BOUNDARIES_CELL_DEG) -> candidate
+  features by bounding box, then ray casting. When polygons nest (city
+  inside district) the smallest containing polygon wins.
+- If the file is missing or a point falls outside every polygon, lookup()
+  returns None and the caller falls back to reverse_geocode_full.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CITY_KEYS = ("city", "district", "dtname", "DISTRICT", "district_name", "NAME_2")
+STATE_KEYS = ("state", "st_nm", "STATE", "state_name", "NAME_1")
+COUNTRY_KEYS = ("country", "COUNTRY", "NAME_0")
+
+Ring = List[Tuple[float, float]]  # [(lng, lat), ...]
+
+
+def _first(props: Dict[str, Any], keys: Sequence[str]) -> Optional[str]:
+    for key in keys:
+        value = props.get(key)
+        if value:
+            return str(value).strip()
+    return None
+
+
+def _point_in_ring(lng: float, lat: float, ring: Ring) -> bool:
+    inside = False
+    j = len(ring) - 1
+    for i in range(len(ring)):
+        xi, yi = ring[i]
+        xj, yj = ring[j]
+        if (yi > lat) != (yj > lat) and lng < (xj - xi) * (lat - yi) / (yj - yi) + xi:
+            inside = not inside
+        j = i
+    return inside
+
+
+class _Boundary:
+    __slots__ = ("city", "state", "country", "bbox", "polygons", "area")
+
+    def __init__(self, city: str, state: str, country: str, polygons: List[Tuple[Ring, List[Ring]]]):
+        self.city = city
+        self.state = state
+        self.country = country
+        self.polygons = polygons
+        lngs = [p[0] for outer, _ in polygons for p in outer]
+        lats = [p[1] for outer, _ in polygons for p in outer]
+        self.bbox = (min(lngs), min(lats), max(lngs), max(lats))
+        self.area = (self.bbox[2] - self.bbox[0]) * (self.bbox[3] - self.bbox[1])
+
+    def contains(self, lng: float, lat: float) -> bool:
+        min_lng, min_lat, max_lng, max_lat = self.bbox
+        if not (min_lng <= lng <= max_lng and min_lat <= lat <= max_lat):
+            return False
+        for outer, holes in self.polygons:
+            if _point_in_ring(lng, lat, outer) and not any(_point_in_ring(lng, lat, h) for h in holes):
+                return True
+        return False
+
+
+class AdminBoundaryIndex:
+
+    def __init__(self, boundaries: Optional[List[_Boundary]] = None, cell_deg: float = 0.25):
+        self.cell_deg = float(cell_deg)
+        self._boundaries: List[_Boundary] = []
+        self._grid: Dict[Tuple[int, int], List[int]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"lookups": 0, "hits": 0, "misses": 0}
+        for boundary in boundaries or []:
+            self._add(boundary)
+        # Smallest polygon first so nested city boundaries beat their district
+        for cell, ids in self._grid.items():
+            ids.sort(key=lambda i: self._boundaries[i].area)
+
+    @classmethod
+    def from_geojson(cls, path: str, cell_deg: float = 0.25) -> "AdminBoundaryIndex":
+        with open(path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+        boundaries = []
+        for feature in data.get("features", []):
+            props = feature.get("properties") or {}
+            geometry = feature.get("geometry") or {}
+            city = _first(props, CITY_KEYS)
+            if not city:
+                continue
+            if geometry.get("type") == "Polygon":
+                raw_polygons = [geometry.get("coordinates") or []]
+            elif geometry.get("type") == "MultiPolygon":
+                raw_polygons = geometry.get("coordinates") or []
+            else:
+                continue
+            polygons = [
+                ([(float(x), float(y)) for x, y, *_ in rings[0]],
+                 [[(float(x), float(y)) for x, y, *_ in hole] for hole in rings[1:]])
+                for rings in raw_polygons if rings and rings[0]
+            ]
+            if polygons:
+                boundaries.append(_Boundary(
+                    city=city,
+                    state=_first(props, STATE_KEYS) or "Unknown",
+                    country=_first(props, COUNTRY_KEYS) or "India",
+                    polygons=polygons,
+                ))
+        return cls(boundaries, cell_deg=cell_deg)
+
+    def _cell(self, lng: float, lat: float) -> Tuple[int, int]:
+        return math.floor(lng / self.cell_deg), math.floor(lat / self.cell_deg)
+
+    def _add(self, boundary: _Boundary) -> None:
+        idx = len(self._boundaries)
+        self._boundaries.append(boundary)
+        min_lng, min_lat, max_lng, max_lat = boundary.bbox
+        x0, y0 = self._cell(min_lng, min_lat)
+        x1, y1 = self._cell(max_lng, max_lat)
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                self._grid.setdefault((x, y), []).append(idx)
+
+    @property
+    def available(self) -> bool:
+        return bool(self._boundaries)
+
+    def lookup(self, latitude: float, longitude: float) -> Optional[Dict[str, str]]:
+        """{"city", "state", "country", "cityTier"} or None if no polygon contains the point.
+
+        cityTier is None when the district is not in CITY_TIER_MAPPING; callers
+        fall back to reverse geocoding for the tier in that case.
+        """
+        lat, lng = float(latitude), float(longitude)
+        found = None
+        for idx in self._grid.get(self._cell(lng, lat), ()):
+            boundary = self._boundaries[idx]
+            if boundary.contains(lng, lat):
+                found = boundary
+                break
+        with self._lock:
+            self._stats["lookups"] += 1
+            self._stats["hits" if found else "misses"] += 1
+        if found is None:
+            return None
+        return {
+            "city": found.city,
+            "state": found.state,
+            "country": found.country,
+            "cityTier": city_tier_for(found.city),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            data = dict(self._stats)
+        data["boundaries"] = len(self._boundaries)
+        data["cells"] = len(self._grid)
+        return data
+
+
+def city_tier_for(city: str) -> Optional[str]:
+    """Tier from CITY_TIER_MAPPING, or None for a district the mapping does not know."""
+    from .area_context_service import CITY_TIER_MAPPING
+    return (
+        CITY_TIER_MAPPING.get(city)
+        or CITY_TIER_MAPPING.get(f"{city} District")
+        or CITY_TIER_MAPPING.get(city.replace(" District", ""))
+    )
+
+
+_admin_boundary_index: Optional[AdminBoundaryIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_admin_boundary_index() -> AdminBoundaryIndex:
+    """Loaded once per process; an empty index if ADMIN_BOUNDARIES_FILE is unset or missing."""
+    global _admin_boundary_index
+    if _admin_boundary_index is None:
+        with _index_lock:
+            if _admin_boundary_index is None:
+                from django.conf import settings
+                path = str(getattr(settings, "ADMIN_BOUNDARIES_FILE", "") or "")
+                cell_deg = getattr(settings, "ADMIN_BOUNDARIES_CELL_DEG", 0.25)
+                index = AdminBoundaryIndex(cell_deg=cell_deg)
+                if path and os.path.exists(path):
+                    start = time.perf_counter()
+                    try:
+                        index = AdminBoundaryIndex.from_geojson(path, cell_deg=cell_deg)
+                        logger.info(
+                            f"Loaded {index.stats()['boundaries']} admin boundaries in "
+                            f"{(time.perf_counter() - start) * 1000:.0f}ms"
+                        )
+                    except Exception as e:
+                        logger.error(f"Failed to load admin boundaries from {path}: {e}")
+                elif path:
+                    logger.info(f"Admin boundaries file not found ({path}); using reverse geocode")
+                _admin_boundary_index = index
+    return _admin_boundary_index
+
+
+def reset_admin_boundary_index():
+    global _admin_boundary_index
+    _admin_boundary_index = None
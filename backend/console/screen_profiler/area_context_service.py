@@ -20,15 +20,25 @@ Key improvements in v2.0:
 """
 from __future__ import annotations
 
+import logging
 import os
 import re
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Tuple, Any
 from difflib import SequenceMatcher
 
 from django.utils import timezone
 
 from .google_maps_utils import get_google_maps_service
+from .density_baseline import get_density_baseline_index, smallest_sufficient_radius
+from .admin_boundaries import get_admin_boundary_index
+from .place_archive import RecordingMapsSource
+from .telemetry import profile_stage, profiling_run, traced_run
+
+logger = logging.getLogger(__name__)
 
 # =============================================================================
 # PLACE GROUP TAXONOMY
@@ -214,6 +224,8 @@ CITY_TIER_MAPPING: Dict[str, str] = {
 
 GENERIC_TYPES = {"establishment", "point_of_interest", "place", "premise"}
 
+_MISSING = object()
+
 GROUP_PRIORITY: List[str] = [
     "TRANSIT", "HEALTHCARE", "RELIGIOUS", "EDUCATION", "GOVERNMENT", "FINANCE",
     "OFFICE", "RETAIL", "FOOD_BEVERAGE", "ENTERTAINMENT", "SPORTS", "HOSPITALITY",
@@ -310,8 +322,32 @@ MOVEMENT_DWELL_MODIFIER: Dict[str, float] = {
 # PLACE TYPE NORMALIZER
 # =============================================================================
 
+_NAME_PUNCT_RE = re.compile(r'[^\w\s]')
+_NAME_SUFFIXES = (' pvt ltd', ' private limited', ' limited', ' ltd', ' inc', ' llc')
+
+# Cache slot for the normalized name on each place dict (never serialized)
+_NORM_NAME_KEY = "_norm_name"
+
+
 class PlaceTypeNormalizer:
-    """Normalizes place types into groups with deduplication support."""
+    """
+    Normalizes place types into groups with deduplication support.
+
+    Hot-path notes (the same places flow through Ring 1, 1.5 and every
+    Ring 2 expansion):
+    - type -> (priority, group) is precomputed once; per-types-tuple lookups are memoized
+    - normalized names are computed once per place and cached on the dict
+    - fuzzy name comparison is gated by exact SequenceMatcher upper bounds
+      (length bound, then quick_ratio) and pair decisions are memoized
+    - dedupe results are memoized by exactly what dedupe reads (place_id,
+      normalized name, coordinates, in order), so re-deduping the same
+      result list (Ring 2 threshold check, then count_by_group) is a lookup.
+      Each Ring 2 expansion returns a different list and is deduped afresh;
+      only the per-place name cache and pair memo carry across rings.
+    """
+
+    _DEDUPE_MEMO_SIZE = 256
+    _PAIR_MEMO_SIZE = 50000
 
     def __init__(self):
         self._type_to_group: Dict[str, str] = {}
@@ -319,44 +355,97 @@ class PlaceTypeNormalizer:
             for t in types_list:
                 self._type_to_group[t] = group
 
+        # type -> (priority rank, group); generic types and unranked groups never win
+        priority = {g: i for i, g in enumerate(GROUP_PRIORITY)}
+        self._type_rank: Dict[str, Tuple[int, str]] = {
+            t: (priority[g], g)
+            for t, g in self._type_to_group.items()
+            if g in priority and t not in GENERIC_TYPES
+        }
+        self._group_memo: Dict[Tuple[str, ...], Optional[str]] = {}
+        self._pair_memo: Dict[Tuple[str, str, float], bool] = {}
+        self._dedupe_memo: "OrderedDict[Tuple[Any, ...], Tuple[int, ...]]" = OrderedDict()
+        self._memo_lock = threading.Lock()
+
     def _group_for_place(self, place_types: List[str]) -> Optional[str]:
         """Get the highest-priority group for a place based on its types."""
-        # Filter out generic types and find recognized groups
-        groups = set()
-        for t in place_types:
-            if t in GENERIC_TYPES:
-                continue
-            g = self._type_to_group.get(t)
-            if g:
-                groups.add(g)
+        key = tuple(place_types)
+        cached = self._group_memo.get(key, _MISSING)
+        if cached is not _MISSING:
+            return cached
 
-        if not groups:
-            return None
-
-        # Pick highest priority group
-        for g in GROUP_PRIORITY:
-            if g in groups:
-                return g
-        return None
+        best: Optional[Tuple[int, str]] = None
+        type_rank = self._type_rank
+        for t in place_types:
+            ranked = type_rank.get(t)
+            if ranked and (best is None or ranked[0] < best[0]):
+                best = ranked
+        group = best[1] if best else None
+        if len(self._group_memo) >= self._PAIR_MEMO_SIZE:
+            self._group_memo.clear()
+        self._group_memo[key] = group
+        return group
 
     @staticmethod
     def _normalize_name(name: str) -> str:
         """Normalize place name for deduplication comparison."""
         if not name:
             return ""
-        normalized = name.lower().strip()
-        normalized = re.sub(r'[^\w\s]', '', normalized)
+        normalized = _NAME_PUNCT_RE.sub('', name.lower().strip())
         # Remove common suffixes
-        for suffix in [' pvt ltd', ' private limited', ' limited', ' ltd', ' inc', ' llc']:
+        for suffix in _NAME_SUFFIXES:
             if normalized.endswith(suffix):
                 normalized = normalized[:-len(suffix)]
         return normalized.strip()
 
+    @classmethod
+    def _place_norm_name(cls, place: Dict[str, Any]) -> str:
+        """Normalized name, computed once per place dict."""
+        cached = place.get(_NORM_NAME_KEY)
+        if cached is None:
+            cached = cls._normalize_name(place.get("name", ""))
+            place[_NORM_NAME_KEY] = cached
+        return cached
+
     @staticmethod
     def _coords_key(lat: float, lng: float, precision: int = 5) -> str:
         """Create coordinate key with configurable precision."""
         return f"{round(lat, precision)}_{round(lng, precision)}"
 
+    def _names_similar(self, a: str, b: str, threshold: float) -> bool:
+        """SequenceMatcher(a, b).ratio() >= threshold, with cheap exact upper bounds first."""
+        if a == b:
+            return True
+        la, lb = len(a), len(b)
+        # ratio = 2*M / (la+lb) and M <= min(la, lb)
+        if 2.0 * min(la, lb) / (la + lb) < threshold:
+            return False
+        key = (a, b, threshold)
+        cached = self._pair_memo.get(key)
+        if cached is not None:
+            return cached
+        matcher = SequenceMatcher(None, a, b)
+        similar = matcher.quick_ratio() >= threshold and matcher.ratio() >= threshold
+        if len(self._pair_memo) >= self._PAIR_MEMO_SIZE:
+            self._pair_memo.clear()
+        self._pair_memo[key] = similar
+        return similar
+
+    @classmethod
+    def _identity_key(cls, places: List[Dict[str, Any]], coord_precision: int,
+                      name_similarity_threshold: float) -> Tuple[Any, ...]:
+        """Everything dedupe_places reads from the list, in order."""
+        ident = []
+        for place in places:
+            location = (place.get("geometry") or {}).get("location") or {}
+            ident.append((
+                place.get("place_id"),
+                cls._place_norm_name(place),
+                location.get("lat", 0),
+                location.get("lng", 0),
+            ))
+        return (coord_precision, name_similarity_threshold, tuple(ident))
+
     def dedupe_places(self, places: List[Dict[str, Any]],
                       coord_precision: int = 5,
                       name_similarity_threshold: float = 0.85) -> List[Dict[str, Any]]:
@@ -367,11 +456,19 @@ class PlaceTypeNormalizer:
         1. Primary: Dedupe by place_id (Google's unique identifier)
         2. Secondary: Dedupe by coordinates + normalized name similarity
         """
+        memo_key = self._identity_key(places, coord_precision, name_similarity_threshold)
+        with self._memo_lock:
+            kept = self._dedupe_memo.get(memo_key)
+            if kept is not None:
+                self._dedupe_memo.move_to_end(memo_key)
+        if kept is not None:
+            return [places[i] for i in kept]
+
         seen_ids: set = set()
-        seen_coords: Dict[str, set] = {}  # coord_key -> set of normalized names
-        deduped: List[Dict[str, Any]] = []
+        seen_coords: Dict[str, List[str]] = {}  # coord_key -> normalized names
+        kept_idx: List[int] = []
 
-        for place in places:
+        for idx, place in enumerate(places):
             # Primary: Check place_id
             place_id = place.get("place_id")
             if place_id:
@@ -385,33 +482,31 @@ class PlaceTypeNormalizer:
             lat = location.get("lat", 0)
             lng = location.get("lng", 0)
 
-            coord_key = self._coords_key(lat, lng, coord_precision)
-            name = self._normalize_name(place.get("name", ""))
+            name = self._place_norm_name(place)
 
             # Skip if no meaningful identifier
             if not name and (lat == 0 and lng == 0) and not place_id:
                 continue
 
-            if coord_key not in seen_coords:
-                seen_coords[coord_key] = set()
+            coord_key = self._coords_key(lat, lng, coord_precision)
+            bucket = seen_coords.setdefault(coord_key, [])
 
             # Check for similar name at same location
-            is_duplicate = False
-            for existing_name in seen_coords[coord_key]:
-                if name and existing_name:
-                    similarity = SequenceMatcher(None, name, existing_name).ratio()
-                    if similarity >= name_similarity_threshold:
-                        is_duplicate = True
-                        break
-
-            if is_duplicate:
+            if name and any(
+                self._names_similar(name, existing_name, name_similarity_threshold)
+                for existing_name in bucket
+            ):
                 continue
 
-            if name:
-                seen_coords[coord_key].add(name)
-            deduped.append(place)
+            if name and name not in bucket:
+                bucket.append(name)
+            kept_idx.append(idx)
 
-        return deduped
+        with self._memo_lock:
+            self._dedupe_memo[memo_key] = tuple(kept_idx)
+            if len(self._dedupe_memo) > self._DEDUPE_MEMO_SIZE:
+                self._dedupe_memo.popitem(last=False)
+        return [places[i] for i in kept_idx]
 
     def count_by_group(self, places: List[Dict[str, Any]],
                        dedupe: bool = True) -> Tuple[Dict[str, int], int]:
@@ -949,37 +1044,57 @@ class AreaContextService:
         self.context_deriver = AreaContextDeriver()
         self.movement = MovementAnalyzer()
         self.dwell = DwellCategoryDeriver()
+        self.density_index = get_density_baseline_index()
+        self.admin_boundaries = get_admin_boundary_index()
 
     def _adaptive_ring2_search(
         self,
         latitude: float,
         longitude: float,
         city_tier: str,
-        reasoning: List[str]
-    ) -> Tuple[List[Dict[str, Any]], int, bool, int]:
+        reasoning: List[str],
+        maps=None,
+        density_index=None
+    ) -> Tuple[List[Dict[str, Any]], int, bool, int, Dict[str, Any]]:
         """
         Perform Ring 2 search with adaptive radius expansion for sparse areas.
+        The starting radius comes from the density baseline when the geohash
+        cell has history, so known-sparse areas skip the early expansions.
 
         Returns:
-            tuple: (places, network_calls, all_cached, final_radius)
+            tuple: (places, network_calls, all_cached, final_radius, density_baseline)
         """
         config = RING2_CONFIG
+        maps = maps or self.google_maps
+        density_index = density_index or self.density_index
 
         # Adjust base radius by city tier
         tier_multiplier = {"TIER_1": 0.9, "TIER_2": 1.0, "TIER_3": 1.3}.get(city_tier, 1.0)
         base_radius = int(config["base_radius"] * tier_multiplier)
-        radius = base_radius
+
+        baseline = density_index.predict(latitude, longitude, base_radius, config)
+        radius = baseline["startRadius"]
+        skipped = baseline["skippedExpansions"]
+        if skipped:
+            reasoning.append(
+                f"Ring 2: Density baseline ({baseline['geohash']}, {baseline['samples']} samples) "
+                f"starts at {radius}m, skipping {skipped} expansion(s)"
+            )
 
         total_network_calls = 0
         all_cached = True
         places: List[Dict[str, Any]] = []
-
-        for attempt in range(config["max_expansions"] + 1):
-            places, meta = self.google_maps.places_nearby_all(
-                latitude, longitude,
-                radius=radius,
-                max_results=60
-            )
+        unique_places: List[Dict[str, Any]] = []
+        expansions_made = 0
+
+        for attempt in range(config["max_expansions"] + 1 - skipped):
+            with profile_stage("ring2") as stage:
+                places, meta = maps.places_nearby_all(
+                    latitude, longitude,
+                    radius=radius,
+                    max_results=60
+                )
+                stage.network(meta)
             total_network_calls += meta["network_calls"]
             all_cached = all_cached and meta["cached"]
 
@@ -993,9 +1108,10 @@ class AreaContextService:
                 )
                 break
 
-            if attempt < config["max_expansions"]:
+            if attempt < config["max_expansions"] - skipped:
                 old_radius = radius
                 radius = min(radius + config["expansion_step"], config["max_radius"])
+                expansions_made += 1
                 reasoning.append(
                     f"Ring 2: Radius {old_radius}m yielded only {len(unique_places)} "
                     f"unique places, expanding to {radius}m"
@@ -1006,14 +1122,28 @@ class AreaContextService:
                     f"unique places (sparse area)"
                 )
 
-        return places, total_network_calls, all_cached, radius
+        # Record what the location needed, not where this search stopped
+        needed_radius = smallest_sufficient_radius(
+            latitude, longitude, unique_places, base_radius, radius, config,
+        )
+        density_index.record(
+            latitude, longitude, needed_radius, len(unique_places),
+            skipped_expansions=skipped, expansions_made=expansions_made,
+        )
+        baseline["expansionsMade"] = expansions_made
+        baseline["neededRadius"] = needed_radius
+        return places, total_network_calls, all_cached, radius, baseline
 
+    @traced_run("rules")
     def analyze_screen_location(
         self,
         latitude: float,
         longitude: float,
         indoor: bool = False,
-        height_from_ground_ft: float = 0.0
+        height_from_ground_ft: float = 0.0,
+        maps_source=None,
+        density_index=None,
+        address_hint: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Analyze screen location and return comprehensive profile.
@@ -1023,9 +1153,15 @@ class AreaContextService:
             longitude: Screen longitude
             indoor: Whether screen is indoor
             height_from_ground_ft: Screen height from ground
+            maps_source: Alternative Google Maps source (e.g. StoredMapsSource
+                for offline re-scoring). Defaults to the live service.
+            density_index: Alternative Ring 2 density baseline (replay)
+            address_hint: Known street address (ScreenSpec.full_address). With
+                an offline boundary hit it replaces the reverse geocode entirely.
 
         Returns:
-            Complete area context profile
+            Complete area context profile. "rawPlaces" holds the archive of
+            every Maps response used, for storage on ScreenProfile.raw_places.
         """
         start = time.time()
         reasoning: List[str] = []
@@ -1033,17 +1169,28 @@ class AreaContextService:
         net_calls = 0
         all_cached = True
 
-        api_key = os.environ.get("GOOGLE_MAPS_API_KEY", "")
-        if not api_key:
-            raise Exception("GOOGLE_MAPS_API_KEY not configured")
-        if not self.google_maps.client:
-            raise Exception("Google Maps client not initialized (check key)")
+        if maps_source is None:
+            api_key = os.environ.get("GOOGLE_MAPS_API_KEY", "")
+            if not api_key:
+                raise Exception("GOOGLE_MAPS_API_KEY not configured")
+            if not self.google_maps.client:
+                raise Exception("Google Maps client not initialized (check key)")
+        maps = RecordingMapsSource(maps_source or self.google_maps)
 
-        # Step 1: Geographic context
+        # Step 1: Geographic context (offline boundaries, reverse geocode as fallback)
         reasoning.append("Step 1: Fetching geographic context.")
-        geo_full, meta_geo = self.google_maps.reverse_geocode_full(latitude, longitude)
-        net_calls += meta_geo["network_calls"]
-        all_cached = all_cached and meta_geo["cached"]
+        with profile_stage("geo") as stage:
+            boundary = self.admin_boundaries.lookup(latitude, longitude)
+            # An unmapped district has no offline tier; let the geocoder decide it
+            if boundary is not None and boundary["cityTier"]:
+                geo_full = dict(boundary, formattedAddress=(address_hint or "").strip(), addressComponents=[])
+                geo_source = "offline"
+            else:
+                geo_full, meta_geo = maps.reverse_geocode_full(latitude, longitude)
+                stage.network(meta_geo)
+                net_calls += meta_geo["network_calls"]
+                all_cached = all_cached and meta_geo["cached"]
+                geo_source = "reverse_geocode"
 
         geo_context = {
             "city": geo_full.get("city", "Unknown"),
@@ -1051,17 +1198,20 @@ class AreaContextService:
             "country": geo_full.get("country", "Unknown"),
             "cityTier": geo_full.get("cityTier", "TIER_3"),
             "formattedAddress": geo_full.get("formattedAddress", ""),
+            "source": geo_source,
         }
         reasoning.append(
             f"Geo context: {geo_context['city']}, {geo_context['state']} "
-            f"({geo_context['cityTier']})"
+            f"({geo_context['cityTier']}, {geo_source})"
         )
 
         # Step 2: Ring 1 - Authority detection
         reasoning.append("Step 2: Analyzing Ring 1 (75m - authority detection).")
-        ring1_places, meta_r1 = self.google_maps.places_nearby_all(
-            latitude, longitude, radius=75, max_results=20
-        )
+        with profile_stage("ring1") as stage:
+            ring1_places, meta_r1 = maps.places_nearby_all(
+                latitude, longitude, radius=75, max_results=20
+            )
+            stage.network(meta_r1)
         net_calls += meta_r1["network_calls"]
         all_cached = all_cached and meta_r1["cached"]
 
@@ -1113,9 +1263,11 @@ class AreaContextService:
             seen_place_ids: set = set()
 
             for radius in search_radii:
-                ring1_5_places, meta_r1_5 = self.google_maps.places_nearby_all(
-                    latitude, longitude, radius=radius, max_results=60
-                )
+                with profile_stage("ring1_5") as stage:
+                    ring1_5_places, meta_r1_5 = maps.places_nearby_all(
+                        latitude, longitude, radius=radius, max_results=60
+                    )
+                    stage.network(meta_r1_5)
                 net_calls += meta_r1_5["network_calls"]
                 all_cached = all_cached and meta_r1_5["cached"]
 
@@ -1199,10 +1351,12 @@ class AreaContextService:
             # Step 3: Ring 2 - Area classification with adaptive radius
             reasoning.append("Step 3: Analyzing Ring 2 (area classification).")
 
-            ring2_places, r2_calls, r2_cached, ring2_radius = self._adaptive_ring2_search(
+            ring2_places, r2_calls, r2_cached, ring2_radius, ring2_baseline = self._adaptive_ring2_search(
                 latitude, longitude,
                 geo_context["cityTier"],
-                reasoning
+                reasoning,
+                maps=maps,
+                density_index=density_index
             )
             net_calls += r2_calls
             all_cached = all_cached and r2_cached
@@ -1247,6 +1401,7 @@ class AreaContextService:
                 "placeGroups": group_counts,
                 "dominantGroup": dominant_type,
                 "dominanceRatio": round(dominance_ratio, 3),
+                "densityBaseline": ring2_baseline,
                 "skipped": False,
             }
 
@@ -1275,7 +1430,21 @@ class AreaContextService:
 
         # Step 4: Ring 3 - Movement context
         reasoning.append("Step 4: Analyzing Ring 3 (200m - movement context).")
-        move_ctx, meta_r3 = self.google_maps.movement_context(latitude, longitude, geo_full=geo_full)
+        if not geo_full.get("formattedAddress"):
+            # Road-type / junction hints need an address: only now pay for the geocode
+            with profile_stage("geo_address") as stage:
+                address_full, meta_addr = maps.reverse_geocode_full(latitude, longitude)
+                stage.network(meta_addr)
+            net_calls += meta_addr["network_calls"]
+            all_cached = all_cached and meta_addr["cached"]
+            geo_full = dict(geo_full, formattedAddress=address_full.get("formattedAddress", ""))
+            geo_context["formattedAddress"] = geo_full["formattedAddress"]
+        if geo_source == "offline":
+            # Keep replays (rescore_profiles) independent of the boundary file / address hint
+            maps.record_geocode(latitude, longitude, geo_full)
+        with profile_stage("ring3") as stage:
+            move_ctx, meta_r3 = maps.movement_context(latitude, longitude, geo_full=geo_full)
+            stage.network(meta_r3)
         net_calls += meta_r3["network_calls"]
         all_cached = all_cached and meta_r3["cached"]
 
@@ -1341,6 +1510,7 @@ class AreaContextService:
             "primaryType": area_block["primaryType"],
             "areaContext": area_block["context"],
             "movementType": movement_type,
+            "rawPlaces": maps.export(origin=(latitude, longitude)),
         }
 
     @staticmethod
@@ -1379,12 +1549,16 @@ class AreaContextService:
     # HYBRID & FULL-LLM METHODS
     # =========================================================================
 
+    @traced_run("hybrid")
     def analyze_screen_location_hybrid(
         self,
         latitude: float,
         longitude: float,
         indoor: bool = False,
-        height_from_ground_ft: float = 0.0
+        height_from_ground_ft: float = 0.0,
+        maps_source=None,
+        density_index=None,
+        address_hint: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Analyze screen location with hybrid mode (rules + selective LLM).
@@ -1401,6 +1575,9 @@ class AreaContextService:
             longitude: Screen longitude
             indoor: Whether screen is indoor
             height_from_ground_ft: Screen height from ground
+            maps_source: Alternative Google Maps source (see analyze_screen_location)
+            density_index: Alternative Ring 2 density baseline
+            address_hint: Known street address (see analyze_screen_location)
 
         Returns:
             Complete area context profile with LLM enhancement metadata
@@ -1410,134 +1587,258 @@ class AreaContextService:
             latitude=latitude,
             longitude=longitude,
             indoor=indoor,
-            height_from_ground_ft=height_from_ground_ft
+            height_from_ground_ft=height_from_ground_ft,
+            maps_source=maps_source,
+            density_index=density_index,
+            address_hint=address_hint
         )
 
         # Check if LLM enhancement is needed
         try:
-            from .llm_profiler import (
-                get_llm_profiler_service,
-                format_places_summary,
-                format_location_context,
-                format_dominance_metrics
-            )
+            from .llm_profiler import get_llm_profiler_service
 
             llm_service = get_llm_profiler_service()
-
-            if not llm_service.is_available:
-                profile["llmEnhancement"] = {
-                    "used": False,
-                    "reason": "LLM_NOT_AVAILABLE",
-                    "mode": "hybrid"
-                }
+            request = self._hybrid_llm_request(profile, llm_service)
+            if request is None:
                 return profile
 
-            # Get metrics for LLM decision
-            confidence = profile["area"]["confidence"]
-            dominance_ratio = profile.get("dominanceRatio", 0)
-
-            # Calculate second ratio
-            ring2_data = profile.get("ringAnalysis", {}).get("ring2", {})
-            group_counts = ring2_data.get("placeGroups", {})
-            places_count = ring2_data.get("uniquePlaces", 0)
-
-            second_ratio = 0.0
-            if group_counts and len(group_counts) > 1:
-                sorted_counts = sorted(group_counts.values(), reverse=True)
-                total = sum(sorted_counts)
-                if total > 0 and len(sorted_counts) > 1:
-                    second_ratio = sorted_counts[1] / total
-
-            # Check if LLM should be invoked
-            should_use, reason = llm_service.should_use_llm(
-                confidence=confidence,
-                dominance_ratio=dominance_ratio,
-                second_ratio=second_ratio,
-                places_count=places_count
-            )
+            # Resolve ambiguity with LLM
+            with profile_stage("llm"):
+                resolution = llm_service.resolve_ambiguity(
+                    rule_result=request["rule_result"],
+                    places_context=request["places_context"],
+                    dominance_metrics=request["dominance_metrics"]
+                )
+            self._apply_hybrid_resolution(profile, request["reason"], resolution)
 
-            if not should_use:
-                profile["llmEnhancement"] = {
-                    "used": False,
-                    "reason": reason,
-                    "mode": "hybrid"
-                }
-                return profile
+        except ImportError:
+            profile["llmEnhancement"] = {
+                "used": False,
+                "reason": "LLM_MODULE_NOT_INSTALLED",
+                "mode": "hybrid"
+            }
+        except Exception as e:
+            profile["llmEnhancement"] = {
+                "used": False,
+                "reason": f"LLM_ERROR: {str(e)}",
+                "mode": "hybrid"
+            }
+            profile["reasoning"].append(f"LLM enhancement failed: {str(e)}")
 
-            # Invoke LLM for ambiguity resolution
-            profile["reasoning"].append(f"Step 6: LLM enhancement triggered ({reason})")
-
-            # Format context for LLM
-            geo = profile.get("geoContext", {})
-            dominant_type = ring2_data.get("dominantGroup", "MIXED")
-
-            # Get second type
-            second_type = None
-            if group_counts:
-                sorted_groups = sorted(group_counts.items(), key=lambda x: -x[1])
-                if len(sorted_groups) > 1:
-                    second_type = sorted_groups[1][0]
-
-            dominance_metrics = format_dominance_metrics(
-                dominant_type=dominant_type,
-                dominance_ratio=dominance_ratio,
-                second_type=second_type or "N/A",
-                second_ratio=second_ratio,
-                group_counts=group_counts
-            )
+        return profile
 
-            places_summary = format_places_summary(group_counts, places_count)
+    def analyze_screen_locations_batch(
+        self,
+        locations: List[Dict[str, Any]],
+        mode: str = "hybrid",
+        max_workers: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Analyze many screens at once (batch profiling / onboarding).
 
-            rule_result = {
-                "primary_type": profile["area"]["primaryType"],
-                "context": profile["area"]["context"],
-                "confidence": confidence,
-                "classification_detail": profile["area"]["classificationDetail"]
-            }
+        Rule-based analysis runs per location (bounded pool, Maps limiter
+        still applies). In hybrid mode every location that needs the LLM is
+        then resolved through LLMProfilerService.resolve_ambiguity_batch,
+        which packs several locations into one Gemini call.
 
-            # Resolve ambiguity with LLM
-            resolution = llm_service.resolve_ambiguity(
-                rule_result=rule_result,
-                places_context=places_summary,
-                dominance_metrics=dominance_metrics
-            )
+        Args:
+            locations: [{"latitude", "longitude", "indoor", "height_from_ground_ft", "address"}, ...]
+            mode: "hybrid" or "rules"
+            max_workers: Rule-analysis concurrency (default SCREEN_PROFILE_BATCH_CONCURRENCY)
 
-            # Apply LLM resolution if override recommended
-            if resolution.get("should_override", False):
-                profile["area"]["primaryType"] = resolution["final_type"]
-                profile["area"]["context"] = resolution["final_context"]
-                profile["area"]["classificationDetail"] = "LLM_OVERRIDE"
-                profile["primaryType"] = resolution["final_type"]
-                profile["areaContext"] = resolution["final_context"]
-                profile["reasoning"].append(
-                    f"LLM override: {resolution.get('rationale', 'No rationale')}"
+        Returns:
+            Profiles in input order. A location whose analysis failed gets
+            {"error": "<message>"} instead of a profile.
+        """
+        if max_workers is None:
+            from django.conf import settings
+            max_workers = getattr(settings, "SCREEN_PROFILE_BATCH_CONCURRENCY", 4)
+
+        from .profile_coalescer import get_profile_coalescer
+        coalescer = get_profile_coalescer()
+
+        def analyze(location: Dict[str, Any]) -> Dict[str, Any]:
+            latitude = float(location["latitude"])
+            longitude = float(location["longitude"])
+            indoor = bool(location.get("indoor", False))
+            height_from_ground_ft = float(location.get("height_from_ground_ft") or 0.0)
+            try:
+                # Screens in the same building share one rule analysis
+                profile, _ = coalescer.profile_location(
+                    latitude, longitude, "rules",
+                    lambda: self.analyze_screen_location(
+                        latitude=latitude,
+                        longitude=longitude,
+                        indoor=indoor,
+                        height_from_ground_ft=height_from_ground_ft,
+                        address_hint=location.get("address")
+                    ),
+                    indoor=indoor, height_from_ground_ft=height_from_ground_ft,
+                    address_hint=location.get("address")
                 )
+                return profile
+            except Exception as e:
+                logger.error(f"Batch rule analysis failed for {location}: {e}")
+                return {"error": str(e)}
 
-            profile["llmEnhancement"] = {
-                "used": True,
-                "reason": reason,
-                "mode": "hybrid",
-                "override": resolution.get("should_override", False),
-                "rationale": resolution.get("rationale", ""),
-                "latencyMs": resolution.get("latency_ms", 0)
-            }
+        if not locations:
+            return []
+        with ThreadPoolExecutor(max_workers=max(1, min(int(max_workers), len(locations)))) as pool:
+            profiles = list(pool.map(analyze, locations))
+
+        if mode != "hybrid":
+            return profiles
+
+        try:
+            from .llm_profiler import get_llm_profiler_service
+
+            llm_service = get_llm_profiler_service()
+            pending = []
+            for profile in profiles:
+                if "error" in profile:
+                    continue
+                request = self._hybrid_llm_request(profile, llm_service)
+                if request is not None:
+                    pending.append((profile, request))
+
+            if pending:
+                # One telemetry run for the packed LLM stage (rule runs are recorded per location)
+                with profiling_run("hybrid_batch"), profile_stage("llm") as stage:
+                    stage.calls = len(pending)
+                    resolutions = llm_service.resolve_ambiguity_batch([request for _, request in pending])
+                for (profile, request), resolution in zip(pending, resolutions):
+                    self._apply_hybrid_resolution(profile, request["reason"], resolution)
 
         except ImportError:
+            for profile in profiles:
+                if "error" not in profile and "llmEnhancement" not in profile:
+                    profile["llmEnhancement"] = {
+                        "used": False,
+                        "reason": "LLM_MODULE_NOT_INSTALLED",
+                        "mode": "hybrid"
+                    }
+        except Exception as e:
+            for profile in profiles:
+                if "error" not in profile and "llmEnhancement" not in profile:
+                    profile["llmEnhancement"] = {
+                        "used": False,
+                        "reason": f"LLM_ERROR: {str(e)}",
+                        "mode": "hybrid"
+                    }
+                    profile["reasoning"].append(f"LLM enhancement failed: {str(e)}")
+
+        return profiles
+
+    def _hybrid_llm_request(self, profile: Dict[str, Any], llm_service) -> Optional[Dict[str, Any]]:
+        """
+        Decide whether a rule-based profile needs the LLM.
+
+        Returns the resolve_ambiguity inputs (plus "reason"), or None after
+        recording why the LLM was skipped in profile["llmEnhancement"].
+        """
+        from .llm_profiler import format_places_summary, format_dominance_metrics
+
+        if not llm_service.is_available:
             profile["llmEnhancement"] = {
                 "used": False,
-                "reason": "LLM_MODULE_NOT_INSTALLED",
+                "reason": "LLM_NOT_AVAILABLE",
                 "mode": "hybrid"
             }
-        except Exception as e:
+            return None
+
+        # Get metrics for LLM decision
+        confidence = profile["area"]["confidence"]
+        dominance_ratio = profile.get("dominanceRatio", 0)
+
+        # Calculate second ratio
+        ring2_data = profile.get("ringAnalysis", {}).get("ring2", {})
+        group_counts = ring2_data.get("placeGroups", {})
+        places_count = ring2_data.get("uniquePlaces", 0)
+
+        second_ratio = 0.0
+        if group_counts and len(group_counts) > 1:
+            sorted_counts = sorted(group_counts.values(), reverse=True)
+            total = sum(sorted_counts)
+            if total > 0 and len(sorted_counts) > 1:
+                second_ratio = sorted_counts[1] / total
+
+        # Check if LLM should be invoked
+        should_use, reason = llm_service.should_use_llm(
+            confidence=confidence,
+            dominance_ratio=dominance_ratio,
+            second_ratio=second_ratio,
+            places_count=places_count
+        )
+
+        if not should_use:
             profile["llmEnhancement"] = {
                 "used": False,
-                "reason": f"LLM_ERROR: {str(e)}",
+                "reason": reason,
                 "mode": "hybrid"
             }
-            profile["reasoning"].append(f"LLM enhancement failed: {str(e)}")
+            return None
 
-        return profile
+        profile["reasoning"].append(f"Step 6: LLM enhancement triggered ({reason})")
+
+        # Format context for LLM
+        dominant_type = ring2_data.get("dominantGroup", "MIXED")
+
+        # Get second type
+        second_type = None
+        if group_counts:
+            sorted_groups = sorted(group_counts.items(), key=lambda x: -x[1])
+            if len(sorted_groups) > 1:
+                second_type = sorted_groups[1][0]
+
+        dominance_metrics = format_dominance_metrics(
+            dominant_type=dominant_type,
+            dominance_ratio=dominance_ratio,
+            second_type=second_type or "N/A",
+            second_ratio=second_ratio,
+            group_counts=group_counts
+        )
+
+        places_summary = format_places_summary(group_counts, places_count)
+
+        rule_result = {
+            "primary_type": profile["area"]["primaryType"],
+            "context": profile["area"]["context"],
+            "confidence": confidence,
+            "classification_detail": profile["area"]["classificationDetail"]
+        }
+
+        return {
+            "reason": reason,
+            "rule_result": rule_result,
+            "places_context": places_summary,
+            "dominance_metrics": dominance_metrics,
+        }
+
+    @staticmethod
+    def _apply_hybrid_resolution(profile: Dict[str, Any], reason: str, resolution: Dict[str, Any]) -> None:
+        """Apply an LLM ambiguity resolution to a hybrid profile."""
+        # Apply LLM resolution if override recommended
+        if resolution.get("should_override", False):
+            profile["area"]["primaryType"] = resolution["final_type"]
+            profile["area"]["context"] = resolution["final_context"]
+            profile["area"]["classificationDetail"] = "LLM_OVERRIDE"
+            profile["primaryType"] = resolution["final_type"]
+            profile["areaContext"] = resolution["final_context"]
+            profile["reasoning"].append(
+                f"LLM override: {resolution.get('rationale', 'No rationale')}"
+            )
 
+        profile["llmEnhancement"] = {
+            "used": True,
+            "reason": reason,
+            "mode": "hybrid",
+            "override": resolution.get("should_override", False),
+            "rationale": resolution.get("rationale", ""),
+            "latencyMs": resolution.get("latency_ms", 0),
+            "batched": resolution.get("batched", False)
+        }
+
+    @traced_run("full_llm")
     def analyze_screen_location_full_llm(
         self,
         latitude: float,
@@ -1576,7 +1877,9 @@ class AreaContextService:
 
         # Step 1: Geographic context
         reasoning.append("Step 1: Fetching geographic context.")
-        geo_full, meta_geo = self.google_maps.reverse_geocode_full(latitude, longitude)
+        with profile_stage("geo") as stage:
+            geo_full, meta_geo = self.google_maps.reverse_geocode_full(latitude, longitude)
+            stage.network(meta_geo)
         net_calls += meta_geo["network_calls"]
         all_cached = all_cached and meta_geo["cached"]
 
@@ -1594,9 +1897,11 @@ class AreaContextService:
 
         # Step 2: Ring 1 - Authority detection (still fetch for context)
         reasoning.append("Step 2: Analyzing Ring 1 (75m - authority context).")
-        ring1_places, meta_r1 = self.google_maps.places_nearby_all(
-            latitude, longitude, radius=75, max_results=20
-        )
+        with profile_stage("ring1") as stage:
+            ring1_places, meta_r1 = self.google_maps.places_nearby_all(
+                latitude, longitude, radius=75, max_results=20
+            )
+            stage.network(meta_r1)
         net_calls += meta_r1["network_calls"]
         all_cached = all_cached and meta_r1["cached"]
 
@@ -1608,7 +1913,7 @@ class AreaContextService:
 
         # Step 3: Ring 2 - Area classification
         reasoning.append("Step 3: Analyzing Ring 2 (area classification).")
-        ring2_places, r2_calls, r2_cached, ring2_radius = self._adaptive_ring2_search(
+        ring2_places, r2_calls, r2_cached, ring2_radius, ring2_baseline = self._adaptive_ring2_search(
             latitude, longitude,
             geo_context["cityTier"],
             reasoning
@@ -1641,6 +1946,7 @@ class AreaContextService:
                 "placeGroups": group_counts,
                 "dominantGroup": dominant_type,
                 "dominanceRatio": round(dominance_ratio, 3),
+                "densityBaseline": ring2_baseline,
                 "skipped": False,
             }
         }
@@ -1648,21 +1954,29 @@ class AreaContextService:
         # Step 4: Enrich places with editorial summaries (NEW)
         reasoning.append("Step 4: Enriching places with editorial summaries.")
 
-        # Combine Ring 1 and Ring 2 places for enrichment (prioritize Ring 1)
-        all_places_for_enrichment = ring1_unique + [
-            p for p in ring2_places if p not in ring1_unique
-        ]
+        # Combine Ring 1 and Ring 2 places for enrichment (prioritize Ring 1), merged by place_id
+        seen_place_ids = {p.get("place_id") for p in ring1_unique if p.get("place_id")}
+        all_places_for_enrichment = list(ring1_unique)
+        for p in ring2_places:
+            place_id = p.get("place_id")
+            if place_id:
+                if place_id in seen_place_ids:
+                    continue
+                seen_place_ids.add(place_id)
+            all_places_for_enrichment.append(p)
 
         # Enrich top places with detailed info (editorial_summary, rating, viewport)
         # Enhanced scoring (v2.1):
         # - authority_type(+1000) + satellite_pattern(+800) + density_bonus(+600)
         # - user_ratings(capped 1000) + high_rating(+100) + name_keywords(+500)
         # - coherence_bonus(+400) + false_positive_penalty(-500)
-        enriched_places, enrich_meta = self.google_maps.enrich_places_with_details(
-            all_places_for_enrichment,
-            max_enrichments=20,  # Top 20 by priority score
-            ring1_place_count=len(ring1_unique)  # Pass Ring 1 count for density scoring
-        )
+        with profile_stage("enrich") as stage:
+            enriched_places, enrich_meta = self.google_maps.enrich_places_with_details(
+                all_places_for_enrichment,
+                max_enrichments=20,  # Top 20 by priority score
+                ring1_place_count=len(ring1_unique)  # Pass Ring 1 count for density scoring
+            )
+            stage.network(enrich_meta, calls=int(enrich_meta.get("enriched", 0) or 0))
         net_calls += enrich_meta["network_calls"]
         all_cached = all_cached and enrich_meta["cached"]
 
@@ -1671,7 +1985,8 @@ class AreaContextService:
             1 for p in enriched_places if p.get("editorial_summary")
         )
         reasoning.append(
-            f"Enriched {len(enriched_places)} places, "
+            f"Enriched {enrich_meta.get('enriched', 0)} of {len(enriched_places)} places "
+            f"({enrich_meta.get('cacheHits', 0)} from cache), "
             f"{places_with_editorial} have editorial summaries"
         )
 
@@ -1705,9 +2020,8 @@ class AreaContextService:
             )
             # Use AUTHORITY_TYPES from this module (already defined above)
             # Pass enriched Ring 1 places for authority detection (with editorial summaries)
-            enriched_ring1 = [p for p in enriched_places if p in ring1_unique or any(
-                ep.get("place_id") == p.get("place_id") for ep in enriched_places[:len(ring1_unique)]
-            )][:len(ring1_unique)]
+            # Enrichment keeps input order, so Ring 1 places lead the list
+            enriched_ring1 = enriched_places[:len(ring1_unique)]
 
             authority_candidates = format_authority_candidates(enriched_ring1, AUTHORITY_TYPES)
 
@@ -1715,14 +2029,15 @@ class AreaContextService:
             enriched_places_context = format_enriched_places_context(enriched_places, max_places=15)
 
             # Get LLM classification with enriched context
-            llm_result = llm_service.classify_full_llm(
-                places_summary=places_summary,
-                location_context=location_context,
-                authority_candidates=authority_candidates,
-                latitude=latitude,
-                longitude=longitude,
-                enriched_places_context=enriched_places_context
-            )
+            with profile_stage("llm"):
+                llm_result = llm_service.classify_full_llm(
+                    places_summary=places_summary,
+                    location_context=location_context,
+                    authority_candidates=authority_candidates,
+                    latitude=latitude,
+                    longitude=longitude,
+                    enriched_places_context=enriched_places_context
+                )
 
             primary_type = llm_result.primary_type
             area_context = llm_result.area_context
@@ -1742,7 +2057,7 @@ class AreaContextService:
                 "latencyMs": llm_result.latency_ms,
                 "cached": llm_result.cached,
                 "error": llm_result.error,
-                "enrichedPlaces": len(enriched_places),
+                "enrichedPlaces": enrich_meta.get("enriched", 0),
                 "placesWithEditorial": places_with_editorial
             }
 
@@ -1779,7 +2094,9 @@ class AreaContextService:
 
         # Step 6: Ring 3 - Movement context
         reasoning.append("Step 6: Analyzing Ring 3 (200m - movement context).")
-        move_ctx, meta_r3 = self.google_maps.movement_context(latitude, longitude, geo_full=geo_full)
+        with profile_stage("ring3") as stage:
+            move_ctx, meta_r3 = self.google_maps.movement_context(latitude, longitude, geo_full=geo_full)
+            stage.network(meta_r3)
         net_calls += meta_r3["network_calls"]
         all_cached = all_cached and meta_r3["cached"]
 
@@ -1845,6 +2162,7 @@ class AreaContextService:
         }
 
 
+    @traced_run("research")
     def analyze_screen_location_research_agent(
         self,
         latitude: float,
@@ -1884,7 +2202,9 @@ class AreaContextService:
 
         # Step 1: Geographic context
         reasoning.append("Step 1: Fetching geographic context.")
-        geo_full, meta_geo = self.google_maps.reverse_geocode_full(latitude, longitude)
+        with profile_stage("geo") as stage:
+            geo_full, meta_geo = self.google_maps.reverse_geocode_full(latitude, longitude)
+            stage.network(meta_geo)
         net_calls += meta_geo["network_calls"]
         all_cached = all_cached and meta_geo["cached"]
 
@@ -1902,9 +2222,11 @@ class AreaContextService:
 
         # Step 2: Ring 1 - Authority detection
         reasoning.append("Step 2: Analyzing Ring 1 (75m - authority context).")
-        ring1_places, meta_r1 = self.google_maps.places_nearby_all(
-            latitude, longitude, radius=75, max_results=20
-        )
+        with profile_stage("ring1") as stage:
+            ring1_places, meta_r1 = self.google_maps.places_nearby_all(
+                latitude, longitude, radius=75, max_results=20
+            )
+            stage.network(meta_r1)
         net_calls += meta_r1["network_calls"]
         all_cached = all_cached and meta_r1["cached"]
 
@@ -1913,7 +2235,7 @@ class AreaContextService:
 
         # Step 3: Ring 2 - Area classification data
         reasoning.append("Step 3: Analyzing Ring 2 (area classification).")
-        ring2_places, r2_calls, r2_cached, ring2_radius = self._adaptive_ring2_search(
+        ring2_places, r2_calls, r2_cached, ring2_radius, ring2_baseline = self._adaptive_ring2_search(
             latitude, longitude,
             geo_context["cityTier"],
             reasoning
@@ -1942,6 +2264,7 @@ class AreaContextService:
                 "placeGroups": group_counts,
                 "dominantGroup": dominant_type,
                 "dominanceRatio": round(dominance_ratio, 3),
+                "densityBaseline": ring2_baseline,
             }
         }
 
@@ -1967,12 +2290,13 @@ class AreaContextService:
             }
 
             # Run research agent
-            agent_result = research_service.classify(
-                latitude=latitude,
-                longitude=longitude,
-                places_data=places_data,
-                location_context=geo_context
-            )
+            with profile_stage("research"):
+                agent_result = research_service.classify(
+                    latitude=latitude,
+                    longitude=longitude,
+                    places_data=places_data,
+                    location_context=geo_context
+                )
 
             primary_type = agent_result.primary_type
             area_context = agent_result.area_context
@@ -2031,7 +2355,9 @@ class AreaContextService:
 
         # Step 5: Ring 3 - Movement context
         reasoning.append("Step 5: Analyzing Ring 3 (200m - movement context).")
-        move_ctx, meta_r3 = self.google_maps.movement_context(latitude, longitude, geo_full=geo_full)
+        with profile_stage("ring3") as stage:
+            move_ctx, meta_r3 = self.google_maps.movement_context(latitude, longitude, geo_full=geo_full)
+            stage.network(meta_r3)
         net_calls += meta_r3["network_calls"]
         all_cached = all_cached and meta_r3["cached"]
 
@@ -0,0 +1,248 @@
+"""
+Place-density baseline for Ring 2 (adaptive radius)
+
+_adaptive_ring2_search starts at a tier-based radius and re-queries Places
+with larger radii until enough unique places are found. In sparse areas that
+costs up to max_expansions + 1 paged searches per profile.
+
+This index learns, per geohash cell, the Ring 2 radius that previous profiles
+needed and predicts a starting radius for new locations in the same cell.
+Predictions are snapped onto the same expansion grid (base + k * step), so a
+correct prediction lands on exactly the radius the expanding search would have
+reached - only the intermediate queries are skipped.
+
+Each profile records the smallest grid radius whose places (by distance
+from the screen) already met the threshold, not the radius the search
+stopped at. A search that started high on a prediction can therefore
+record a lower radius, and a cell's baseline moves down as well as up.
+
+Storage:
+- Cell observations live in the Django cache (30 days)
+- Cold cells are backfilled from stored ScreenProfile.ring2_analysis rows
+"""
+from __future__ import annotations
+
+import logging
+import math
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.core.cache import cache
+
+from .place_archive import haversine_m
+
+logger = logging.getLogger(__name__)
+
+# ~4.9km x 4.9km cells - small enough to share density, large enough to learn
+GEOHASH_PRECISION = 5
+MIN_SAMPLES = 2
+MAX_SAMPLES_PER_CELL = 50
+CELL_CACHE_TTL = 2592000
+
+_GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_encode(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars: List[str] = []
+    bit, ch, even = 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lng_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            ch |= 1 << (4 - bit)
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        if bit < 4:
+            bit += 1
+        else:
+            chars.append(_GEOHASH_BASE32[ch])
+            bit, ch = 0, 0
+    return "".join(chars)
+
+
+def geohash_bounds(geohash: str) -> Tuple[float, float, float, float]:
+    """Returns (min_lat, max_lat, min_lng, max_lng) of a geohash cell."""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    even = True
+    for c in geohash:
+        idx = _GEOHASH_BASE32.index(c)
+        for shift in range(4, -1, -1):
+            rng = lng_range if even else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if (idx >> shift) & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+    return lat_range[0], lat_range[1], lng_range[0], lng_range[1]
+
+
+def smallest_sufficient_radius(
+    latitude: float,
+    longitude: float,
+    unique_places: List[Dict[str, Any]],
+    base_radius: int,
+    final_radius: int,
+    config: Dict[str, Any],
+) -> int:
+    """
+    Smallest radius on the expansion grid (base + k * step, up to
+    final_radius) at which unique_places already met min_places_threshold.
+    Places without coordinates count only at final_radius.
+    Returns final_radius when the threshold was never met.
+    """
+    threshold = config["min_places_threshold"]
+    if len(unique_places) < threshold:
+        return final_radius
+    distances = []
+    for place in unique_places:
+        loc = (place.get("geometry") or {}).get("location") or {}
+        if "lat" in loc and "lng" in loc:
+            distances.append(haversine_m(latitude, longitude, loc["lat"], loc["lng"]))
+    distances.sort()
+    if len(distances) < threshold:
+        return final_radius
+    # Distance of the threshold-th nearest place, snapped up onto the grid
+    needed = distances[threshold - 1]
+    step = config["expansion_step"]
+    steps = max(0, math.ceil((needed - base_radius) / step))
+    return int(min(base_radius + steps * step, final_radius))
+
+
+class DensityBaselineIndex:
+    """Per-geohash record of the Ring 2 radius previous profiles needed."""
+
+    def __init__(self, precision: int = GEOHASH_PRECISION):
+        self.precision = precision
+        self._lock = threading.Lock()
+        self._stats = {
+            "predictions": 0,
+            "cold_cells": 0,
+            "expansions_saved": 0,
+            "expansions_still_needed": 0,
+            "recorded": 0,
+        }
+
+    def _cell_key(self, cell: str) -> str:
+        return f"ring2_density_{cell}"
+
+    def _load_cell(self, cell: str) -> Dict[str, Dict[str, Any]]:
+        observations = cache.get(self._cell_key(cell))
+        if observations is not None:
+            return observations
+        observations = self._backfill_from_profiles(cell)
+        cache.set(self._cell_key(cell), observations, CELL_CACHE_TTL)
+        return observations
+
+    def _backfill_from_profiles(self, cell: str) -> Dict[str, Dict[str, Any]]:
+        """Seed a cold cell from already-stored profiles inside its bounds."""
+        observations: Dict[str, Dict[str, Any]] = {}
+        try:
+            from .models import ScreenProfile
+            min_lat, max_lat, min_lng, max_lng = geohash_bounds(cell)
+            rows = (
+                ScreenProfile.objects
+                .filter(
+                    latitude__gte=min_lat, latitude__lt=max_lat,
+                    longitude__gte=min_lng, longitude__lt=max_lng,
+                )
+                .order_by("-profiled_at")
+                .values_list("latitude", "longitude", "ring2_analysis")[:MAX_SAMPLES_PER_CELL]
+            )
+            for lat, lng, ring2 in rows:
+                if not isinstance(ring2, dict) or ring2.get("skipped") or not ring2.get("radius"):
+                    continue
+                needed = (ring2.get("densityBaseline") or {}).get("neededRadius")
+                observations[f"{round(float(lat), 4)},{round(float(lng), 4)}"] = {
+                    "radius": int(needed or ring2["radius"]),
+                    "unique": int(ring2.get("uniquePlaces") or 0),
+                }
+        except Exception as e:
+            logger.warning(f"Density baseline backfill failed for {cell}: {e}")
+        return observations
+
+    def predict(
+        self,
+        latitude: float,
+        longitude: float,
+        base_radius: int,
+        config: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """
+        Predict the Ring 2 starting radius for a location.
+
+        Returns a dict with startRadius, skippedExpansions, samples and geohash.
+        startRadius == base_radius when the cell has too little history.
+        """
+        cell = geohash_encode(latitude, longitude, self.precision)
+        observations = self._load_cell(cell)
+        result = {
+            "geohash": cell,
+            "samples": len(observations),
+            "startRadius": base_radius,
+            "skippedExpansions": 0,
+        }
+        if len(observations) < MIN_SAMPLES:
+            with self._lock:
+                self._stats["cold_cells"] += 1
+            return result
+
+        # Lower median: an overshoot changes the ring, an undershoot only costs a query
+        radii = sorted(obs["radius"] for obs in observations.values())
+        predicted = radii[(len(radii) - 1) // 2]
+
+        step = config["expansion_step"]
+        max_steps = config["max_expansions"]
+        steps = 0
+        if predicted > base_radius:
+            steps = min(math.ceil((predicted - base_radius) / step), max_steps)
+        start_radius = min(base_radius + steps * step, config["max_radius"])
+
+        result["startRadius"] = start_radius
+        result["skippedExpansions"] = steps
+        with self._lock:
+            self._stats["predictions"] += 1
+        return result
+
+    def record(
+        self,
+        latitude: float,
+        longitude: float,
+        final_radius: int,
+        unique_places: int,
+        skipped_expansions: int = 0,
+        expansions_made: int = 0,
+    ) -> None:
+        cell = geohash_encode(latitude, longitude, self.precision)
+        observations = dict(self._load_cell(cell))
+        observations[f"{round(float(latitude), 4)},{round(float(longitude), 4)}"] = {
+            "radius": int(final_radius),
+            "unique": int(unique_places),
+        }
+        if len(observations) > MAX_SAMPLES_PER_CELL:
+            for stale in list(observations.keys())[: len(observations) - MAX_SAMPLES_PER_CELL]:
+                observations.pop(stale, None)
+        cache.set(self._cell_key(cell), observations, CELL_CACHE_TTL)
+        with self._lock:
+            self._stats["recorded"] += 1
+            self._stats["expansions_saved"] += skipped_expansions
+            self._stats["expansions_still_needed"] += expansions_made
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats)
+
+
+_density_index: Optional[DensityBaselineIndex] = None
+
+
+def get_density_baseline_index() -> DensityBaselineIndex:
+    global _density_index
+    if _density_index is None:
+        _density_index = DensityBaselineIndex()
+    return _density_index
@@ -4,19 +4,33 @@ Fixes vs previous version
 - Reverse geocode full response is cached once and reused for geo+road hints
 - Places Nearby supports pagination (up to 3 pages = 60 results) with max_results guard
 - Every method returns meta so caller can count real network calls
+- All client calls go through a token-bucket limiter (GOOGLE_MAPS_QPS / GOOGLE_MAPS_BURST,
+  GOOGLE_MAPS_SHARED_LIMIT=1 to enforce the budget across processes via RATE_LIMIT_CACHE_ALIAS)
+- Concurrent identical geocode / nearby requests are coalesced into one in-flight call
+- Place Details are cached durably per place_id (GOOGLE_PLACES_CACHE_ALIAS)
 """
 from __future__ import annotations
+import math
 import os
 import time
 from typing import Any, Dict, List, Optional, Tuple
 import googlemaps
-from django.core.cache import cache
+from django.core.cache import cache, caches
+from .rate_limiter import SingleFlight, TokenBucketLimiter
 
 class GoogleMapsAreaContextService:
 
     def __init__(self):
         self._client: Optional[googlemaps.Client] = None
         self._api_key: str = ""
+        self._limiter = TokenBucketLimiter(
+            rate=float(os.environ.get("GOOGLE_MAPS_QPS", "10")),
+            capacity=float(os.environ.get("GOOGLE_MAPS_BURST", "10")),
+            max_wait=float(os.environ.get("GOOGLE_MAPS_MAX_WAIT_SEC", "15")),
+            shared=os.environ.get("GOOGLE_MAPS_SHARED_LIMIT", "0") == "1",
+            cache_prefix="gmaps_qps",
+        )
+        self._single_flight = SingleFlight()
         self._init_client()
 
     def _init_client(self) -> None:
@@ -36,6 +50,17 @@ class GoogleMapsAreaContextService:
             self._init_client()
         return self._client
 
+    def _throttled(self, fn, *args, **kwargs):
+        self._limiter.acquire()
+        return fn(*args, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        """Limiter + coalescing counters (waits, rejections, coalesced hits)."""
+        return {
+            "rate_limiter": self._limiter.stats(),
+            "single_flight": self._single_flight.stats(),
+        }
+
     def reverse_geocode_full(self, latitude: float, longitude: float) -> Tuple[Dict[str, Any], Dict[str, Any]]:
         client = self.client
         if not client:
@@ -56,7 +81,15 @@ class GoogleMapsAreaContextService:
         cached = cache.get(cache_key)
         if cached:
             return cached, {"cached": True, "network_calls": 0}
-        result = client.reverse_geocode((latitude, longitude)) or []
+        geo_full, shared = self._single_flight.do(
+            cache_key, lambda: self._fetch_reverse_geocode(client, latitude, longitude, cache_key)
+        )
+        if shared:
+            return geo_full, {"cached": True, "network_calls": 0, "coalesced": True}
+        return geo_full, {"cached": False, "network_calls": 1}
+
+    def _fetch_reverse_geocode(self, client: googlemaps.Client, latitude: float, longitude: float, cache_key: str) -> Dict[str, Any]:
+        result = self._throttled(client.reverse_geocode, (latitude, longitude)) or []
         if not result:
             geo_full = {
                 "city": "Unknown",
@@ -67,7 +100,7 @@ class GoogleMapsAreaContextService:
                 "addressComponents": [],
             }
             cache.set(cache_key, geo_full, 2592000)
-            return geo_full, {"cached": False, "network_calls": 1}
+            return geo_full
         address_components = result[0].get("address_components", []) or []
         formatted_address = result[0].get("formatted_address", "") or ""
         city = "Unknown"
@@ -92,7 +125,7 @@ class GoogleMapsAreaContextService:
             "addressComponents": address_components,
         }
         cache.set(cache_key, geo_full, 2592000)
-        return geo_full, {"cached": False, "network_calls": 1}
+        return geo_full
 
     def places_nearby_all(self, latitude: float, longitude: float, radius: int, max_results: int = 60) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
         client = self.client
@@ -105,6 +138,14 @@ class GoogleMapsAreaContextService:
         cached = cache.get(cache_key)
         if cached is not None:
             return cached, {"cached": True, "network_calls": 0}
+        (places, network_calls), shared = self._single_flight.do(
+            cache_key, lambda: self._fetch_places_nearby(client, latitude, longitude, radius, max_results, cache_key)
+        )
+        if shared:
+            return places, {"cached": True, "network_calls": 0, "coalesced": True}
+        return places, {"cached": False, "network_calls": network_calls}
+
+    def _fetch_places_nearby(self, client: googlemaps.Client, latitude: float, longitude: float, radius: int, max_results: int, cache_key: str) -> Tuple[List[Dict[str, Any]], int]:
         location = (float(latitude), float(longitude))
         places: List[Dict[str, Any]] = []
         token: Optional[str] = None
@@ -114,9 +155,9 @@ class GoogleMapsAreaContextService:
         for _ in range(pages_needed):
             if token:
                 time.sleep(2)
-                resp = client.places_nearby(location=location, radius=radius, page_token=token)
+                resp = self._throttled(client.places_nearby, location=location, radius=radius, page_token=token)
             else:
-                resp = client.places_nearby(location=location, radius=radius)
+                resp = self._throttled(client.places_nearby, location=location, radius=radius)
             network_calls += 1
             batch = resp.get("results", []) or []
             places.extend(batch)
@@ -127,7 +168,73 @@ class GoogleMapsAreaContextService:
             if not token:
                 break
         cache.set(cache_key, places, 604800)
-        return places, {"cached": False, "network_calls": network_calls}
+        return places, network_calls
+
+    # Details fields used by enrichment / LLM prompts
+    PLACE_DETAILS_FIELDS = [
+        "place_id", "name", "editorial_summary", "rating", "user_ratings_total",
+        "geometry/viewport", "business_status",
+    ]
+
+    @property
+    def _details_cache(self):
+        from django.conf import settings
+        alias = getattr(settings, "GOOGLE_PLACES_CACHE_ALIAS", "default")
+        try:
+            return caches[alias]
+        except Exception:
+            return cache
+
+    def place_details(self, place_id: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Place Details for one place_id, cached 30 days (shared by every nearby screen)."""
+        client = self.client
+        if not client or not place_id:
+            return {}, {"cached": True, "network_calls": 0}
+        cache_key = f"place_details_{place_id}"
+        try:
+            cached = self._details_cache.get(cache_key)
+        except Exception:
+            cached = None
+        if cached is not None:
+            return cached, {"cached": True, "network_calls": 0}
+        details, shared = self._single_flight.do(
+            cache_key, lambda: self._fetch_place_details(client, place_id, cache_key)
+        )
+        if shared:
+            return details, {"cached": True, "network_calls": 0, "coalesced": True}
+        return details, {"cached": False, "network_calls": 1}
+
+    def _fetch_place_details(self, client: googlemaps.Client, place_id: str, cache_key: str) -> Dict[str, Any]:
+        resp = self._throttled(client.place, place_id, fields=self.PLACE_DETAILS_FIELDS) or {}
+        details = resp.get("result", {}) or {}
+        if resp.get("status") != "OK" or not details:
+            # NOT_FOUND / INVALID_REQUEST etc. may be transient; don't pin them for 30 days
+            return details
+        try:
+            self._details_cache.set(cache_key, details, 2592000)
+        except Exception:
+            # place_details() only reads this cache; a failed write just means a refetch
+            pass
+        return details
+
+    def enrich_places_with_details(self, places: List[Dict[str, Any]], max_enrichments: int = 20, ring1_place_count: int = 0) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        from .place_enrichment import get_place_enrichment_service
+        return get_place_enrichment_service(self).enrich(
+            places, max_enrichments=max_enrichments, ring1_place_count=ring1_place_count
+        )
+
+    @staticmethod
+    def calculate_viewport_area(viewport: Dict[str, Any]) -> float:
+        """Approximate viewport area in square metres."""
+        try:
+            ne = viewport["northeast"]
+            sw = viewport["southwest"]
+            mean_lat = math.radians((ne["lat"] + sw["lat"]) / 2)
+            height = abs(ne["lat"] - sw["lat"]) * 111320.0
+            width = abs(ne["lng"] - sw["lng"]) * 111320.0 * math.cos(mean_lat)
+            return height * width
+        except (KeyError, TypeError):
+            return 0.0
 
     def movement_context(self, latitude: float, longitude: float, geo_full: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
         network_calls = 0
@@ -0,0 +1,168 @@
+"""
+Shared LLM response cache for the screen profiler
+
+Gemini responses are keyed by sha256(model, prompt, generation config) and
+stored in two tiers:
+- In-process LRU with TTL (bounded by LLM_CACHE_MEMORY_ENTRIES)
+- Django cache alias LLM_CACHE_ALIAS ('llm' -> DatabaseCache): shared by all
+  workers, survives deploys, bounded by MAX_ENTRIES culling
+
+If the durable tier is unavailable (e.g. createcachetable not run yet) the
+cache degrades to memory-only instead of failing the profile.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from .telemetry import note_llm_cache
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe in-process LRU with per-entry TTL. Dict-like for drop-in use."""
+
+    def __init__(self, maxsize: int = 512, ttl: Optional[float] = None):
+        self.maxsize = max(1, int(maxsize))
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires_at = item
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.set(key, value)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class LLMResponseCache:
+
+    def __init__(self, alias: Optional[str] = None, ttl: Optional[int] = None, memory_entries: Optional[int] = None):
+        from django.conf import settings
+        self.alias = alias or getattr(settings, "LLM_CACHE_ALIAS", "default")
+        self.ttl = int(ttl or getattr(settings, "LLM_CACHE_TTL", 60 * 60 * 24 * 14))
+        self._memory = LRUCache(
+            maxsize=memory_entries or getattr(settings, "LLM_CACHE_MEMORY_ENTRIES", 512),
+            ttl=self.ttl,
+        )
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "shared_hits": 0, "misses": 0, "stores": 0, "shared_errors": 0}
+
+    @property
+    def _shared(self):
+        from django.core.cache import caches
+        return caches[self.alias]
+
+    @staticmethod
+    def make_key(model: str, prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> str:
+        raw = json.dumps(
+            {"model": model, "prompt": prompt, "config": generation_config or {}},
+            sort_keys=True, separators=(",", ":"), default=str,
+        )
+        return "llm_resp_" + hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _count(self, stat: str) -> None:
+        with self._lock:
+            self._stats[stat] += 1
+
+    def get(self, model: str, prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> Any:
+        key = self.make_key(model, prompt, generation_config)
+        value = self._memory.get(key, _MISSING)
+        if value is not _MISSING:
+            self._count("memory_hits")
+            note_llm_cache(True)
+            return value
+        try:
+            value = self._shared.get(key, _MISSING)
+        except Exception as e:
+            self._count("shared_errors")
+            logger.warning(f"LLM cache read failed ({self.alias}): {e}")
+            value = _MISSING
+        if value is not _MISSING:
+            self._memory.set(key, value)
+            self._count("shared_hits")
+            note_llm_cache(True)
+            return value
+        self._count("misses")
+        note_llm_cache(False)
+        return None
+
+    def set(self, model: str, prompt: str, value: Any, generation_config: Optional[Dict[str, Any]] = None) -> None:
+        key = self.make_key(model, prompt, generation_config)
+        self._memory.set(key, value)
+        self._count("stores")
+        try:
+            self._shared.set(key, value, self.ttl)
+        except Exception as e:
+            self._count("shared_errors")
+            logger.warning(f"LLM cache write failed ({self.alias}): {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            data = dict(self._stats)
+        lookups = data["memory_hits"] + data["shared_hits"] + data["misses"]
+        data["lookups"] = lookups
+        data["hit_rate"] = round((data["memory_hits"] + data["shared_hits"]) / lookups, 4) if lookups else 0.0
+        data["memory_entries"] = len(self._memory)
+        data["alias"] = self.alias
+        return data
+
+    def clear_memory(self) -> None:
+        self._memory.clear()
+
+
+_llm_response_cache: Optional[LLMResponseCache] = None
+
+
+def get_llm_response_cache() -> LLMResponseCache:
+    global _llm_response_cache
+    if _llm_response_cache is None:
+        _llm_response_cache = LLMResponseCache()
+    return _llm_response_cache
+
+
+def reset_llm_response_cache():
+    global _llm_response_cache
+    _llm_response_cache = None
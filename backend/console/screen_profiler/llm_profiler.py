@@ -22,17 +22,17 @@ from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 
-try:
-    import dspy
-    DSPY_AVAILABLE = True
-except ImportError:
-    DSPY_AVAILABLE = False
+from .llm_cache import LRUCache, get_llm_response_cache
+from .telemetry import note_llm_call
 
-try:
-    import google.generativeai as genai
-    GEMINI_AVAILABLE = True
-except ImportError:
-    GEMINI_AVAILABLE = False
+from Main.lazy_imports import lazy_import, module_available
+
+# Heavy SDKs are imported on first use, not when this module is imported
+dspy = lazy_import("dspy")
+DSPY_AVAILABLE = module_available("dspy")
+
+genai = lazy_import("google.generativeai")
+GEMINI_AVAILABLE = module_available("google.generativeai")
 
 
 # =============================================================================
@@ -64,152 +64,17 @@ class LLMConfig:
     max_input_tokens: int = 2000
     max_output_tokens: int = 2000  # Increased for Gemini 3 thinking tokens
 
+    # Batch mode (many locations per Gemini call during batch profiling)
+    batch_size: int = 8
+    batch_max_output_tokens: int = 8000
 
-# =============================================================================
-# DSPY SIGNATURES AND MODULES
-# =============================================================================
-
-if DSPY_AVAILABLE:
-
-    class AreaClassificationSignature(dspy.Signature):
-        """Classify area type from nearby places context."""
-
-        places_summary: str = dspy.InputField(
-            desc="Summary of nearby places with counts by category"
-        )
-        location_context: str = dspy.InputField(
-            desc="Location context including city, address, coordinates"
-        )
-        authority_candidates: str = dspy.InputField(
-            desc="Potential authority anchors detected in Ring 1 (75m)"
-        )
-
-        primary_type: str = dspy.OutputField(
-            desc="Primary area type: HEALTHCARE, RETAIL, TRANSIT, EDUCATION, RELIGIOUS, GOVERNMENT, ENTERTAINMENT, SPORTS, HOSPITALITY, OFFICE, FOOD_BEVERAGE, INDUSTRIAL, RESIDENTIAL, TOURISM, MIXED, MIXED_BIASED"
-        )
-        area_context: str = dspy.OutputField(
-            desc="Human-readable area description (e.g., 'Hospital Entrance Zone', 'High Street Retail Area')"
-        )
-        confidence: str = dspy.OutputField(
-            desc="Confidence level: high, medium, or low"
-        )
-        classification_detail: str = dspy.OutputField(
-            desc="Classification detail like DOMINANT, STRONG_BIAS_TOWARD_X, MODERATE_BIAS_TOWARD_X, DIVERSE"
-        )
-        reasoning: str = dspy.OutputField(
-            desc="Brief reasoning for the classification decision"
-        )
-
-
-    class AmbiguityResolutionSignature(dspy.Signature):
-        """Resolve ambiguous area classification when rules are uncertain."""
-
-        rule_result: str = dspy.InputField(
-            desc="Result from rule-based classification (type and confidence)"
-        )
-        places_context: str = dspy.InputField(
-            desc="Detailed places context with names and types"
-        )
-        dominance_metrics: str = dspy.InputField(
-            desc="Dominance ratios for top groups"
-        )
-
-        should_override: bool = dspy.OutputField(
-            desc="Whether to override the rule-based result"
-        )
-        final_type: str = dspy.OutputField(
-            desc="Final primary type (same as rule result if not overriding)"
-        )
-        final_context: str = dspy.OutputField(
-            desc="Final area context description"
-        )
-        rationale: str = dspy.OutputField(
-            desc="Explanation for the decision"
-        )
-
-
-    class AuthorityValidationSignature(dspy.Signature):
-        """Validate if a detected authority anchor is significant."""
-
-        place_name: str = dspy.InputField(desc="Name of the potential authority place")
-        place_types: str = dspy.InputField(desc="Google Places types")
-        user_ratings: int = dspy.InputField(desc="Number of user ratings")
-        nearby_places: str = dspy.InputField(desc="Other places in Ring 1")
-
-        is_valid_authority: bool = dspy.OutputField(
-            desc="Whether this is a valid authority anchor"
-        )
-        authority_type: str = dspy.OutputField(
-            desc="Authority type if valid (HEALTHCARE, TRANSIT, etc.)"
-        )
-        authority_context: str = dspy.OutputField(
-            desc="Context description if valid (e.g., 'Hospital Entrance Zone')"
-        )
-        validation_reason: str = dspy.OutputField(
-            desc="Reason for validation decision"
-        )
-
-
-    class AreaClassifier(dspy.Module):
-        """DSPy module for full LLM area classification."""
-
-        def __init__(self):
-            super().__init__()
-            self.classify = dspy.ChainOfThought(AreaClassificationSignature)
-
-        def forward(
-            self,
-            places_summary: str,
-            location_context: str,
-            authority_candidates: str
-        ) -> dspy.Prediction:
-            return self.classify(
-                places_summary=places_summary,
-                location_context=location_context,
-                authority_candidates=authority_candidates
-            )
-
-
-    class AmbiguityResolver(dspy.Module):
-        """DSPy module for resolving ambiguous classifications."""
 
-        def __init__(self):
-            super().__init__()
-            self.resolve = dspy.ChainOfThought(AmbiguityResolutionSignature)
-
-        def forward(
-            self,
-            rule_result: str,
-            places_context: str,
-            dominance_metrics: str
-        ) -> dspy.Prediction:
-            return self.resolve(
-                rule_result=rule_result,
-                places_context=places_context,
-                dominance_metrics=dominance_metrics
-            )
-
-
-    class AuthorityValidator(dspy.Module):
-        """DSPy module for authority anchor validation."""
-
-        def __init__(self):
-            super().__init__()
-            self.validate = dspy.Predict(AuthorityValidationSignature)
-
-        def forward(
-            self,
-            place_name: str,
-            place_types: str,
-            user_ratings: int,
-            nearby_places: str
-        ) -> dspy.Prediction:
-            return self.validate(
-                place_name=place_name,
-                place_types=place_types,
-                user_ratings=user_ratings,
-                nearby_places=nearby_places
-            )
+# Area types the LLM may return (mirrors the enum listed in the prompts)
+VALID_AREA_TYPES = frozenset({
+    "HEALTHCARE", "RETAIL", "TRANSIT", "EDUCATION", "RELIGIOUS", "GOVERNMENT",
+    "ENTERTAINMENT", "SPORTS", "HOSPITALITY", "OFFICE", "FOOD_BEVERAGE",
+    "INDUSTRIAL", "RESIDENTIAL", "TOURISM", "MIXED", "MIXED_BIASED",
+})
 
 
 # =============================================================================
@@ -221,25 +86,31 @@ class GeminiAdapter:
 
     def __init__(self, config: LLMConfig):
         self.config = config
-        self.model = None
+        self._model = None
         self._initialize()
 
     def _initialize(self):
-        """Initialize Gemini API."""
+        """Validate Gemini setup. The SDK itself is only loaded for the SDK fallback path."""
         if not GEMINI_AVAILABLE:
             raise ImportError("google-generativeai package not installed")
 
         api_key = os.getenv('GEMINI_API_KEY') or os.getenv('GOOGLE_API_KEY')
         if not api_key:
             raise ValueError("GEMINI_API_KEY or GOOGLE_API_KEY not configured")
+        self._api_key = api_key
 
-        genai.configure(api_key=api_key)
+    @property
+    def model(self):
+        """google.generativeai model, created on first use (imports the SDK)."""
+        if self._model is None:
+            genai.configure(api_key=self._api_key)
 
-        # Try primary model, fall back to alternative
-        try:
-            self.model = genai.GenerativeModel(self.config.model_name)
-        except Exception:
-            self.model = genai.GenerativeModel(self.config.fallback_model)
+            # Try primary model, fall back to alternative
+            try:
+                self._model = genai.GenerativeModel(self.config.model_name)
+            except Exception:
+                self._model = genai.GenerativeModel(self.config.fallback_model)
+        return self._model
 
     def classify_area(
         self,
@@ -287,6 +158,25 @@ class GeminiAdapter:
         response_text, _ = self._call_gemini(prompt)
         return self._parse_ambiguity_response(response_text)
 
+    def resolve_ambiguity_batch(
+        self,
+        items: List[Dict[str, str]]
+    ) -> List[Optional[Dict[str, Any]]]:
+        """Resolve several ambiguous classifications with one Gemini call.
+
+        Args:
+            items: [{"rule_result", "places_context", "dominance_metrics"}, ...]
+
+        Returns:
+            One entry per item, in input order. Entries the model dropped or
+            returned malformed are None so the caller can retry them singly.
+        """
+        prompt = self._build_batch_ambiguity_prompt(items)
+        response_text, _ = self._call_gemini(
+            prompt, max_output_tokens=self.config.batch_max_output_tokens
+        )
+        return self._parse_batch_ambiguity_response(response_text, len(items))
+
     def validate_authority(
         self,
         place_name: str,
@@ -386,6 +276,19 @@ Respond with ONLY valid JSON:
   "reasoning": "Brief reasoning citing which rule was applied"
 }}"""
 
+    _AMBIGUITY_RULES = """OVERRIDE ONLY IF you find a CLEAR ERROR. Common corrections:
+- "AIIMS" classified as EDUCATION → Override to HEALTHCARE (it's a hospital)
+- "Medical Institute/College" with hospital → Override to HEALTHCARE
+- "[City] Junction/Central" classified as HOSPITALITY → Override to TRANSIT (railway station)
+- "Fortis/Apollo/Max" classified as MIXED → Override to HEALTHCARE (hospital chain)
+
+DO NOT OVERRIDE if:
+- The rule-based type matches the dominant category
+- Dominance ratio > 0.28 (rule-based is confident enough)
+- No authority anchor misclassification detected
+
+IMPORTANT: Do NOT default to MIXED. Only use MIXED if truly diverse with no pattern."""
+
     def _build_ambiguity_prompt(
         self,
         rule_result: str,
@@ -404,18 +307,7 @@ PLACES CONTEXT (analyze place NAMES carefully):
 DOMINANCE METRICS:
 {dominance_metrics}
 
-OVERRIDE ONLY IF you find a CLEAR ERROR. Common corrections:
-- "AIIMS" classified as EDUCATION → Override to HEALTHCARE (it's a hospital)
-- "Medical Institute/College" with hospital → Override to HEALTHCARE
-- "[City] Junction/Central" classified as HOSPITALITY → Override to TRANSIT (railway station)
-- "Fortis/Apollo/Max" classified as MIXED → Override to HEALTHCARE (hospital chain)
-
-DO NOT OVERRIDE if:
-- The rule-based type matches the dominant category
-- Dominance ratio > 0.28 (rule-based is confident enough)
-- No authority anchor misclassification detected
-
-IMPORTANT: Do NOT default to MIXED. Only use MIXED if truly diverse with no pattern.
+{self._AMBIGUITY_RULES}
 
 Respond with ONLY valid JSON:
 {{
@@ -425,6 +317,40 @@ Respond with ONLY valid JSON:
   "rationale": "Cite which correction rule applied, or why no override needed"
 }}"""
 
+    def _build_batch_ambiguity_prompt(self, items: List[Dict[str, str]]) -> str:
+        """Build one prompt validating several locations; rules are stated once."""
+        blocks = []
+        for idx, item in enumerate(items):
+            blocks.append(f"""### LOCATION {idx}
+RULE-BASED RESULT:
+{item["rule_result"]}
+
+PLACES CONTEXT:
+{item["places_context"]}
+
+DOMINANCE METRICS:
+{item["dominance_metrics"]}""")
+        locations = "\n\n".join(blocks)
+
+        return f"""You are VALIDATING area classifications for {len(items)} separate screen locations.
+Each location has a rule-based result. Judge every location independently.
+
+{self._AMBIGUITY_RULES}
+
+{locations}
+
+Respond with ONLY a valid JSON array containing exactly {len(items)} objects, one per location,
+where "id" is the LOCATION number:
+[
+  {{
+    "id": 0,
+    "should_override": true|false,
+    "final_type": "HEALTHCARE|RETAIL|TRANSIT|EDUCATION|RELIGIOUS|GOVERNMENT|ENTERTAINMENT|SPORTS|HOSPITALITY|OFFICE|FOOD_BEVERAGE|INDUSTRIAL|RESIDENTIAL|TOURISM|MIXED|MIXED_BIASED",
+    "final_context": "Human-readable area description",
+    "rationale": "Cite which correction rule applied, or why no override needed"
+  }}
+]"""
+
     def _build_authority_prompt(
         self,
         place_name: str,
@@ -462,7 +388,8 @@ Respond with ONLY valid JSON:
     def _call_gemini(
         self,
         prompt: str,
-        use_grounding: bool = False
+        use_grounding: bool = False,
+        max_output_tokens: Optional[int] = None
     ) -> Tuple[str, Optional[Dict[str, Any]]]:
         """
         Make Gemini API call with retry logic.
@@ -470,26 +397,46 @@ Respond with ONLY valid JSON:
         Args:
             prompt: The prompt text
             use_grounding: Enable Google Search grounding for location context
+            max_output_tokens: Override config.max_output_tokens (batch prompts)
 
         Returns:
             Tuple of (response_text, grounding_metadata)
         """
+        # Identical prompts (same model + generation config) are answered from the shared cache
+        response_cache = get_llm_response_cache()
+        max_output_tokens = max_output_tokens or self.config.max_output_tokens
+        generation_config = {
+            "temperature": self.config.temperature,
+            "max_output_tokens": max_output_tokens,
+            "grounding": use_grounding,
+        }
+        cached = response_cache.get(self.config.model_name, prompt, generation_config)
+        if cached is not None:
+            return cached[0], cached[1]
+
         # Try REST API first (more reliable, bypasses SSL issues)
         api_key = os.getenv('GEMINI_API_KEY') or os.getenv('GOOGLE_API_KEY')
 
         for attempt in range(self.config.max_retries):
             try:
                 # Use REST API directly with optional grounding
-                return self._call_gemini_rest(prompt, api_key, use_grounding=use_grounding)
+                note_llm_call()
+                text, grounding_metadata = self._call_gemini_rest(
+                    prompt, api_key, use_grounding=use_grounding, max_output_tokens=max_output_tokens
+                )
+                if text:
+                    response_cache.set(self.config.model_name, prompt, [text, grounding_metadata], generation_config)
+                return text, grounding_metadata
             except Exception as e:
                 if attempt == self.config.max_retries - 1:
                     # Final fallback: try SDK (without grounding)
                     try:
+                        note_llm_call()
                         response = self.model.generate_content(
                             prompt,
                             generation_config=genai.GenerationConfig(
                                 temperature=self.config.temperature,
-                                max_output_tokens=self.config.max_output_tokens,
+                                max_output_tokens=max_output_tokens,
                             )
                         )
                         return response.text.strip(), None
@@ -504,7 +451,8 @@ Respond with ONLY valid JSON:
         prompt: str,
         api_key: str,
         use_grounding: bool = False,
-        grounding_context: Optional[str] = None
+        grounding_context: Optional[str] = None,
+        max_output_tokens: Optional[int] = None
     ) -> Tuple[str, Optional[Dict[str, Any]]]:
         """
         Call Gemini via REST API (more reliable, with optional grounding).
@@ -514,6 +462,7 @@ Respond with ONLY valid JSON:
             api_key: Gemini API key
             use_grounding: Enable Google Search grounding
             grounding_context: Optional context for grounded search
+            max_output_tokens: Override config.max_output_tokens
 
         Returns:
             Tuple of (response_text, grounding_metadata)
@@ -527,7 +476,7 @@ Respond with ONLY valid JSON:
             "contents": [{"parts": [{"text": prompt}]}],
             "generationConfig": {
                 "temperature": self.config.temperature,
-                "maxOutputTokens": self.config.max_output_tokens
+                "maxOutputTokens": max_output_tokens or self.config.max_output_tokens
             }
         }
 
@@ -595,6 +544,47 @@ Respond with ONLY valid JSON:
                 "rationale": "Failed to parse LLM response"
             }
 
+    def _parse_batch_ambiguity_response(
+        self,
+        response: str,
+        expected: int
+    ) -> List[Optional[Dict[str, Any]]]:
+        """Parse a batch response; each item is validated on its own."""
+        results: List[Optional[Dict[str, Any]]] = [None] * expected
+        try:
+            text = response.replace('```json', '').replace('```', '').strip()
+            items = json.loads(text)
+        except json.JSONDecodeError:
+            return results
+        if isinstance(items, dict):
+            items = items.get("results") or items.get("locations") or []
+        if not isinstance(items, list):
+            return results
+
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            idx = item.get("id")
+            if isinstance(idx, str) and idx.isdigit():
+                idx = int(idx)
+            if not isinstance(idx, int) or isinstance(idx, bool) or not 0 <= idx < expected:
+                continue
+            if results[idx] is not None:
+                continue  # Duplicate id: keep the first answer
+            if not isinstance(item.get("should_override"), bool):
+                continue
+            if item.get("final_type") not in VALID_AREA_TYPES:
+                continue
+            if not isinstance(item.get("final_context"), str):
+                continue
+            results[idx] = {
+                "should_override": item["should_override"],
+                "final_type": item["final_type"],
+                "final_context": item["final_context"],
+                "rationale": str(item.get("rationale", "")),
+            }
+        return results
+
     def _parse_authority_response(self, response: str) -> Dict[str, Any]:
         """Parse authority validation response."""
         try:
@@ -685,7 +675,8 @@ class LLMProfilerService:
 
     def __init__(self, config: LLMConfig = None):
         self.config = config or LLMConfig()
-        self._cache: Dict[str, LLMProfileResult] = {}
+        # Bounded per-process result cache; raw Gemini responses are shared via llm_cache
+        self._cache: LRUCache = LRUCache(maxsize=256, ttl=60 * 60 * 24)
         self._dspy_configured = False
 
         # Initialize components
@@ -925,6 +916,63 @@ class LLMProfilerService:
                 "latency_ms": int((time.time() - start_time) * 1000)
             }
 
+    def resolve_ambiguity_batch(
+        self,
+        requests: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Resolve many ambiguous classifications (batch profiling).
+
+        Locations are packed config.batch_size per Gemini call. Items the
+        batch response dropped or returned malformed, and whole chunks whose
+        call failed, fall back to resolve_ambiguity() one at a time.
+
+        Args:
+            requests: [{"rule_result", "places_context", "dominance_metrics"}, ...]
+                      with the same meaning as resolve_ambiguity()
+
+        Returns:
+            Resolutions in input order; each carries "batched" and "latency_ms"
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(requests)
+        batch_size = max(1, self.config.batch_size)
+
+        if self.adapter and not self._dspy_configured and len(requests) > 1:
+            for start in range(0, len(requests), batch_size):
+                chunk = requests[start:start + batch_size]
+                if len(chunk) == 1:
+                    continue
+                chunk_start = time.time()
+                try:
+                    resolutions = self.adapter.resolve_ambiguity_batch([
+                        {
+                            "rule_result": json.dumps(r["rule_result"]),
+                            "places_context": r["places_context"],
+                            "dominance_metrics": r["dominance_metrics"],
+                        }
+                        for r in chunk
+                    ])
+                except Exception as e:
+                    print(f"WARNING: Batch ambiguity call failed, falling back to single calls: {e}")
+                    continue
+                latency_ms = int((time.time() - chunk_start) * 1000)
+                for offset, resolution in enumerate(resolutions):
+                    if resolution is not None:
+                        resolution["latency_ms"] = latency_ms
+                        resolution["batched"] = True
+                        results[start + offset] = resolution
+
+        for idx, request in enumerate(requests):
+            if results[idx] is None:
+                resolution = self.resolve_ambiguity(
+                    rule_result=request["rule_result"],
+                    places_context=request["places_context"],
+                    dominance_metrics=request["dominance_metrics"]
+                )
+                resolution["batched"] = False
+                results[idx] = resolution
+        return results
+
     def validate_authority(
         self,
         place_name: str,
@@ -1059,6 +1107,12 @@ class LLMProfilerService:
         """Clear the results cache."""
         self._cache.clear()
 
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit-rate metrics for the shared Gemini response cache."""
+        stats = get_llm_response_cache().stats()
+        stats["result_entries"] = len(self._cache)
+        return stats
+
     @property
     def is_available(self) -> bool:
         """Check if LLM backend is available."""
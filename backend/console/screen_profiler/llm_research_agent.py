@@ -20,21 +20,25 @@ from __future__ import annotations
 
 import os
 import json
+import contextvars
 import time
 import hashlib
-from typing import Dict, List, Optional, Any, TypedDict, Annotated
+from typing import TYPE_CHECKING, Dict, List, Optional, Any, Tuple, TypedDict, Annotated
 from dataclasses import dataclass, field
 from enum import Enum
 import operator
+from concurrent.futures import ThreadPoolExecutor
 
-try:
-    from langgraph.graph import StateGraph, END, START
-    LANGGRAPH_AVAILABLE = True
-except ImportError:
-    LANGGRAPH_AVAILABLE = False
-    StateGraph = None
-    END = None
-    START = None
+from .llm_cache import LRUCache, get_llm_response_cache
+from .telemetry import note_llm_call
+
+from Main.lazy_imports import module_available
+
+if TYPE_CHECKING:
+    from langgraph.graph import StateGraph
+
+# langgraph is imported when the graph is first built, not at module import
+LANGGRAPH_AVAILABLE = module_available("langgraph")
 
 try:
     import requests
@@ -105,6 +109,7 @@ class ResearchAgentConfig:
 
     # Research settings
     max_research_questions: int = 3
+    research_concurrency: int = 3  # Grounded research calls in flight at once
     enable_grounding: bool = True
     enable_verification: bool = True
 
@@ -170,17 +175,17 @@ class GeminiResearchClient:
         if use_grounding and self.config.enable_grounding:
             payload["tools"] = [{"googleSearch": {}}]
 
-        try:
-            import urllib3
-            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+        # Same model + contents + generation config -> served from the shared cache
+        response_cache = get_llm_response_cache()
+        cache_config = {"generationConfig": payload["generationConfig"], "tools": payload.get("tools")}
+        cache_prompt = json.dumps(contents, sort_keys=True)
+        cached = response_cache.get(self.config.model_name, cache_prompt, cache_config)
+        if cached is not None:
+            return dict(cached, cached=True)
 
-            response = requests.post(
-                url, json=payload,
-                timeout=self.config.timeout_seconds,
-                verify=False
-            )
-            response.raise_for_status()
-            data = response.json()
+        try:
+            note_llm_call()
+            data = self._generate(url, payload)
 
             result = {
                 "text": "",
@@ -197,11 +202,26 @@ class GeminiResearchClient:
                 if "content" in candidate and "parts" in candidate["content"]:
                     result["text"] = candidate["content"]["parts"][0].get("text", "").strip()
 
+            if result["text"]:
+                response_cache.set(self.config.model_name, cache_prompt, result, cache_config)
             return result
 
         except Exception as e:
             return {"text": "", "error": str(e), "grounding_metadata": None}
 
+    def _generate(self, url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """POST a generateContent request and return the decoded response."""
+        import urllib3
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+        response = requests.post(
+            url, json=payload,
+            timeout=self.config.timeout_seconds,
+            verify=False
+        )
+        response.raise_for_status()
+        return response.json()
+
 
 # =============================================================================
 # NODE FUNCTIONS
@@ -302,10 +322,8 @@ def create_research_node(client: GeminiResearchClient):
         lat = state["latitude"]
         lng = state["longitude"]
 
-        grounded_findings = []
-
-        # Research each question with grounding
-        for question in research_questions[:3]:
+        def research_question(question: str) -> Tuple[Dict[str, Any], int]:
+            question_start = time.time()
             # Build grounded search prompt
             search_prompt = f"""Research this question about a location in India:
 
@@ -348,8 +366,23 @@ Respond in JSON:
                     "confidence": "low",
                     "error": "JSON parse error"
                 }
-
-            grounded_findings.append(finding)
+            return finding, int((time.time() - question_start) * 1000)
+
+        # Research questions concurrently (grounded calls are I/O bound);
+        # pool.map keeps findings in question order. Each question runs in a
+        # copy of this thread's context so the profiling trace (a contextvar)
+        # still sees its LLM calls and cache hits.
+        questions = research_questions[:client.config.max_research_questions]
+        grounded_findings: List[Dict[str, Any]] = []
+        question_timings: Dict[str, int] = {}
+        if questions:
+            workers = max(1, min(client.config.research_concurrency, len(questions)))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                contexts = [contextvars.copy_context() for _ in questions]
+                results = pool.map(lambda ctx, q: ctx.run(research_question, q), contexts, questions)
+                for idx, (finding, question_ms) in enumerate(results, start=1):
+                    grounded_findings.append(finding)
+                    question_timings[f"research_q{idx}"] = question_ms
 
         # Analyze places data for authority detection
         places_data = state.get("places_data", {})
@@ -365,7 +398,7 @@ Respond in JSON:
                 "findings_count": len(grounded_findings),
                 "authority_detected": authority_analysis.get("detected", False)
             }],
-            "step_timings": {"research": latency}
+            "step_timings": {"research": latency, **question_timings}
         }
 
     return research_node
@@ -630,11 +663,13 @@ Respond in JSON:
 # GRAPH CONSTRUCTION
 # =============================================================================
 
-def build_research_graph(config: ResearchAgentConfig = None) -> Optional[StateGraph]:
+def build_research_graph(config: ResearchAgentConfig = None) -> Optional["StateGraph"]:
     """Build the LangGraph research agent."""
     if not LANGGRAPH_AVAILABLE:
         return None
 
+    from langgraph.graph import StateGraph, END, START
+
     config = config or ResearchAgentConfig()
     client = GeminiResearchClient(config)
 
@@ -697,7 +732,8 @@ class ResearchAgentService:
     def __init__(self, config: ResearchAgentConfig = None):
         self.config = config or ResearchAgentConfig()
         self._graph = None
-        self._cache: Dict[str, ResearchAgentResult] = {}
+        # Bounded per-process result cache; raw Gemini responses are shared via llm_cache
+        self._cache: LRUCache = LRUCache(maxsize=256, ttl=60 * 60 * 24)
 
         if LANGGRAPH_AVAILABLE:
             self._graph = build_research_graph(self.config)
@@ -881,6 +917,12 @@ Classify this location. Respond in JSON:
         """Clear the results cache."""
         self._cache.clear()
 
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit-rate metrics for the shared Gemini response cache."""
+        stats = get_llm_response_cache().stats()
+        stats["result_entries"] = len(self._cache)
+        return stats
+
     @property
     def is_available(self) -> bool:
         """Check if the research agent is available."""
@@ -0,0 +1,110 @@
+"""
+Management command: bench_geo_lookup
+------------------------------------
+Compares the offline admin-boundary lookup (admin_boundaries.py) with the
+Google reverse geocode it replaces for geoContext.
+
+- Offline: per-lookup latency and hit rate over screen coordinates
+  (ScreenSpec) or random points inside the boundary data
+- Google: latency of --live real reverse geocodes (paid, default 0) and
+  city/state agreement with the offline answer wherever a Google result is
+  available (live or already cached)
+
+Usage:
+    python manage.py bench_geo_lookup
+    python manage.py bench_geo_lookup --points 500 --repeat 20
+    python manage.py bench_geo_lookup --live 10
+"""
+
+import random
+import statistics
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+from console.models import ScreenSpec
+from console.screen_profiler.admin_boundaries import get_admin_boundary_index
+from console.screen_profiler.google_maps_utils import get_google_maps_service
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark offline admin-boundary geoContext against Google reverse geocoding'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--points', type=int, default=200)
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument('--live', type=int, default=0, help='Real reverse geocodes to time (billed)')
+        parser.add_argument('--seed', type=int, default=7)
+
+    def _sample_points(self, index, n, seed):
+        coords = list(
+            ScreenSpec.objects.exclude(latitude=None).exclude(longitude=None)
+            .values_list('latitude', 'longitude')[:n]
+        )
+        points = [(float(lat), float(lng)) for lat, lng in coords]
+        rng = random.Random(seed)
+        boxes = [b.bbox for b in index._boundaries]
+        while len(points) < n and boxes:
+            min_lng, min_lat, max_lng, max_lat = rng.choice(boxes)
+            points.append((rng.uniform(min_lat, max_lat), rng.uniform(min_lng, max_lng)))
+        return points
+
+    def handle(self, *args, **options):
+        index = get_admin_boundary_index()
+        if not index.available:
+            raise CommandError('No admin boundaries loaded - set ADMIN_BOUNDARIES_FILE to a district GeoJSON')
+
+        points = self._sample_points(index, options['points'], options['seed'])
+        offline = {}
+        timings_us = []
+        for lat, lng in points:
+            best = float('inf')
+            for _ in range(options['repeat']):
+                t0 = time.perf_counter()
+                result = index.lookup(lat, lng)
+                best = min(best, time.perf_counter() - t0)
+            offline[(lat, lng)] = result
+            timings_us.append(best * 1_000_000)
+
+        hits = sum(1 for r in offline.values() if r)
+        self.stdout.write(f"Boundaries:      {index.stats()['boundaries']} polygons, {index.stats()['cells']} grid cells")
+        self.stdout.write(f"Offline lookup:  p50 {_percentile(timings_us, 50):.1f} µs, "
+                          f"p95 {_percentile(timings_us, 95):.1f} µs over {len(points)} points")
+        self.stdout.write(f"Offline hits:    {hits}/{len(points)}")
+
+        maps = get_google_maps_service()
+        google = {}
+        live_ms = []
+        for lat, lng in points:
+            cached = cache.get(f'geocode_full_{round(lat, 5)}_{round(lng, 5)}')
+            if cached:
+                google[(lat, lng)] = cached
+            elif len(live_ms) < options['live'] and maps.client:
+                t0 = time.perf_counter()
+                google[(lat, lng)], _ = maps.reverse_geocode_full(lat, lng)
+                live_ms.append((time.perf_counter() - t0) * 1000)
+
+        if live_ms:
+            self.stdout.write(f"Reverse geocode: p50 {statistics.median(live_ms):.1f} ms, "
+                              f"p95 {_percentile(live_ms, 95):.1f} ms over {len(live_ms)} live calls")
+            speedup = statistics.median(live_ms) * 1000 / max(_percentile(timings_us, 50), 0.001)
+            self.stdout.write(f"Speedup:         ~{speedup:,.0f}x per geoContext")
+
+        compared = [(offline[p], g) for p, g in google.items() if offline.get(p)]
+        if compared:
+            same_state = sum(1 for o, g in compared if o['state'].lower() == (g.get('state') or '').lower())
+            same_tier = sum(1 for o, g in compared if o['cityTier'] == g.get('cityTier'))
+            self.stdout.write(f"Agreement:       state {same_state}/{len(compared)}, cityTier {same_tier}/{len(compared)}")
+            for o, g in compared:
+                if o['cityTier'] != g.get('cityTier'):
+                    self.stdout.write(f"   → offline {o['city']} ({o['cityTier']}) vs google {g.get('city')} ({g.get('cityTier')})")
+
+        self.stdout.write(self.style.SUCCESS('✅ Geo lookup benchmark complete'))
@@ -0,0 +1,167 @@
+"""
+Management command: bench_place_kernel
+--------------------------------------
+Microbenchmark for PlaceTypeNormalizer (dedupe + group counting) on
+synthetic 60 / 180 / 500-place inputs with realistic near-duplicate names.
+
+Compares the current kernel against the previous straightforward
+implementation (regex per call, SequenceMatcher against every name in the
+coordinate bucket, dedupe repeated by count_by_group) and checks both
+produce identical results.
+
+Usage:
+    python manage.py bench_place_kernel
+    python manage.py bench_place_kernel --sizes 60 180 500 --repeat 20
+"""
+
+import copy
+import random
+import re
+import time
+from difflib import SequenceMatcher
+
+from django.core.management.base import BaseCommand
+
+from console.screen_profiler.area_context_service import (
+    GENERIC_TYPES, GROUP_PRIORITY, PLACE_GROUPS, PlaceTypeNormalizer,
+)
+
+_WORDS = [
+    'sri', 'ganesh', 'lakshmi', 'city', 'central', 'royal', 'green', 'apollo',
+    'metro', 'star', 'global', 'fresh', 'golden', 'anna', 'nagar', 'plaza',
+]
+_SUFFIXES = ['', ' Pvt Ltd', ' Limited', ' Inc', '.', ' & Co']
+
+
+def _synthetic_places(n, seed):
+    """Places clustered on a coarse grid so coordinate buckets collide."""
+    rng = random.Random(seed)
+    all_types = [t for types in PLACE_GROUPS.values() for t in types]
+    places = []
+    for i in range(n):
+        base = ' '.join(rng.sample(_WORDS, rng.randint(2, 4))).title()
+        lat = 13.0 + rng.randint(0, max(1, n // 6)) * 0.00001
+        lng = 80.2 + rng.randint(0, max(1, n // 6)) * 0.00001
+        place = {
+            'place_id': f'pid_{i}',
+            'name': base + rng.choice(_SUFFIXES),
+            'types': rng.sample(all_types, 2) + ['establishment', 'point_of_interest'],
+            'geometry': {'location': {'lat': lat, 'lng': lng}},
+        }
+        places.append(place)
+        # Near-duplicate listing of the same venue (different place_id)
+        if rng.random() < 0.25:
+            dup = copy.deepcopy(place)
+            dup['place_id'] = f'pid_{i}_dup'
+            dup['name'] = base.upper() + rng.choice(_SUFFIXES)
+            places.append(dup)
+        # Same place returned on two pages
+        if rng.random() < 0.1:
+            places.append(copy.deepcopy(place))
+    return places[:n]
+
+
+class _LegacyNormalizer:
+    """Reference implementation the kernel must match."""
+
+    def __init__(self):
+        self._type_to_group = {}
+        for group, types_list in PLACE_GROUPS.items():
+            for t in types_list:
+                self._type_to_group[t] = group
+
+    def _group_for_place(self, place_types):
+        groups = set()
+        for t in place_types:
+            if t in GENERIC_TYPES:
+                continue
+            g = self._type_to_group.get(t)
+            if g:
+                groups.add(g)
+        for g in GROUP_PRIORITY:
+            if g in groups:
+                return g
+        return None
+
+    @staticmethod
+    def _normalize_name(name):
+        if not name:
+            return ''
+        normalized = re.sub(r'[^\w\s]', '', name.lower().strip())
+        for suffix in [' pvt ltd', ' private limited', ' limited', ' ltd', ' inc', ' llc']:
+            if normalized.endswith(suffix):
+                normalized = normalized[:-len(suffix)]
+        return normalized.strip()
+
+    def dedupe_places(self, places, coord_precision=5, name_similarity_threshold=0.85):
+        seen_ids, seen_coords, deduped = set(), {}, []
+        for place in places:
+            place_id = place.get('place_id')
+            if place_id:
+                if place_id in seen_ids:
+                    continue
+                seen_ids.add(place_id)
+            location = place.get('geometry', {}).get('location', {})
+            lat, lng = location.get('lat', 0), location.get('lng', 0)
+            coord_key = f'{round(lat, coord_precision)}_{round(lng, coord_precision)}'
+            name = self._normalize_name(place.get('name', ''))
+            if not name and (lat == 0 and lng == 0) and not place_id:
+                continue
+            seen_coords.setdefault(coord_key, set())
+            if any(
+                name and existing and SequenceMatcher(None, name, existing).ratio() >= name_similarity_threshold
+                for existing in seen_coords[coord_key]
+            ):
+                continue
+            if name:
+                seen_coords[coord_key].add(name)
+            deduped.append(place)
+        return deduped
+
+    def count_by_group(self, places, dedupe=True):
+        if dedupe:
+            places = self.dedupe_places(places)
+        counts = {}
+        for place in places:
+            g = self._group_for_place(place.get('types', []) or [])
+            if g:
+                counts[g] = counts.get(g, 0) + 1
+        return counts, len(places)
+
+
+def _ring2_pipeline(normalizer, places):
+    """What _adaptive_ring2_search + analyze_screen_location do with one result set."""
+    unique = normalizer.dedupe_places(places)
+    counts, unique_count = normalizer.count_by_group(places, dedupe=True)
+    return [p['place_id'] for p in unique], counts, unique_count
+
+
+class Command(BaseCommand):
+    help = 'Benchmark place dedupe/grouping kernel on 60/180/500-place inputs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[60, 180, 500])
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=7)
+
+    def _time(self, factory, places, repeat):
+        best = float('inf')
+        result = None
+        for _ in range(repeat):
+            normalizer = factory()           # cold memos every run
+            data = copy.deepcopy(places)     # no cached names carried over
+            t0 = time.perf_counter()
+            result = _ring2_pipeline(normalizer, data)
+            best = min(best, time.perf_counter() - t0)
+        return best * 1000, result
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'places':>8} {'legacy ms':>11} {'kernel ms':>11} {'speedup':>9}  match")
+        for size in options['sizes']:
+            places = _synthetic_places(size, options['seed'])
+            legacy_ms, legacy_result = self._time(_LegacyNormalizer, places, options['repeat'])
+            kernel_ms, kernel_result = self._time(PlaceTypeNormalizer, places, options['repeat'])
+            match = legacy_result == kernel_result
+            speedup = legacy_ms / kernel_ms if kernel_ms else float('inf')
+            line = f'{size:>8} {legacy_ms:>11.2f} {kernel_ms:>11.2f} {speedup:>8.1f}x  {"yes" if match else "NO"}'
+            self.stdout.write(self.style.SUCCESS(line) if match else self.style.ERROR(line))
@@ -0,0 +1,213 @@
+"""
+Management command: bench_profiler
+----------------------------------
+Deterministic end-to-end benchmark of AreaContextService over a fixed
+location corpus, served from recorded Google Maps / Gemini responses
+(replay_harness.py) so runs are repeatable and need no API keys.
+
+- --record: run the corpus against the live APIs once and write the
+  fixture file (needs GOOGLE_MAPS_API_KEY / GEMINI_API_KEY)
+- replay (default): every backend call sleeps a simulated latency
+  (--latency-google / --latency-gemini) instead of hitting the network
+- Per mode: total latency p50/p95, per-stage time and call counts, network
+  calls, LLM cache hit rate and fully-cached profile ratio
+- Cold by default: the in-process caches are cleared before each mode;
+  --warm keeps them (second-pass / cache effectiveness numbers)
+- Fixed inputs in both record and replay: no density-baseline learning
+  (Ring 2 always starts at the tier radius) and no offline admin
+  boundaries (geo context always comes from the recorded reverse
+  geocode), so live DB/cache state cannot change which calls are made.
+  ProfileTelemetry is disabled for the run.
+
+Usage:
+    python manage.py bench_profiler --record
+    python manage.py bench_profiler
+    python manage.py bench_profiler --modes rules hybrid --warm --json bench.json
+"""
+
+import json
+import os
+import statistics
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from console.screen_profiler.replay_harness import DEFAULT_LATENCY_MS, FixtureMiss, profiler_fixtures
+
+DEFAULT_FIXTURES = os.path.join(
+    str(settings.BASE_DIR), 'console', 'screen_profiler', 'fixtures', 'bench_profiler.json.gz'
+)
+
+# Mixed corpus: transit hub, hospital, high street, mall, campus, office park
+DEFAULT_CORPUS = [
+    {'name': 'Chennai Central', 'latitude': 13.0827, 'longitude': 80.2757},
+    {'name': 'AIIMS Delhi', 'latitude': 28.5672, 'longitude': 77.2100},
+    {'name': 'MG Road Bangalore', 'latitude': 12.9756, 'longitude': 77.6050},
+    {'name': 'Phoenix Palladium Mumbai', 'latitude': 18.9944, 'longitude': 72.8258, 'indoor': True},
+    {'name': 'IIT Madras', 'latitude': 12.9916, 'longitude': 80.2336},
+    {'name': 'Hitech City Hyderabad', 'latitude': 17.4435, 'longitude': 78.3772},
+    {'name': 'FC Road Pune', 'latitude': 18.5236, 'longitude': 73.8410},
+    {'name': 'Gandhipuram Coimbatore', 'latitude': 11.0168, 'longitude': 76.9658},
+]
+
+MODE_METHODS = {
+    'rules': 'analyze_screen_location',
+    'hybrid': 'analyze_screen_location_hybrid',
+    'full_llm': 'analyze_screen_location_full_llm',
+    'research': 'analyze_screen_location_research_agent',
+}
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _load_corpus(path):
+    if not path:
+        return DEFAULT_CORPUS
+    with open(path, 'r', encoding='utf-8') as fh:
+        corpus = json.load(fh)
+    if not isinstance(corpus, list) or not all('latitude' in c and 'longitude' in c for c in corpus):
+        raise CommandError('Corpus must be a JSON list of {"latitude", "longitude", ...} objects')
+    return corpus
+
+
+def run_mode(service, store, mode, corpus):
+    """Profile the corpus once in one mode and return its report."""
+    from console.screen_profiler.llm_cache import get_llm_response_cache
+
+    analyze = getattr(service, MODE_METHODS[mode])
+    store.reset_counters()
+    llm_cache = get_llm_response_cache()
+    llm_before = llm_cache.stats()
+
+    latencies, network_calls, cached_profiles, errors = [], 0, 0, []
+    research_steps = {}
+    for location in corpus:
+        start = time.perf_counter()
+        try:
+            profile = analyze(
+                latitude=float(location['latitude']),
+                longitude=float(location['longitude']),
+                indoor=bool(location.get('indoor', False)),
+                height_from_ground_ft=float(location.get('height_from_ground_ft', 0.0)),
+            )
+        except FixtureMiss:
+            raise
+        except Exception as e:
+            errors.append(f"{location.get('name', location['latitude'])}: {e}")
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        metadata = profile.get('metadata') or {}
+        network_calls += int(metadata.get('apiCallsMade') or 0)
+        cached_profiles += int(bool(metadata.get('cached')))
+        for step, ms in ((profile.get('researchAgent') or {}).get('step_timings') or {}).items():
+            research_steps.setdefault(step, []).append(ms)
+
+    llm_after = llm_cache.stats()
+    hits = sum(llm_after[k] - llm_before[k] for k in ('memory_hits', 'shared_hits'))
+    lookups = llm_after['lookups'] - llm_before['lookups']
+
+    return {
+        'mode': mode,
+        'locations': len(corpus),
+        'profiled': len(latencies),
+        'errors': errors,
+        'p50_ms': round(_percentile(latencies, 50), 1),
+        'p95_ms': round(_percentile(latencies, 95), 1),
+        'mean_ms': round(statistics.mean(latencies), 1) if latencies else 0.0,
+        'stages': {
+            stage: {'calls': stat['calls'], 'ms': round(stat['ms'], 1)}
+            for stage, stat in sorted(store.snapshot().items())
+        },
+        'network_calls': network_calls,
+        'cached_profiles': cached_profiles,
+        'llm_cache_hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+        'research_steps_ms': {
+            step: round(statistics.mean(values), 1) for step, values in sorted(research_steps.items())
+        },
+    }
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the screen profiler on a fixed corpus with recorded Google/Gemini responses'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fixtures', default=DEFAULT_FIXTURES, help='Fixture file (.json or .json.gz)')
+        parser.add_argument('--record', action='store_true', help='Call the live APIs and (re)write the fixtures')
+        parser.add_argument('--corpus', help='JSON list of locations to use instead of the built-in corpus')
+        parser.add_argument(
+            '--modes', nargs='+', choices=list(MODE_METHODS), default=['rules', 'hybrid'],
+            help='Profiling modes to benchmark',
+        )
+        parser.add_argument('--latency-google', type=float, default=DEFAULT_LATENCY_MS['google'],
+                            help='Simulated ms per Google Maps call in replay')
+        parser.add_argument('--latency-gemini', type=float, default=DEFAULT_LATENCY_MS['gemini'],
+                            help='Simulated ms per Gemini call in replay')
+        parser.add_argument('--warm', action='store_true', help='Keep caches between modes')
+        parser.add_argument('--json', dest='json_path', help='Also write the report to this file')
+
+    def handle(self, *args, **options):
+        from console.screen_profiler.admin_boundaries import AdminBoundaryIndex
+        from console.screen_profiler.area_context_service import AreaContextService
+        from console.screen_profiler.llm_cache import get_llm_response_cache
+        from console.screen_profiler.place_archive import ArchivedDensityBaseline
+
+        corpus = _load_corpus(options['corpus'])
+        mode = 'record' if options['record'] else 'replay'
+        latency = {'google': options['latency_google'], 'gemini': options['latency_gemini']}
+
+        self.stdout.write(
+            f"{'Recording' if mode == 'record' else 'Replaying'} {len(corpus)} locations "
+            f"x {len(options['modes'])} modes ({options['fixtures']})"
+        )
+
+        reports = []
+        try:
+            with override_settings(PROFILE_TELEMETRY_ENABLED=False), \
+                    profiler_fixtures(options['fixtures'], mode=mode, latency_ms=latency) as store:
+                service = AreaContextService()
+                # Deterministic inputs: tier-based Ring 2 start, geocode-only geo context
+                service.density_index = ArchivedDensityBaseline()
+                service.admin_boundaries = AdminBoundaryIndex()
+                for profile_mode in options['modes']:
+                    if not options['warm']:
+                        cache.clear()
+                        get_llm_response_cache().clear_memory()
+                    reports.append(run_mode(service, store, profile_mode, corpus))
+        except FileNotFoundError as e:
+            raise CommandError(str(e))
+        except FixtureMiss as e:
+            raise CommandError(f'{e} - fixtures are stale for this corpus/prompt, re-run with --record')
+
+        for report in reports:
+            self.stdout.write('')
+            self.stdout.write(
+                f"[{report['mode']}] {report['profiled']}/{report['locations']} profiled  "
+                f"p50 {report['p50_ms']} ms  p95 {report['p95_ms']} ms  mean {report['mean_ms']} ms"
+            )
+            self.stdout.write(
+                f"   → network calls {report['network_calls']}, fully cached {report['cached_profiles']}, "
+                f"LLM cache hit rate {report['llm_cache_hit_rate']:.0%}"
+            )
+            for stage, stat in report['stages'].items():
+                self.stdout.write(f"   → {stage:<24} {stat['calls']:>4} calls  {stat['ms']:>9.1f} ms")
+            for step, ms in report['research_steps_ms'].items():
+                self.stdout.write(f"   → research.{step:<15} {ms:>9.1f} ms avg")
+            for error in report['errors']:
+                self.stdout.write(self.style.WARNING(f"   ⚠️ {error}"))
+
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as fh:
+                json.dump({'mode': mode, 'latency_ms': latency, 'reports': reports}, fh, indent=2)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {'Recorded fixtures' if mode == 'record' else 'Benchmark complete'}"
+        ))
@@ -0,0 +1,61 @@
+"""
+Management command: reprofile_screens
+-------------------------------------
+Drains screens left in REPROFILE (location-relevant edit, see
+screen_profiler/reprofile.py). Screens moved less than
+REPROFILE_REUSE_DISTANCE_M replay their stored place archive instead of
+calling Google Maps.
+
+Usage:
+    python manage.py reprofile_screens
+    python manage.py reprofile_screens --limit 50
+    python manage.py reprofile_screens --screens 12 15 --dry-run
+"""
+
+from django.core.management.base import BaseCommand
+
+from console.models import ScreenSpec
+from console.screen_profiler.reprofile import reprofile_screen
+
+
+class Command(BaseCommand):
+    help = 'Reprofile screens flagged REPROFILE by location-relevant edits'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--screens', nargs='+', type=int, help='Only these ScreenSpec ids')
+        parser.add_argument('--limit', type=int, default=0, help='Process at most N screens')
+        parser.add_argument('--dry-run', action='store_true', help='List flagged screens without reprofiling')
+
+    def handle(self, *args, **options):
+        screens = ScreenSpec.objects.filter(profile_status='REPROFILE').order_by('updated_at')
+        if options['screens']:
+            screens = screens.filter(pk__in=options['screens'])
+        if options['limit']:
+            screens = screens[:options['limit']]
+        screens = list(screens)
+
+        if options['dry_run']:
+            for screen in screens:
+                self.stdout.write(f'   → [{screen.pk}] {screen.screen_name}')
+            self.stdout.write(self.style.SUCCESS(f'✅ {len(screens)} screens flagged for reprofile'))
+            return
+
+        reprofiled = reused = failed = 0
+        for screen in screens:
+            try:
+                result = reprofile_screen(screen)
+            except Exception as e:
+                failed += 1
+                self.stdout.write(self.style.ERROR(f'   → [{screen.pk}] failed: {e}'))
+                continue
+            if result['status'] != 'reprofiled':
+                self.stdout.write(f"   → [{screen.pk}] skipped: {result.get('reason')}")
+                continue
+            reprofiled += 1
+            reused += int(result['reusedRings'])
+            source = 'stored rings' if result['reusedRings'] else 'live'
+            self.stdout.write(f"   → [{screen.pk}] {screen.screen_name}: {source} (moved {result['movedMeters']} m)")
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Reprofiled {reprofiled} screens ({reused} from stored rings, {failed} failed)'
+        ))
@@ -0,0 +1,173 @@
+"""
+Management command: rescore_profiles
+------------------------------------
+Re-runs the rule pipeline (PLACE_GROUPS, DominanceCalculator,
+PrimaryTypeResolver, DwellCategoryDeriver, ...) over the place archive stored
+on each ScreenProfile. No Google Maps calls are made.
+
+Prints a diff of every screen whose primary_type / dwell_category changed.
+Profiles whose area type was resolved by the LLM (llm_used=True) are reported
+but never overwritten - their rules output is not what was stored.
+
+Usage:
+    python manage.py rescore_profiles                  # dry run, diff only
+    python manage.py rescore_profiles --apply          # write rule changes back
+    python manage.py rescore_profiles --screens 12 15 --workers 4
+    python manage.py rescore_profiles --json rescore_report.json
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from django.utils import timezone
+
+from console.screen_profiler.models import ScreenProfile
+from console.utils import record_outbox_changes
+
+# Columns re-derived by the rule pipeline (profile dict path -> model field)
+RESCORED_FIELDS = {
+    'primary_type': ('area', 'primaryType'),
+    'area_context': ('area', 'context'),
+    'confidence': ('area', 'confidence'),
+    'classification_detail': ('area', 'classificationDetail'),
+    'dominant_group': ('area', 'dominantGroup'),
+    'movement_type': ('movement', 'type'),
+    'movement_context': ('movement', 'context'),
+    'dwell_category': ('dwellCategory',),
+    'dwell_confidence': ('dwellConfidence',),
+    'dwell_score': ('dwellScore',),
+    'dominance_ratio': ('dominanceRatio',),
+}
+DIFF_FIELDS = ('primary_type', 'dwell_category')
+
+
+def _init_worker():
+    # Spawn-based platforms start workers without Django configured
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+def _rescore_one(payload):
+    """Runs in a worker process: pure computation over the stored archive."""
+    from console.screen_profiler.area_context_service import AreaContextService
+    from console.screen_profiler.place_archive import (
+        ArchivedDensityBaseline, StoredMapsSource, decompress_place_archive,
+    )
+    try:
+        archive = decompress_place_archive(payload['raw_places'])
+        service = AreaContextService()
+        profile = service.analyze_screen_location(
+            latitude=payload['latitude'],
+            longitude=payload['longitude'],
+            maps_source=StoredMapsSource(archive),
+            density_index=ArchivedDensityBaseline(payload['ring2_baseline']),
+        )
+    except Exception as e:
+        return {'id': payload['id'], 'error': str(e)}
+
+    values = {}
+    for field, path in RESCORED_FIELDS.items():
+        value = profile
+        for key in path:
+            value = (value or {}).get(key)
+        values[field] = value
+    return {
+        'id': payload['id'],
+        'values': values,
+        'ring2_analysis': profile.get('ringAnalysis', {}).get('ring2'),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Re-score stored profiles with the current rules (zero external API calls)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--apply', action='store_true', help='Write changed rule outputs back to ScreenProfile')
+        parser.add_argument('--screens', nargs='+', type=int, help='Only rescore these screen ids')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Process pool size')
+        parser.add_argument('--json', dest='json_path', help='Also write the diff report to this file')
+
+    def handle(self, *args, **options):
+        qs = ScreenProfile.objects.filter(raw_places__isnull=False)
+        if options['screens']:
+            qs = qs.filter(screen_id__in=options['screens'])
+
+        current = {}
+        payloads = []
+        for row in qs.values('id', 'screen_id', 'latitude', 'longitude', 'raw_places', 'ring2_analysis', 'llm_used', *RESCORED_FIELDS):
+            current[row['id']] = row
+            payloads.append({
+                'id': row['id'],
+                'latitude': float(row['latitude']),
+                'longitude': float(row['longitude']),
+                'raw_places': bytes(row['raw_places']),
+                'ring2_baseline': (row['ring2_analysis'] or {}).get('densityBaseline'),
+            })
+
+        skipped = ScreenProfile.objects.filter(raw_places__isnull=True).count()
+        if not payloads:
+            self.stdout.write(self.style.WARNING(
+                f'No profiles with a stored place archive ({skipped} without one - re-profile them once first).'
+            ))
+            return
+
+        self.stdout.write(f'Rescoring {len(payloads)} profile(s) with {options["workers"]} worker(s)...')
+
+        # Workers never touch the DB; don't let forked children inherit open connections
+        connections.close_all()
+        workers = max(1, options['workers'])
+        if workers == 1:
+            results = [_rescore_one(p) for p in payloads]
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                results = list(pool.map(_rescore_one, payloads, chunksize=8))
+
+        changes, errors, to_update, rescored_screens = [], [], [], []
+        for result in results:
+            row = current[result['id']]
+            if 'error' in result:
+                errors.append({'screen_id': row['screen_id'], 'error': result['error']})
+                continue
+
+            new = result['values']
+            diff = {
+                f: {'old': row[f], 'new': new[f]}
+                for f in DIFF_FIELDS if (row[f] or '') != (new[f] or '')
+            }
+            if diff:
+                changes.append({'screen_id': row['screen_id'], 'llm_used': row['llm_used'], 'changes': diff})
+
+            if options['apply'] and not row['llm_used'] and any(row[f] != new[f] for f in RESCORED_FIELDS):
+                profile = ScreenProfile(id=row['id'])
+                for f in RESCORED_FIELDS:
+                    setattr(profile, f, new[f] if new[f] is not None else ('' if isinstance(row[f], str) else None))
+                profile.ring2_analysis = result['ring2_analysis']
+                profile.updated_at = timezone.now()  # bulk_update skips auto_now (XIA sync watermark)
+                to_update.append(profile)
+                rescored_screens.append(row['screen_id'])
+
+        for change in sorted(changes, key=lambda c: c['screen_id']):
+            parts = [f"{f}: {d['old']} → {d['new']}" for f, d in change['changes'].items()]
+            suffix = ' (LLM-resolved, not applied)' if change['llm_used'] else ''
+            self.stdout.write(f"   → [{change['screen_id']}] " + ' | '.join(parts) + suffix)
+        for err in errors:
+            self.stderr.write(self.style.ERROR(f"   ✗ [{err['screen_id']}] {err['error']}"))
+
+        if to_update:
+            with transaction.atomic():
+                ScreenProfile.objects.bulk_update(to_update, list(RESCORED_FIELDS) + ['ring2_analysis', 'updated_at'], batch_size=500)
+                record_outbox_changes('profile', rescored_screens)
+
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as fh:
+                json.dump({'changed': changes, 'errors': errors}, fh, indent=2, default=str)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {len(payloads)} rescored — {len(changes)} changed, {len(errors)} errors, '
+            f'{len(to_update)} written, {skipped} without archive. 0 API calls.'
+        ))
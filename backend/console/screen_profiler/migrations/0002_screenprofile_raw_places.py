@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('screen_profiler', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='screenprofile',
+            name='raw_places',
+            field=models.BinaryField(blank=True, editable=False, help_text='Compressed Maps responses the rules consumed - used by rescore_profiles', null=True),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 6.0.1 on 2026-10-19 14:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('screen_profiler', '0002_screenprofile_raw_places'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileTelemetry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('mode', models.CharField(help_text='rules, hybrid, full_llm, research, hybrid_batch', max_length=20)),
+                ('screen_id', models.IntegerField(blank=True, help_text='ScreenSpec id when profiling a saved screen', null=True)),
+                ('total_ms', models.IntegerField()),
+                ('network_calls', models.IntegerField(default=0, help_text='Google Maps requests that left the process')),
+                ('maps_cached', models.BooleanField(default=False, help_text='Every Maps lookup was a cache hit')),
+                ('llm_used', models.BooleanField(default=False)),
+                ('llm_calls', models.PositiveSmallIntegerField(default=0, help_text='Gemini requests sent, retries included')),
+                ('llm_cache_hits', models.PositiveSmallIntegerField(default=0)),
+                ('llm_cache_misses', models.PositiveSmallIntegerField(default=0)),
+                ('shared', models.CharField(blank=True, help_text='in_flight, recent or screen when coalesced', max_length=16)),
+                ('error', models.CharField(blank=True, max_length=200)),
+                ('stages', models.JSONField(default=dict)),
+            ],
+            options={
+                'verbose_name': 'Profiling Telemetry',
+                'verbose_name_plural': 'Profiling Telemetry',
+                'db_table': 'screen_profile_telemetry',
+                'indexes': [models.Index(fields=['mode', 'created_at'], name='spt_mode_created_idx')],
+            },
+        ),
+    ]
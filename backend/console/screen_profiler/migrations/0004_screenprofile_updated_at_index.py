@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('screen_profiler', '0003_profiletelemetry'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='screenprofile',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -52,6 +52,12 @@ class ScreenProfile(models.Model):
     ring2_analysis = models.JSONField(null=True, blank=True, help_text="Ring 2: area classification (r=450-500m)")
     ring3_analysis = models.JSONField(null=True, blank=True, help_text="Ring 3: movement context (r=200m)")
 
+    # ── Raw place archive (zlib-compressed JSON, see place_archive.py) ──
+    raw_places = models.BinaryField(
+        null=True, blank=True, editable=False,
+        help_text="Compressed Maps responses the rules consumed - used by rescore_profiles"
+    )
+
     # ── Reasoning (array of step strings → JSON) ──
     reasoning = models.JSONField(default=list, blank=True, help_text="Step-by-step reasoning logs")
 
@@ -71,16 +77,63 @@ class ScreenProfile(models.Model):
 
     # ── Timestamps ──
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # XIA incremental sync watermark
 
     class Meta:
         db_table = 'screen_ai_profiles'
         verbose_name = "Screen AI Profile"
         verbose_name_plural = "Screen AI Profiles"
 
+    # Large JSON / binary columns only the per-screen profile endpoints return
+    HEAVY_FIELDS = ('ring1_analysis', 'ring2_analysis', 'ring3_analysis', 'reasoning', 'warnings', 'raw_places')
+
     def __str__(self):
         return f"{self.screen} - {self.primary_type} ({self.city})"
 
+    @classmethod
+    def deferred_fields(cls, prefix=''):
+        """
+        Heavy column paths for QuerySet.defer(), e.g.
+        ScreenSpec.objects.select_related('ai_profile').defer(*ScreenProfile.deferred_fields('ai_profile__'))
+        """
+        return [f"{prefix}{name}" for name in cls.HEAVY_FIELDS]
+
+    def to_summary_dict(self):
+        """
+        Compact profile for list / discovery responses: area, movement and
+        dwell only. Reads no HEAVY_FIELDS, so it is safe on deferred rows.
+        The full ring analysis stays on GET /api/screen-profile/<screen_id>/.
+        """
+        return {
+            "geoContext": {
+                "city": self.city,
+                "state": self.state,
+                "cityTier": self.city_tier,
+                "formattedAddress": self.formatted_address,
+            },
+            "area": {
+                "primaryType": self.primary_type,
+                "context": self.area_context,
+                "confidence": self.confidence,
+                "classificationDetail": self.classification_detail,
+                "dominantGroup": self.dominant_group,
+            },
+            "movement": {
+                "type": self.movement_type,
+                "context": self.movement_context,
+            },
+            "dwellCategory": self.dwell_category,
+            "dwellConfidence": self.dwell_confidence,
+            "dwellScore": self.dwell_score,
+            "dominanceRatio": self.dominance_ratio,
+            "llmEnhancement": {
+                "used": self.llm_used,
+                "reason": self.llm_reason,
+            },
+            "computedAt": self.profiled_at.isoformat() if self.profiled_at else None,
+            "summary": True,
+        }
+
     def to_response_dict(self):
         """Reconstruct the API response format from individual columns."""
         return {
@@ -134,3 +187,40 @@ class ScreenProfile(models.Model):
                 "mode": self.llm_mode,
             },
         }
+
+
+class ProfileTelemetry(models.Model):
+    """
+    One row per profiling run: per-stage timings and call counts (see telemetry.py).
+    Append-only; aggregated by GET /api/screen-profiles/telemetry/.
+    """
+
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    mode = models.CharField(max_length=20, help_text="rules, hybrid, full_llm, research, hybrid_batch")
+    screen_id = models.IntegerField(null=True, blank=True, help_text="ScreenSpec id when profiling a saved screen")
+
+    total_ms = models.IntegerField()
+    network_calls = models.IntegerField(default=0, help_text="Google Maps requests that left the process")
+    maps_cached = models.BooleanField(default=False, help_text="Every Maps lookup was a cache hit")
+
+    llm_used = models.BooleanField(default=False)
+    llm_calls = models.PositiveSmallIntegerField(default=0, help_text="Gemini requests sent, retries included")
+    llm_cache_hits = models.PositiveSmallIntegerField(default=0)
+    llm_cache_misses = models.PositiveSmallIntegerField(default=0)
+
+    shared = models.CharField(max_length=16, blank=True, help_text="in_flight, recent or screen when coalesced")
+    error = models.CharField(max_length=200, blank=True)
+
+    # {"geo": [ms, calls, network_calls], "ring2": [...], "llm": [...], "db_save": [...]}
+    stages = models.JSONField(default=dict)
+
+    class Meta:
+        db_table = 'screen_profile_telemetry'
+        verbose_name = "Profiling Telemetry"
+        verbose_name_plural = "Profiling Telemetry"
+        indexes = [
+            models.Index(fields=['mode', 'created_at'], name='spt_mode_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.mode} {self.total_ms}ms @ {self.created_at}"
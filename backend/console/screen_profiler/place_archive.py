@@ -0,0 +1,202 @@
+"""
+Place archive for offline re-scoring
+
+Profiling records every Google Maps response the rule pipeline consumed
+(reverse geocode + each places_nearby query), deduped by place_id and
+slimmed to the fields the rules read. The archive is stored zlib-compressed
+on ScreenProfile.raw_places.
+
+Re-scoring replays the same pipeline against StoredMapsSource, so changes to
+PLACE_GROUPS / DominanceCalculator / PrimaryTypeResolver / DwellCategoryDeriver
+can be applied to every screen with zero external API calls.
+"""
+from __future__ import annotations
+
+import json
+import math
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+ARCHIVE_VERSION = 1
+
+# Fields the rule pipeline (and the LLM prompt formatters) read from a place
+SLIM_PLACE_FIELDS = (
+    "place_id", "name", "types", "user_ratings_total", "rating",
+    "vicinity", "business_status", "geometry",
+)
+
+
+def _coord_key(latitude: float, longitude: float) -> str:
+    return f"{round(float(latitude), 5)},{round(float(longitude), 5)}"
+
+
+def _query_key(latitude: float, longitude: float, radius: int, max_results: int) -> str:
+    return f"{_coord_key(latitude, longitude)}|{int(radius)}|{int(max_results)}"
+
+
+def _slim_place(place: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: place[k] for k in SLIM_PLACE_FIELDS if k in place}
+
+
+def compress_place_archive(archive: Optional[Dict[str, Any]]) -> Optional[bytes]:
+    if not archive:
+        return None
+    raw = json.dumps(archive, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    return zlib.compress(raw, 9)
+
+
+def decompress_place_archive(blob: Optional[bytes]) -> Optional[Dict[str, Any]]:
+    if not blob:
+        return None
+    return json.loads(zlib.decompress(bytes(blob)).decode("utf-8"))
+
+
+class ArchiveMiss(Exception):
+    """Replay asked for data that was never recorded for this profile."""
+
+
+class RecordingMapsSource:
+    """
+    Per-profile proxy around GoogleMapsAreaContextService that remembers
+    every response handed to the rule pipeline.
+    """
+
+    def __init__(self, maps):
+        self._maps = maps
+        self._geocode: Dict[str, Dict[str, Any]] = {}
+        self._queries: Dict[str, List[str]] = {}
+        self._places: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def client(self):
+        return self._maps.client
+
+    def reverse_geocode_full(self, latitude: float, longitude: float) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        geo_full, meta = self._maps.reverse_geocode_full(latitude, longitude)
+        self._geocode[_coord_key(latitude, longitude)] = geo_full
+        return geo_full, meta
+
+    def record_geocode(self, latitude: float, longitude: float, geo_full: Dict[str, Any]) -> None:
+        """Archive geo context resolved without a reverse geocode (offline boundaries)."""
+        self._geocode[_coord_key(latitude, longitude)] = geo_full
+
+    def places_nearby_all(self, latitude: float, longitude: float, radius: int, max_results: int = 60) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        places, meta = self._maps.places_nearby_all(latitude, longitude, radius=radius, max_results=max_results)
+        ids: List[str] = []
+        for idx, place in enumerate(places):
+            pid = place.get("place_id") or f"_anon_{radius}_{idx}_{place.get('name', '')}"
+            self._places.setdefault(pid, _slim_place(place))
+            ids.append(pid)
+        self._queries[_query_key(latitude, longitude, radius, max_results)] = ids
+        return places, meta
+
+    def movement_context(self, latitude: float, longitude: float, geo_full: Optional[Dict[str, Any]] = None):
+        # Re-use the real implementation so its geocode/places lookups go through this proxy
+        from .google_maps_utils import GoogleMapsAreaContextService
+        return GoogleMapsAreaContextService.movement_context(self, latitude, longitude, geo_full=geo_full)
+
+    def export(self, origin: Optional[Tuple[float, float]] = None) -> Dict[str, Any]:
+        archive = {
+            "v": ARCHIVE_VERSION,
+            "geocode": self._geocode,
+            "queries": self._queries,
+            "places": self._places,
+        }
+        if origin is not None:
+            archive["origin"] = [float(origin[0]), float(origin[1])]
+        return archive
+
+
+class StoredMapsSource:
+    """
+    Serves a recorded archive back to the rule pipeline - no network.
+
+    origin=(lat, lng) is where the archive was recorded (defaults to the
+    archive's own "origin"); when set, lookups for a slightly moved screen
+    are answered from the data recorded there.
+    """
+
+    client = True
+
+    def __init__(self, archive: Dict[str, Any], origin: Optional[Tuple[float, float]] = None):
+        self._geocode = archive.get("geocode", {})
+        self._queries = archive.get("queries", {})
+        self._places = archive.get("places", {})
+        if origin is None and archive.get("origin"):
+            origin = tuple(archive["origin"])
+        self._origin = origin
+
+    def _recorded_at(self, latitude: float, longitude: float) -> Tuple[float, float]:
+        return self._origin if self._origin is not None else (latitude, longitude)
+
+    def reverse_geocode_full(self, latitude: float, longitude: float) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        key = _coord_key(*self._recorded_at(latitude, longitude))
+        geo_full = self._geocode.get(key)
+        if geo_full is None:
+            raise ArchiveMiss(f"No geocode recorded for {key}")
+        return geo_full, {"cached": True, "network_calls": 0}
+
+    def places_nearby_all(self, latitude: float, longitude: float, radius: int, max_results: int = 60) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        ids = self._queries.get(_query_key(*self._recorded_at(latitude, longitude), radius, max_results))
+        if ids is not None:
+            return [self._places[pid] for pid in ids if pid in self._places], {"cached": True, "network_calls": 0}
+        return self._nearest_superset(latitude, longitude, radius, max_results), {"cached": True, "network_calls": 0}
+
+    def _nearest_superset(self, latitude: float, longitude: float, radius: int, max_results: int) -> List[Dict[str, Any]]:
+        """Approximate an unrecorded query by distance-filtering a larger recorded one."""
+        prefix = _coord_key(*self._recorded_at(latitude, longitude)) + "|"
+        candidates = []
+        for key, ids in self._queries.items():
+            if not key.startswith(prefix):
+                continue
+            recorded_radius = int(key.split("|")[1])
+            if recorded_radius >= radius:
+                candidates.append((recorded_radius, ids))
+        if not candidates:
+            raise ArchiveMiss(f"No recorded query covers radius {radius}m at {prefix[:-1]}")
+        _, ids = min(candidates, key=lambda c: c[0])
+        result = []
+        for pid in ids:
+            place = self._places.get(pid)
+            if place is None:
+                continue
+            loc = (place.get("geometry") or {}).get("location") or {}
+            if "lat" in loc and "lng" in loc and haversine_m(latitude, longitude, loc["lat"], loc["lng"]) > radius:
+                continue
+            result.append(place)
+            if len(result) >= max_results:
+                break
+        return result
+
+    def movement_context(self, latitude: float, longitude: float, geo_full: Optional[Dict[str, Any]] = None):
+        from .google_maps_utils import GoogleMapsAreaContextService
+        return GoogleMapsAreaContextService.movement_context(self, latitude, longitude, geo_full=geo_full)
+
+
+class ArchivedDensityBaseline:
+    """Density baseline stand-in for replay: reuse the original starting radius, learn nothing."""
+
+    def __init__(self, recorded: Optional[Dict[str, Any]] = None):
+        self._recorded = recorded or {}
+
+    def predict(self, latitude: float, longitude: float, base_radius: int, config: Dict[str, Any]) -> Dict[str, Any]:
+        start = int(self._recorded.get("startRadius") or base_radius)
+        return {
+            "geohash": self._recorded.get("geohash"),
+            "samples": self._recorded.get("samples", 0),
+            "startRadius": start,
+            "skippedExpansions": int(self._recorded.get("skippedExpansions") or 0),
+        }
+
+    def record(self, *args, **kwargs) -> None:
+        return None
+
+
+def haversine_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance in metres between two lat/lng points."""
+    r = 6371000.0
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * r * math.asin(math.sqrt(a))
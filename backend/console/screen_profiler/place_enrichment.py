@@ -0,0 +1,165 @@
+"""
+Place-details enrichment for full-LLM profiling
+
+Picks the most informative places around a screen, fetches their Place
+Details (editorial summary, rating, viewport) concurrently, and merges the
+details back by place_id.
+
+- Priority score (v2.1): authority_type(+1000) + satellite_pattern(+800)
+  + density_bonus(+600, Ring 1) + user_ratings(capped 1000) + high_rating(+100)
+  + name_keywords(+500) + coherence_bonus(+400) + false_positive_penalty(-500)
+- Details are cached per place_id by GoogleMapsAreaContextService.place_details,
+  so every screen near the same mall/hospital reuses one lookup
+- Bounded pool (GOOGLE_PLACES_DETAILS_CONCURRENCY); the Maps rate limiter still applies
+- Meta follows the rest of the module: {"cached", "network_calls"} + enrichment counts
+"""
+from __future__ import annotations
+
+import logging
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Types that rarely describe the area a screen sits in
+LOW_SIGNAL_TYPES = {
+    "atm", "parking", "car_wash", "car_repair", "gas_station", "storage",
+    "moving_company", "electrician", "plumber", "locksmith", "roofing_contractor",
+}
+
+
+class PlaceEnrichmentService:
+
+    def __init__(self, google_maps, max_workers: Optional[int] = None):
+        self.google_maps = google_maps
+        if max_workers is None:
+            from django.conf import settings
+            max_workers = getattr(settings, "GOOGLE_PLACES_DETAILS_CONCURRENCY", 5)
+        self.max_workers = max(1, int(max_workers))
+
+    @staticmethod
+    def _priority_scores(places: List[Dict[str, Any]], ring1_place_count: int) -> List[float]:
+        from .area_context_service import (
+            ANCHOR_NAME_PATTERNS, AUTHORITY_TYPES, GENERIC_TYPES, PlaceTypeNormalizer,
+        )
+        normalizer = PlaceTypeNormalizer()
+        groups = [normalizer._group_for_place(p.get("types", []) or []) for p in places]
+        group_counts = Counter(g for g in groups if g)
+        dominant_group = group_counts.most_common(1)[0][0] if group_counts else None
+        all_patterns = {pat for pats in ANCHOR_NAME_PATTERNS.values() for pat in pats}
+
+        scores = []
+        for idx, place in enumerate(places):
+            types = set(place.get("types", []) or [])
+            name = (place.get("name") or "").lower()
+            ratings = place.get("user_ratings_total", 0) or 0
+            rating = place.get("rating", 0) or 0
+            score = 0.0
+
+            authority_hit = types & AUTHORITY_TYPES.keys()
+            if authority_hit:
+                score += 1000
+            elif any(
+                pat in name
+                for key, pats in ANCHOR_NAME_PATTERNS.items() if key not in types
+                for pat in pats
+            ):
+                # Named after a nearby anchor (e.g. "Apollo Hospital Pharmacy")
+                score += 800
+            if idx < ring1_place_count:
+                score += 600
+            score += min(ratings, 1000)
+            if rating >= 4.0 and ratings >= 50:
+                score += 100
+            if any(pat in name for pat in all_patterns):
+                score += 500
+            if dominant_group and groups[idx] == dominant_group:
+                score += 400
+            specific = types - GENERIC_TYPES
+            if not specific or specific <= LOW_SIGNAL_TYPES:
+                score -= 500
+            scores.append(score)
+        return scores
+
+    @staticmethod
+    def _merge_details(place: Dict[str, Any], details: Dict[str, Any]) -> Dict[str, Any]:
+        enriched = dict(place)
+        if details.get("editorial_summary"):
+            enriched["editorial_summary"] = details["editorial_summary"]
+        for key in ("rating", "user_ratings_total", "business_status"):
+            if details.get(key) is not None:
+                enriched[key] = details[key]
+        viewport = (details.get("geometry") or {}).get("viewport")
+        if viewport:
+            enriched["viewport"] = viewport
+        enriched["enriched"] = True
+        return enriched
+
+    def enrich(
+        self,
+        places: List[Dict[str, Any]],
+        max_enrichments: int = 20,
+        ring1_place_count: int = 0,
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Returns (places, meta). Output keeps the input order and length; the
+        top max_enrichments places (by priority score, one per place_id) are
+        replaced by enriched copies.
+        """
+        if not places or max_enrichments <= 0 or not self.google_maps.client:
+            return list(places), {"cached": True, "network_calls": 0, "enriched": 0, "cacheHits": 0}
+
+        scores = self._priority_scores(places, ring1_place_count)
+        ranked = sorted(range(len(places)), key=lambda i: scores[i], reverse=True)
+        selected: List[str] = []
+        seen: set = set()
+        for idx in ranked:
+            place_id = places[idx].get("place_id")
+            if place_id and place_id not in seen:
+                seen.add(place_id)
+                selected.append(place_id)
+                if len(selected) >= max_enrichments:
+                    break
+
+        def fetch(place_id: str):
+            try:
+                return place_id, *self.google_maps.place_details(place_id)
+            except Exception as e:
+                logger.warning(f"Place details failed for {place_id}: {e}")
+                return place_id, {}, {"cached": False, "network_calls": 1}
+
+        details_by_id: Dict[str, Dict[str, Any]] = {}
+        network_calls = 0
+        cache_hits = 0
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, max(1, len(selected)))) as pool:
+            for place_id, details, meta in pool.map(fetch, selected):
+                network_calls += meta["network_calls"]
+                if meta["cached"]:
+                    cache_hits += 1
+                if details:
+                    details_by_id[place_id] = details
+
+        result = [
+            self._merge_details(p, details_by_id[p["place_id"]])
+            if p.get("place_id") in details_by_id else p
+            for p in places
+        ]
+        return result, {
+            "cached": network_calls == 0,
+            "network_calls": network_calls,
+            "enriched": len(details_by_id),
+            "cacheHits": cache_hits,
+        }
+
+
+def get_place_enrichment_service(google_maps=None) -> PlaceEnrichmentService:
+    """Enrichment bound to the given Maps service (defaults to the shared singleton)."""
+    if google_maps is None:
+        from .google_maps_utils import get_google_maps_service
+        google_maps = get_google_maps_service()
+    service = getattr(google_maps, "_enrichment_service", None)
+    if service is None:
+        service = PlaceEnrichmentService(google_maps)
+        google_maps._enrichment_service = service
+    return service
@@ -0,0 +1,168 @@
+"""
+Single-flight profiling for the screen profiler
+
+Concurrent profiling of the same screen (double-clicked "Profile", two
+admins) or of effectively identical coordinates (screens in one building)
+shares one in-progress analysis instead of paying Google/Gemini twice:
+
+- Screen flight: keyed by screen_id + coordinate key; followers wait for
+  the leader's analyze + save and receive its profile, so
+  update_or_create runs once
+- Coordinate flight: keyed by coordinates rounded to
+  SCREEN_PROFILE_COORD_PRECISION decimals (4 ≈ 11 m) + mode/indoor/height
+  + a hash of the normalized address hint (it feeds formattedAddress and
+  the Ring 3 road hints, so different addresses never share a profile)
+- Reuse window: a finished coordinate analysis is served again for
+  SCREEN_PROFILE_REUSE_WINDOW_SEC via the Django cache alias
+  SCREEN_PROFILE_REUSE_CACHE_ALIAS (shared across workers if that cache is)
+
+Every caller gets its own deep copy; views mutate profiles (rawPlaces pop).
+"""
+from __future__ import annotations
+
+import copy
+import hashlib
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .rate_limiter import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+class ProfileCoalescer:
+
+    def __init__(
+        self,
+        reuse_window: Optional[int] = None,
+        precision: Optional[int] = None,
+        cache_alias: Optional[str] = None,
+    ):
+        from django.conf import settings
+        self.reuse_window = int(
+            reuse_window if reuse_window is not None
+            else getattr(settings, "SCREEN_PROFILE_REUSE_WINDOW_SEC", 300)
+        )
+        self.precision = int(
+            precision if precision is not None
+            else getattr(settings, "SCREEN_PROFILE_COORD_PRECISION", 4)
+        )
+        self.cache_alias = cache_alias or getattr(settings, "SCREEN_PROFILE_REUSE_CACHE_ALIAS", "default")
+        self._screen_flight = SingleFlight()
+        self._coord_flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._stats = {"reused": 0, "reuse_errors": 0}
+
+    @property
+    def _cache(self):
+        from django.core.cache import caches
+        return caches[self.cache_alias]
+
+    def coordinate_key(
+        self,
+        latitude: float,
+        longitude: float,
+        mode: str,
+        indoor: bool = False,
+        height_from_ground_ft: float = 0.0,
+        address_hint: Optional[str] = None,
+    ) -> str:
+        lat = round(float(latitude), self.precision)
+        lng = round(float(longitude), self.precision)
+        height = round(float(height_from_ground_ft or 0.0), 1)
+        address = " ".join((address_hint or "").lower().split())
+        address_hash = hashlib.md5(address.encode("utf-8")).hexdigest()[:12]
+        return f"screen_profile_{mode}_{lat}_{lng}_{int(bool(indoor))}_{height}_{address_hash}"
+
+    def _count(self, stat: str) -> None:
+        with self._lock:
+            self._stats[stat] += 1
+
+    def profile_location(
+        self,
+        latitude: float,
+        longitude: float,
+        mode: str,
+        analyze: Callable[[], Dict[str, Any]],
+        indoor: bool = False,
+        height_from_ground_ft: float = 0.0,
+        address_hint: Optional[str] = None,
+    ) -> Tuple[Dict[str, Any], Optional[str]]:
+        """
+        Run analyze() at most once per rounded location at a time.
+
+        Returns (profile, shared) where shared is None (this call did the
+        work), "in_flight" (joined a concurrent analysis) or "recent"
+        (served from the reuse window).
+        """
+        key = self.coordinate_key(latitude, longitude, mode, indoor, height_from_ground_ft, address_hint)
+
+        recent = self._get_recent(key)
+        if recent is not None:
+            self._count("reused")
+            return recent, "recent"
+
+        def run():
+            profile = analyze()
+            self._set_recent(key, profile)
+            return profile
+
+        profile, shared = self._coord_flight.do(key, run)
+        # Leader and followers must not share one mutable dict
+        return copy.deepcopy(profile), ("in_flight" if shared else None)
+
+    def profile_screen(
+        self,
+        screen_id: Any,
+        location_key: str,
+        fn: Callable[[], Any],
+    ) -> Tuple[Any, bool]:
+        """
+        Run fn() (analyze + save) at most once per screen and location at a time.
+        Returns (result, shared); followers get a deep copy of the leader's result.
+        """
+        result, shared = self._screen_flight.do(("screen", screen_id, location_key), fn)
+        return (copy.deepcopy(result), True) if shared else (result, False)
+
+    def _get_recent(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.reuse_window <= 0:
+            return None
+        try:
+            return self._cache.get(key)
+        except Exception as e:
+            self._count("reuse_errors")
+            logger.warning(f"Profile reuse cache read failed ({self.cache_alias}): {e}")
+            return None
+
+    def _set_recent(self, key: str, profile: Dict[str, Any]) -> None:
+        if self.reuse_window <= 0 or not profile:
+            return
+        try:
+            self._cache.set(key, profile, self.reuse_window)
+        except Exception as e:
+            self._count("reuse_errors")
+            logger.warning(f"Profile reuse cache write failed ({self.cache_alias}): {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            data = dict(self._stats)
+        data["screen_flight"] = self._screen_flight.stats()
+        data["coordinate_flight"] = self._coord_flight.stats()
+        data["reuse_window_sec"] = self.reuse_window
+        return data
+
+
+_profile_coalescer: Optional[ProfileCoalescer] = None
+
+
+def get_profile_coalescer() -> ProfileCoalescer:
+    global _profile_coalescer
+    if _profile_coalescer is None:
+        _profile_coalescer = ProfileCoalescer()
+    return _profile_coalescer
+
+
+def reset_profile_coalescer():
+    global _profile_coalescer
+    _profile_coalescer = None
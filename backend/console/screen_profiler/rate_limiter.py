@@ -0,0 +1,170 @@
+"""
+Rate limiting + request coalescing primitives for external API calls
+- TokenBucketLimiter: process-wide token bucket, optionally also enforced across
+  processes through a shared Django cache alias (fixed one-second windows;
+  settings.RATE_LIMIT_CACHE_ALIAS, which must not be a per-process LocMem cache)
+- SingleFlight: concurrent identical requests share one in-flight call
+- Both keep counters so callers can surface waits / coalesced hits / rejections
+"""
+from __future__ import annotations
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from django.conf import settings
+from django.core.cache import caches
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a token could not be acquired within the allowed wait."""
+
+
+class TokenBucketLimiter:
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: Optional[float] = None,
+        max_wait: float = 10.0,
+        shared: bool = False,
+        cache_prefix: str = "ratelimit",
+        cache_alias: Optional[str] = None,
+    ):
+        self.rate = max(float(rate), 0.001)
+        self.capacity = float(capacity) if capacity else max(self.rate, 1.0)
+        self.max_wait = float(max_wait)
+        self.shared = shared
+        self.cache_prefix = cache_prefix
+        self.cache_alias = cache_alias
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._stats = {"acquired": 0, "waits": 0, "wait_time_s": 0.0, "rejections": 0}
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def _reserve_local(self) -> float:
+        """Take one token, returning how long the caller must sleep before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            deficit = 1.0 - self._tokens
+            wait = deficit / self.rate if deficit > 0 else 0.0
+            if wait > self.max_wait:
+                self._stats["rejections"] += 1
+                raise RateLimitExceeded(
+                    f"{self.cache_prefix}: token wait {wait:.2f}s exceeds max {self.max_wait:.2f}s"
+                )
+            self._tokens -= 1.0
+            return wait
+
+    def _reserve_shared(self, deadline: float) -> float:
+        """Fixed one-second window counter in the shared cache (cross-process)."""
+        cache = caches[self.cache_alias or getattr(settings, "RATE_LIMIT_CACHE_ALIAS", "ratelimit")]
+        limit = max(int(self.rate), 1)
+        waited = 0.0
+        while True:
+            window = int(time.time())
+            key = f"{self.cache_prefix}_{window}"
+            cache.add(key, 0, 5)
+            try:
+                count = cache.incr(key)
+            except ValueError:
+                # Key expired between add() and incr(); treat as a fresh window
+                cache.set(key, 1, 5)
+                count = 1
+            if count <= limit:
+                return waited
+            sleep_for = (window + 1) - time.time()
+            if time.monotonic() + sleep_for > deadline:
+                with self._lock:
+                    self._stats["rejections"] += 1
+                raise RateLimitExceeded(
+                    f"{self.cache_prefix}: shared window full ({count}/{limit} per second)"
+                )
+            if sleep_for > 0:
+                time.sleep(sleep_for)
+                waited += sleep_for
+
+    def acquire(self) -> float:
+        """Block until a token is available. Returns seconds spent waiting."""
+        start = time.monotonic()
+        wait = self._reserve_local()
+        if wait > 0:
+            time.sleep(wait)
+        total_wait = wait
+        if self.shared:
+            total_wait += self._reserve_shared(start + self.max_wait)
+        with self._lock:
+            self._stats["acquired"] += 1
+            if total_wait > 0:
+                self._stats["waits"] += 1
+                self._stats["wait_time_s"] += total_wait
+        return total_wait
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            data = dict(self._stats)
+        data["wait_time_s"] = round(data["wait_time_s"], 3)
+        data.update({"rate_per_s": self.rate, "capacity": self.capacity, "shared": self.shared})
+        return data
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Deduplicate concurrent calls by key. The first caller runs fn(); callers
+    arriving while it is in flight block and receive the same result (or error).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._stats = {"executed": 0, "coalesced": 0}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Returns (result, shared). shared=True means another caller did the work."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self._stats["coalesced"] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._stats["executed"] += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+        return call.result, False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            data = dict(self._stats)
+            data["in_flight"] = len(self._calls)
+        return data
@@ -0,0 +1,222 @@
+"""
+Record/replay harness for profiler benchmarks
+
+Wraps the two network seams of the profiler so AreaContextService can be
+benchmarked without live keys:
+
+- Google Maps: the googlemaps.Client behind GoogleMapsAreaContextService
+  (reverse_geocode / places_nearby / place)
+- Gemini: GeminiAdapter._call_gemini_rest (hybrid / full-LLM) and
+  GeminiResearchClient._generate (research agent)
+
+    with profiler_fixtures("fixtures/corpus.json.gz", mode="record"):
+        ...   # real calls, responses written to the fixture file on exit
+
+    with profiler_fixtures("fixtures/corpus.json.gz", latency_ms={"gemini": 1500}):
+        ...   # served from disk, each call sleeps the simulated latency
+
+Responses are keyed by sha256 of the request (method + canonical args /
+model + prompt + config). A replay miss raises FixtureMiss. With
+isolate_caches (default) the LLM and Place Details caches point at the
+in-process 'default' cache so runs do not read or pollute shared caches.
+"""
+from __future__ import annotations
+
+import contextlib
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional
+
+FIXTURE_VERSION = 1
+
+# Simulated per-call latency in replay (ms), roughly live p50
+DEFAULT_LATENCY_MS = {"google": 120, "gemini": 1500}
+
+
+class FixtureMiss(Exception):
+    """Replay asked for a response that was never recorded."""
+
+
+def _fixture_key(*parts: Any) -> str:
+    raw = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class FixtureStore:
+    """Recorded responses for one corpus plus per-call timing counters."""
+
+    def __init__(self, path: str, mode: str = "replay", latency_ms: Optional[Dict[str, float]] = None):
+        if mode not in ("record", "replay"):
+            raise ValueError("mode must be 'record' or 'replay'")
+        self.path = path
+        self.mode = mode
+        self.latency_ms = dict(DEFAULT_LATENCY_MS, **(latency_ms or {}))
+        self._lock = threading.Lock()
+        self._data: Dict[str, Dict[str, Any]] = {"google": {}, "gemini": {}}
+        self._calls: Dict[str, Dict[str, float]] = {}
+        if os.path.exists(path):
+            self._load()
+        elif mode == "replay":
+            raise FileNotFoundError(f"Fixture file not found: {path} (record it first)")
+
+    def _open(self, mode: str):
+        if self.path.endswith(".gz"):
+            return gzip.open(self.path, mode + "t", encoding="utf-8")
+        return open(self.path, mode, encoding="utf-8")
+
+    def _load(self) -> None:
+        with self._open("r") as fh:
+            data = json.load(fh)
+        for backend in ("google", "gemini"):
+            self._data[backend].update(data.get(backend, {}))
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._lock:
+            payload = {"v": FIXTURE_VERSION, **self._data}
+        with self._open("w") as fh:
+            json.dump(payload, fh, sort_keys=True)
+
+    def _count(self, stage: str, elapsed_ms: float) -> None:
+        with self._lock:
+            stat = self._calls.setdefault(stage, {"calls": 0, "ms": 0.0})
+            stat["calls"] += 1
+            stat["ms"] += elapsed_ms
+
+    def call(self, backend: str, stage: str, key: str, live_fn) -> Any:
+        """Serve one backend call from the fixture (replay) or live + store (record)."""
+        start = time.perf_counter()
+        try:
+            if self.mode == "record":
+                response = live_fn()
+                with self._lock:
+                    self._data[backend][key] = response
+                return response
+            with self._lock:
+                if key not in self._data[backend]:
+                    raise FixtureMiss(f"No recorded {stage} response for key {key[:12]}")
+                response = self._data[backend][key]
+            time.sleep(self.latency_ms.get(backend, 0) / 1000.0)
+            # Callers may mutate responses - hand out a fresh copy each time
+            return json.loads(json.dumps(response))
+        finally:
+            self._count(stage, (time.perf_counter() - start) * 1000)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {stage: dict(stat) for stage, stat in self._calls.items()}
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self._calls.clear()
+
+
+class FixtureGoogleClient:
+    """Drop-in for the googlemaps.Client methods the profiler uses."""
+
+    def __init__(self, store: FixtureStore, live_client=None):
+        self._store = store
+        self._live = live_client
+
+    def _live_call(self, name: str, *args, **kwargs):
+        if self._live is None:
+            raise FixtureMiss("Recording needs a live Google Maps client (GOOGLE_MAPS_API_KEY)")
+        return getattr(self._live, name)(*args, **kwargs)
+
+    def reverse_geocode(self, latlng, **kwargs):
+        key = _fixture_key("reverse_geocode", [round(float(c), 6) for c in latlng], kwargs)
+        return self._store.call("google", "maps.reverse_geocode", key,
+                                lambda: self._live_call("reverse_geocode", latlng, **kwargs))
+
+    def places_nearby(self, location=None, radius=None, page_token=None, **kwargs):
+        key = _fixture_key(
+            "places_nearby", [round(float(c), 6) for c in location], radius, page_token, kwargs
+        )
+
+        def live():
+            if page_token:
+                kwargs["page_token"] = page_token
+            return self._live_call("places_nearby", location=location, radius=radius, **kwargs)
+
+        return self._store.call("google", "maps.places_nearby", key, live)
+
+    def place(self, place_id, fields=None, **kwargs):
+        key = _fixture_key("place", place_id, sorted(fields or []), kwargs)
+        return self._store.call("google", "maps.place_details", key,
+                                lambda: self._live_call("place", place_id, fields=fields, **kwargs))
+
+
+@contextlib.contextmanager
+def profiler_fixtures(
+    path: str,
+    mode: str = "replay",
+    latency_ms: Optional[Dict[str, float]] = None,
+    isolate_caches: bool = True,
+) -> Iterator[FixtureStore]:
+    """Route every Google Maps / Gemini call of the profiler through a fixture file."""
+    from django.test.utils import override_settings
+    from .google_maps_utils import get_google_maps_service
+    from .llm_cache import reset_llm_response_cache
+    from .llm_profiler import GeminiAdapter, reset_llm_profiler_service
+    from .llm_research_agent import GeminiResearchClient, reset_research_agent_service
+
+    store = FixtureStore(path, mode=mode, latency_ms=latency_ms)
+    maps = get_google_maps_service()
+    live_client = maps.client if mode == "record" else None
+
+    original_rest = GeminiAdapter._call_gemini_rest
+    original_generate = GeminiResearchClient._generate
+    saved_env = {k: os.environ.get(k) for k in ("GOOGLE_MAPS_API_KEY", "GEMINI_API_KEY")}
+    saved_client = (maps._client, maps._api_key)
+
+    def call_gemini_rest(adapter, prompt, api_key, use_grounding=False, grounding_context=None, max_output_tokens=None):
+        key = _fixture_key(
+            "adapter", adapter.config.model_name, prompt, use_grounding,
+            max_output_tokens or adapter.config.max_output_tokens, adapter.config.temperature,
+        )
+        result = store.call("gemini", "gemini.adapter", key, lambda: list(original_rest(
+            adapter, prompt, api_key, use_grounding=use_grounding,
+            grounding_context=grounding_context, max_output_tokens=max_output_tokens,
+        )))
+        return result[0], result[1]
+
+    def generate(client, url, payload):
+        key = _fixture_key("research", client.config.model_name, payload)
+        return store.call("gemini", "gemini.research", key, lambda: original_generate(client, url, payload))
+
+    overrides = {}
+    if isolate_caches:
+        overrides = {"LLM_CACHE_ALIAS": "default", "GOOGLE_PLACES_CACHE_ALIAS": "default"}
+
+    try:
+        # Replay needs no real keys, but the services refuse to start without one
+        for name in saved_env:
+            if not os.environ.get(name):
+                os.environ[name] = "fixture-replay"
+        maps._api_key = os.environ["GOOGLE_MAPS_API_KEY"]
+        maps._client = FixtureGoogleClient(store, live_client)
+        GeminiAdapter._call_gemini_rest = call_gemini_rest
+        GeminiResearchClient._generate = generate
+        with override_settings(**overrides):
+            reset_llm_response_cache()
+            reset_llm_profiler_service()
+            reset_research_agent_service()
+            yield store
+    finally:
+        GeminiAdapter._call_gemini_rest = original_rest
+        GeminiResearchClient._generate = original_generate
+        maps._client, maps._api_key = saved_client
+        for name, value in saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        reset_llm_response_cache()
+        reset_llm_profiler_service()
+        reset_research_agent_service()
+        if mode == "record":
+            store.save()
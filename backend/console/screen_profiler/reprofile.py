@@ -0,0 +1,216 @@
+"""
+Change-aware reprofiling for ScreenSpec updates
+
+Only edits to location-relevant fields put a profiled screen back into
+REPROFILE; pricing, contact or playback edits leave the profile alone.
+
+Flagged screens are reprofiled in the background:
+- In-process queue fed from ScreenSpecViewset.perform_update (on commit)
+- python manage.py reprofile_screens drains anything still in REPROFILE
+  (worker restarts, REPROFILE_BACKGROUND disabled)
+
+If the coordinates moved less than REPROFILE_REUSE_DISTANCE_M from where
+the stored place archive (ScreenProfile.raw_places) was captured, the rule
+pipeline is replayed on it instead of calling Google Maps again. The
+archive is kept as-is with its capture origin, so repeated small moves are
+measured from where the data was actually fetched, not from the last
+reprofile.
+"""
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Iterable, Optional
+
+from .place_archive import haversine_m
+from .telemetry import profile_stage, profiling_run
+
+logger = logging.getLogger(__name__)
+
+# ScreenSpec fields that feed the area analysis
+REPROFILE_FIELDS = ('latitude', 'longitude', 'environment', 'mounting_height_ft', 'full_address')
+
+
+def _normalize(value: Any) -> Any:
+    if value is None:
+        return None
+    if isinstance(value, (Decimal, float, int)) and not isinstance(value, bool):
+        try:
+            return Decimal(str(value)).normalize()
+        except InvalidOperation:
+            return value
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def location_changes(instance, validated_data: Dict[str, Any]) -> Dict[str, tuple]:
+    """{field: (old, new)} for location-relevant fields the update actually changes."""
+    changes = {}
+    for field in REPROFILE_FIELDS:
+        if field not in validated_data:
+            continue
+        old, new = getattr(instance, field), validated_data[field]
+        if _normalize(old) != _normalize(new):
+            changes[field] = (old, new)
+    return changes
+
+
+def _screen_location(screen) -> Dict[str, Any]:
+    return {
+        'latitude': float(screen.latitude),
+        'longitude': float(screen.longitude),
+        'indoor': screen.environment == 'Indoor',
+        'height_from_ground_ft': float(screen.mounting_height_ft or 0.0),
+        'address_hint': screen.full_address or None,
+    }
+
+
+def reprofile_screen(screen, reuse_distance_m: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Reprofile one screen and save the result.
+
+    Returns {"screen_id", "status", "reusedRings", "movedMeters"}.
+    """
+    from django.conf import settings
+    from .area_context_service import get_area_context_service
+    from .models import ScreenProfile
+    from .place_archive import ArchivedDensityBaseline, StoredMapsSource, decompress_place_archive
+    from .views import save_screen_profile
+
+    if reuse_distance_m is None:
+        reuse_distance_m = getattr(settings, 'REPROFILE_REUSE_DISTANCE_M', 25)
+    if screen.latitude is None or screen.longitude is None:
+        return {'screen_id': screen.pk, 'status': 'skipped', 'reason': 'MISSING_COORDINATES'}
+
+    location = _screen_location(screen)
+    previous = (
+        ScreenProfile.objects.filter(screen=screen)
+        .only('latitude', 'longitude', 'mode', 'raw_places', 'ring2_analysis')
+        .first()
+    )
+    mode = previous.mode if previous and previous.mode in ('rules', 'hybrid') else 'hybrid'
+
+    maps_source = None
+    density_index = None
+    moved_m = None
+    archive = None
+    if previous is not None:
+        archive = decompress_place_archive(previous.raw_places)
+        # Archives written before origins were stored were captured at the profile's coordinates
+        origin = tuple((archive or {}).get('origin') or (float(previous.latitude), float(previous.longitude)))
+        moved_m = haversine_m(origin[0], origin[1], location['latitude'], location['longitude'])
+        if archive and moved_m <= reuse_distance_m:
+            archive['origin'] = list(origin)
+            maps_source = StoredMapsSource(archive, origin=origin)
+            density_index = ArchivedDensityBaseline((previous.ring2_analysis or {}).get('densityBaseline'))
+
+    service = get_area_context_service()
+    analyze = service.analyze_screen_location_hybrid if mode == 'hybrid' else service.analyze_screen_location
+    with profiling_run(mode, screen_id=screen.pk):
+        try:
+            profile = analyze(maps_source=maps_source, density_index=density_index, **location)
+        except Exception as e:
+            if maps_source is None:
+                raise
+            # Archive could not answer (older archive, different radius) - go live
+            logger.info(f"Ring reuse failed for screen {screen.pk}, profiling live: {e}")
+            maps_source = None
+            profile = analyze(**location)
+
+        raw_places = profile.pop('rawPlaces', None)
+        if maps_source is not None:
+            # Keep the reused archive as captured (its keys are at the origin)
+            raw_places = archive
+            profile.setdefault('metadata', {})['reusedRingsFromMeters'] = round(moved_m, 1)
+        with profile_stage('db_save'):
+            save_screen_profile(screen, location['latitude'], location['longitude'], mode, profile, raw_places)
+    return {
+        'screen_id': screen.pk,
+        'status': 'reprofiled',
+        'reusedRings': maps_source is not None,
+        'movedMeters': round(moved_m, 1) if moved_m is not None else None,
+    }
+
+
+class ReprofileQueue:
+    """In-process background queue of screen ids to reprofile (deduplicated)."""
+
+    def __init__(self, workers: int = 1):
+        self.workers = max(1, int(workers))
+        self._queue: "queue.Queue[int]" = queue.Queue()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._stats = {'queued': 0, 'deduplicated': 0, 'reprofiled': 0, 'reused_rings': 0, 'failed': 0}
+
+    def enqueue(self, screen_ids: Iterable[int]) -> None:
+        with self._lock:
+            for screen_id in screen_ids:
+                if screen_id in self._pending:
+                    self._stats['deduplicated'] += 1
+                    continue
+                self._pending.add(screen_id)
+                self._stats['queued'] += 1
+                self._queue.put(screen_id)
+            self._ensure_workers()
+
+    def _ensure_workers(self) -> None:
+        self._threads = [t for t in self._threads if t.is_alive()]
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._run, name='reprofile-worker', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _run(self) -> None:
+        from django.db import close_old_connections
+        from console.models import ScreenSpec
+
+        while True:
+            screen_id = self._queue.get()
+            with self._lock:
+                self._pending.discard(screen_id)
+            close_old_connections()
+            try:
+                screen = ScreenSpec.objects.filter(pk=screen_id, profile_status='REPROFILE').first()
+                if screen is not None:
+                    result = reprofile_screen(screen)
+                    with self._lock:
+                        self._stats['reprofiled'] += 1
+                        self._stats['reused_rings'] += int(bool(result.get('reusedRings')))
+            except Exception as e:
+                with self._lock:
+                    self._stats['failed'] += 1
+                logger.error(f"Background reprofile failed for screen {screen_id}: {e}")
+            finally:
+                close_old_connections()
+                self._queue.task_done()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            data = dict(self._stats)
+            data['pending'] = len(self._pending)
+        return data
+
+
+_reprofile_queue: Optional[ReprofileQueue] = None
+
+
+def get_reprofile_queue() -> ReprofileQueue:
+    global _reprofile_queue
+    if _reprofile_queue is None:
+        from django.conf import settings
+        _reprofile_queue = ReprofileQueue(workers=getattr(settings, 'REPROFILE_WORKERS', 1))
+    return _reprofile_queue
+
+
+def schedule_reprofile(screen_id: int) -> None:
+    """Queue a flagged screen once the surrounding transaction commits."""
+    from django.conf import settings
+    from django.db import transaction
+
+    if not getattr(settings, 'REPROFILE_BACKGROUND', True):
+        return
+    transaction.on_commit(lambda: get_reprofile_queue().enqueue([screen_id]))
@@ -0,0 +1,290 @@
+"""
+Per-stage profiling telemetry
+
+Every profiling run (rules, hybrid, full LLM, research agent) records how
+long each stage took and how many backend calls it made, one compact row
+per run in ProfileTelemetry:
+
+    with profiling_run("hybrid", screen_id=12):      # outermost run owns the row
+        with profile_stage("ring1") as st:
+            places, meta = maps.places_nearby_all(...)
+            st.network(meta)                           # calls / network calls / cached
+
+- Runs nest: the view opens the run (so the DB save is included) and the
+  service methods it calls join it; hybrid -> rules joins the same run.
+  Called directly (commands, batch workers) the service methods open their own.
+- Gemini attempts and LLM cache hits/misses are counted by llm_profiler
+  into whatever run is active (note_llm_call / note_llm_cache).
+- Outside a run every helper is a no-op, so instrumented code costs nothing
+  when telemetry is disabled (PROFILE_TELEMETRY_ENABLED).
+
+summarize() turns a window of rows into p50/p95/p99 per stage plus LLM
+invocation rate and cache hit ratios (GET /api/screen-profiles/telemetry/).
+"""
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import functools
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StageSample:
+    """Calls made inside one profile_stage block."""
+
+    __slots__ = ("calls", "network_calls", "cached")
+
+    def __init__(self):
+        self.calls = 0
+        self.network_calls = 0
+        self.cached = True
+
+    def network(self, meta: Optional[Dict[str, Any]] = None, calls: int = 1) -> None:
+        """Count one backend call; meta is the usual {"network_calls", "cached"} dict."""
+        self.calls += calls
+        if meta:
+            self.network_calls += int(meta.get("network_calls") or 0)
+            self.cached = self.cached and bool(meta.get("cached"))
+
+
+class ProfileTrace:
+
+    def __init__(self, mode: str, screen_id: Optional[int] = None):
+        self.mode = mode
+        self.screen_id = screen_id
+        self.started = time.perf_counter()
+        # stage -> [ms, calls, network_calls]
+        self.stages: Dict[str, List[float]] = {}
+        self.maps_cached = True
+        self.llm_calls = 0
+        self.llm_cache_hits = 0
+        self.llm_cache_misses = 0
+        self.llm_used = False
+        self.shared = ""
+        self.error = ""
+
+    def add_stage(self, name: str, ms: float, calls: int = 0, network_calls: int = 0) -> None:
+        stage = self.stages.setdefault(name, [0.0, 0, 0])
+        stage[0] += ms
+        stage[1] += calls
+        stage[2] += network_calls
+
+    def observe_profile(self, profile: Dict[str, Any]) -> None:
+        """Pick up run-level facts from a finished profile."""
+        if not isinstance(profile, dict):
+            return
+        metadata = profile.get("metadata") or {}
+        self.maps_cached = self.maps_cached and bool(metadata.get("cached", True))
+        self.llm_used = self.llm_used or bool((profile.get("llmEnhancement") or {}).get("used"))
+        if metadata.get("sharedAnalysis"):
+            self.shared = str(metadata["sharedAnalysis"])
+        research = profile.get("researchAgent") or {}
+        for step, ms in (research.get("step_timings") or {}).items():
+            self.add_stage(f"research.{step}", float(ms or 0))
+
+    def to_row(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode[:20],
+            "screen_id": self.screen_id,
+            "total_ms": int((time.perf_counter() - self.started) * 1000),
+            "network_calls": int(sum(s[2] for s in self.stages.values())),
+            "maps_cached": self.maps_cached,
+            "llm_used": self.llm_used or self.llm_calls > 0,
+            "llm_calls": self.llm_calls,
+            "llm_cache_hits": self.llm_cache_hits,
+            "llm_cache_misses": self.llm_cache_misses,
+            "shared": self.shared[:16],
+            "error": self.error[:200],
+            "stages": {name: [round(ms, 1), int(calls), int(net)] for name, (ms, calls, net) in self.stages.items()},
+        }
+
+
+_current_trace: contextvars.ContextVar[Optional[ProfileTrace]] = contextvars.ContextVar(
+    "profile_trace", default=None
+)
+
+
+# LLM counters may be bumped from worker threads that share one trace
+_counter_lock = threading.Lock()
+
+
+def current_trace() -> Optional[ProfileTrace]:
+    return _current_trace.get()
+
+
+def _enabled() -> bool:
+    from django.conf import settings
+    return getattr(settings, "PROFILE_TELEMETRY_ENABLED", True)
+
+
+@contextlib.contextmanager
+def profiling_run(mode: str, screen_id: Optional[int] = None) -> Iterator[Optional[ProfileTrace]]:
+    """
+    Trace one profiling run and store it on exit.
+    Nested calls join the active run (and may fill in a missing screen_id).
+    """
+    trace = _current_trace.get()
+    if trace is not None:
+        if screen_id is not None and trace.screen_id is None:
+            trace.screen_id = screen_id
+        yield trace
+        return
+    if not _enabled():
+        yield None
+        return
+
+    trace = ProfileTrace(mode, screen_id=screen_id)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    except Exception as e:
+        trace.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_trace.reset(token)
+        record_trace(trace)
+
+
+@contextlib.contextmanager
+def profile_stage(name: str) -> Iterator[StageSample]:
+    """Time a block into the active run; a throwaway sample outside a run."""
+    sample = StageSample()
+    trace = _current_trace.get()
+    if trace is None:
+        yield sample
+        return
+    start = time.perf_counter()
+    try:
+        yield sample
+    finally:
+        trace.add_stage(name, (time.perf_counter() - start) * 1000, sample.calls, sample.network_calls)
+        if sample.calls:
+            trace.maps_cached = trace.maps_cached and sample.cached
+
+
+def traced_run(mode: str):
+    """Decorator for AreaContextService.analyze_* methods: run inside profiling_run(mode)."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with profiling_run(mode):
+                profile = fn(*args, **kwargs)
+                observe_profile(profile)
+                return profile
+        return wrapper
+    return decorator
+
+
+def note_llm_call() -> None:
+    """One Gemini request actually sent (retries count separately)."""
+    trace = _current_trace.get()
+    if trace is not None:
+        with _counter_lock:
+            trace.llm_calls += 1
+
+
+def note_llm_cache(hit: bool) -> None:
+    trace = _current_trace.get()
+    if trace is not None:
+        with _counter_lock:
+            if hit:
+                trace.llm_cache_hits += 1
+            else:
+                trace.llm_cache_misses += 1
+
+
+def observe_profile(profile: Dict[str, Any]) -> None:
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.observe_profile(profile)
+
+
+def record_trace(trace: ProfileTrace) -> None:
+    """Write one telemetry row; never fails the profiling run."""
+    try:
+        from .models import ProfileTelemetry
+        ProfileTelemetry.objects.create(**trace.to_row())
+    except Exception as e:
+        logger.warning(f"Failed to record profiling telemetry ({trace.mode}): {e}")
+
+
+# =============================================================================
+# AGGREGATION
+# =============================================================================
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _latency(values: List[float]) -> Dict[str, float]:
+    return {
+        "p50": round(percentile(values, 50), 1),
+        "p95": round(percentile(values, 95), 1),
+        "p99": round(percentile(values, 99), 1),
+    }
+
+
+def _ratio(part: float, whole: float) -> float:
+    return round(part / whole, 4) if whole else 0.0
+
+
+def summarize(rows: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Aggregate telemetry rows (dicts with ProfileTelemetry field names)."""
+    rows = list(rows)
+    totals: List[float] = []
+    stage_ms: Dict[str, List[float]] = {}
+    stage_calls: Dict[str, int] = {}
+    stage_network: Dict[str, int] = {}
+    by_mode: Dict[str, int] = {}
+    llm_runs = llm_calls = llm_hits = llm_misses = cached_runs = shared_runs = errors = network = 0
+
+    for row in rows:
+        totals.append(row["total_ms"])
+        by_mode[row["mode"]] = by_mode.get(row["mode"], 0) + 1
+        network += row["network_calls"]
+        llm_runs += int(row["llm_used"])
+        llm_calls += row["llm_calls"]
+        llm_hits += row["llm_cache_hits"]
+        llm_misses += row["llm_cache_misses"]
+        cached_runs += int(row["maps_cached"])
+        shared_runs += int(bool(row["shared"]))
+        errors += int(bool(row["error"]))
+        for name, (ms, calls, net) in (row["stages"] or {}).items():
+            stage_ms.setdefault(name, []).append(ms)
+            stage_calls[name] = stage_calls.get(name, 0) + calls
+            stage_network[name] = stage_network.get(name, 0) + net
+
+    runs = len(rows)
+    return {
+        "runs": runs,
+        "byMode": by_mode,
+        "errors": errors,
+        "totalMs": _latency(totals),
+        "stages": {
+            name: dict(
+                _latency(values),
+                runs=len(values),
+                callsPerRun=round(stage_calls[name] / len(values), 2),
+                networkCalls=stage_network[name],
+            )
+            for name, values in sorted(stage_ms.items())
+        },
+        "llm": {
+            "invocationRate": _ratio(llm_runs, runs),
+            "callsPerRun": round(llm_calls / runs, 2) if runs else 0.0,
+            "cacheHitRatio": _ratio(llm_hits, llm_hits + llm_misses),
+        },
+        "maps": {
+            "networkCallsPerRun": round(network / runs, 2) if runs else 0.0,
+            "fullyCachedRatio": _ratio(cached_runs, runs),
+        },
+        "sharedRatio": _ratio(shared_runs, runs),
+    }
@@ -6,4 +6,7 @@ urlpatterns = [
     path('screen-profile/<int:screen_id>/', views.ScreenProfileAPIView.as_view(), name='screen-profile-by-id'),
     path('screen-profile/', views.ScreenProfileAPIView.as_view(), name='screen-profile-analyze'),
     path('screen-profiles/', views.ScreenProfileListView.as_view(), name='screen-profiles-list'),
+    path('screen-profiles/batch/', views.ScreenProfileBatchAPIView.as_view(), name='screen-profiles-batch'),
+    path('screen-profiles/export/', views.ScreenProfileExportView.as_view(), name='screen-profiles-export'),
+    path('screen-profiles/telemetry/', views.ProfileTelemetryView.as_view(), name='screen-profiles-telemetry'),
 ]
@@ -1,9 +1,128 @@
+import logging
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import AllowAny  # For testing, change to IsAuthenticated later
+from rest_framework.permissions import AllowAny, IsAuthenticated  # AllowAny for testing, change to IsAuthenticated later
 from django.conf import settings
 
+from console.utils import parse_updated_since
+from .telemetry import profile_stage, profiling_run
+
+logger = logging.getLogger(__name__)
+
+
+def save_screen_profile(screen_obj, latitude, longitude, mode, profile, raw_places=None):
+    """
+    Upsert the ScreenProfile for a profiling result (one profile per screen,
+    re-profile overwrites) and mark the screen as profiled.
+
+    Both steps only apply while the screen's location fields still match what
+    screen_obj was loaded with. An edit made while the analysis ran has put
+    the screen back into REPROFILE; the stale result must not overwrite the
+    profile or clear that flag, so the queued rerun still picks it up.
+
+    Errors are logged, not raised: a failed save must not fail the analysis.
+    """
+    try:
+        from console.models import ScreenSpec
+        from django.utils import timezone
+        from .models import ScreenProfile
+        from .place_archive import compress_place_archive
+        from .reprofile import REPROFILE_FIELDS
+        from django.utils.dateparse import parse_datetime
+        
+        geo = profile.get("geoContext", {})
+        area = profile.get("area", {})
+        mvm = profile.get("movement", {})
+        meta = profile.get("metadata", {})
+        llm = profile.get("llmEnhancement", {})
+        rings = profile.get("ringAnalysis", {})
+        
+        computed_at = None
+        if meta.get("computedAt"):
+            computed_at = parse_datetime(meta["computedAt"])
+
+        unchanged = None
+        if screen_obj:
+            unchanged = ScreenSpec.objects.filter(
+                pk=screen_obj.pk, **{field: getattr(screen_obj, field) for field in REPROFILE_FIELDS}
+            )
+            if not unchanged.exists():
+                logger.info(f"Screen {screen_obj.pk} was edited during profiling; result not saved")
+                return
+
+        # Upsert: one profile per screen, re-profile overwrites
+        ScreenProfile.objects.update_or_create(
+            screen=screen_obj,
+            defaults={
+                # Input
+                'latitude': float(latitude),
+                'longitude': float(longitude),
+                'mode': mode,
+
+                # Geo Context
+                'city': geo.get("city", ""),
+                'state': geo.get("state", ""),
+                'country': geo.get("country", ""),
+                'city_tier': geo.get("cityTier", ""),
+                'formatted_address': geo.get("formattedAddress", ""),
+
+                # Area
+                'primary_type': area.get("primaryType", ""),
+                'area_context': area.get("context", ""),
+                'confidence': area.get("confidence", ""),
+                'classification_detail': area.get("classificationDetail", ""),
+                'dominant_group': area.get("dominantGroup", ""),
+
+                # Movement
+                'movement_type': mvm.get("type", ""),
+                'movement_context': mvm.get("context", ""),
+
+                # Dwell
+                'dwell_category': profile.get("dwellCategory", ""),
+                'dwell_confidence': profile.get("dwellConfidence"),
+                'dwell_score': profile.get("dwellScore"),
+
+                # Dominance
+                'dominance_ratio': profile.get("dominanceRatio"),
+
+                # Ring Analysis
+                'ring1_analysis': rings.get("ring1"),
+                'ring2_analysis': rings.get("ring2"),
+                'ring3_analysis': rings.get("ring3"),
+                'raw_places': compress_place_archive(raw_places),
+
+                # Reasoning
+                'reasoning': profile.get("reasoning", []),
+
+                # LLM
+                'llm_used': llm.get("used", False),
+                'llm_reason': llm.get("reason", ""),
+                'llm_mode': llm.get("mode", ""),
+
+                # Metadata
+                'profiled_at': computed_at,
+                'api_calls_made': meta.get("apiCallsMade", 0),
+                'cached': meta.get("cached", False),
+                'processing_time_ms': meta.get("processingTimeMs"),
+                'api_key_configured': meta.get("apiKeyConfigured", True),
+                'warnings': meta.get("warnings", []),
+                'version': meta.get("version", ""),
+            }
+        )
+        
+        # If we have a screen object, update its profiling status. Only these
+        # columns, and only if the location is still the one profiled: an edit
+        # landing after the check above leaves the screen in REPROFILE.
+        if unchanged is not None:
+            unchanged.update(is_profiled=True, profile_status='PROFILED', updated_at=timezone.now())
+            
+    except Exception as save_error:
+        # Log but don't fail the main request if DB save fails
+        logger.error(f"Error saving ScreenProfile to database: {save_error}")
+
+
 
 class ScreenProfileAPIView(APIView):
     """
@@ -97,111 +216,63 @@ class ScreenProfileAPIView(APIView):
             
             # Import and use area context service
             from .area_context_service import get_area_context_service
+            from .profile_coalescer import get_profile_coalescer
             
             area_context_service = get_area_context_service()
+            coalescer = get_profile_coalescer()
+            latitude = float(latitude)
+            longitude = float(longitude)
+            # The screen's own address lets offline geo lookup skip the reverse geocode
+            address_hint = (screen_obj.full_address or None) if screen_obj else request.data.get('address')
             
-            # Choose analysis method based on mode
-            if mode == 'hybrid':
-                profile = area_context_service.analyze_screen_location_hybrid(
-                    latitude=float(latitude),
-                    longitude=float(longitude),
+            def analyze():
+                # Choose analysis method based on mode
+                if mode == 'hybrid':
+                    return area_context_service.analyze_screen_location_hybrid(
+                        latitude=latitude,
+                        longitude=longitude,
+                        indoor=indoor,
+                        height_from_ground_ft=float(height_from_ground_ft),
+                        address_hint=address_hint
+                    )
+                return area_context_service.analyze_screen_location(
+                    latitude=latitude,
+                    longitude=longitude,
                     indoor=indoor,
-                    height_from_ground_ft=float(height_from_ground_ft)
-                )
-            else:
-                profile = area_context_service.analyze_screen_location(
-                    latitude=float(latitude),
-                    longitude=float(longitude),
-                    indoor=indoor,
-                    height_from_ground_ft=float(height_from_ground_ft)
+                    height_from_ground_ft=float(height_from_ground_ft),
+                    address_hint=address_hint
                 )
             
-            # Save results to Database
-            try:
-                from .models import ScreenProfile
-                from django.utils.dateparse import parse_datetime
-                
-                geo = profile.get("geoContext", {})
-                area = profile.get("area", {})
-                mvm = profile.get("movement", {})
-                meta = profile.get("metadata", {})
-                llm = profile.get("llmEnhancement", {})
-                rings = profile.get("ringAnalysis", {})
-                
-                computed_at = None
-                if meta.get("computedAt"):
-                    computed_at = parse_datetime(meta["computedAt"])
-
-                # Upsert: one profile per screen, re-profile overwrites
-                ScreenProfile.objects.update_or_create(
-                    screen=screen_obj,
-                    defaults={
-                        # Input
-                        'latitude': float(latitude),
-                        'longitude': float(longitude),
-                        'mode': mode,
-
-                        # Geo Context
-                        'city': geo.get("city", ""),
-                        'state': geo.get("state", ""),
-                        'country': geo.get("country", ""),
-                        'city_tier': geo.get("cityTier", ""),
-                        'formatted_address': geo.get("formattedAddress", ""),
-
-                        # Area
-                        'primary_type': area.get("primaryType", ""),
-                        'area_context': area.get("context", ""),
-                        'confidence': area.get("confidence", ""),
-                        'classification_detail': area.get("classificationDetail", ""),
-                        'dominant_group': area.get("dominantGroup", ""),
-
-                        # Movement
-                        'movement_type': mvm.get("type", ""),
-                        'movement_context': mvm.get("context", ""),
-
-                        # Dwell
-                        'dwell_category': profile.get("dwellCategory", ""),
-                        'dwell_confidence': profile.get("dwellConfidence"),
-                        'dwell_score': profile.get("dwellScore"),
-
-                        # Dominance
-                        'dominance_ratio': profile.get("dominanceRatio"),
-
-                        # Ring Analysis
-                        'ring1_analysis': rings.get("ring1"),
-                        'ring2_analysis': rings.get("ring2"),
-                        'ring3_analysis': rings.get("ring3"),
-
-                        # Reasoning
-                        'reasoning': profile.get("reasoning", []),
-
-                        # LLM
-                        'llm_used': llm.get("used", False),
-                        'llm_reason': llm.get("reason", ""),
-                        'llm_mode': llm.get("mode", ""),
-
-                        # Metadata
-                        'profiled_at': computed_at,
-                        'api_calls_made': meta.get("apiCallsMade", 0),
-                        'cached': meta.get("cached", False),
-                        'processing_time_ms': meta.get("processingTimeMs"),
-                        'api_key_configured': meta.get("apiKeyConfigured", True),
-                        'warnings': meta.get("warnings", []),
-                        'version': meta.get("version", ""),
-                    }
+            def profile_and_save():
+                # Identical (rounded) coordinates and address share one in-flight or recent analysis
+                profile, shared = coalescer.profile_location(
+                    latitude, longitude, mode, analyze,
+                    indoor=indoor, height_from_ground_ft=height_from_ground_ft,
+                    address_hint=address_hint
                 )
+                if shared:
+                    profile.setdefault("metadata", {})["sharedAnalysis"] = shared
                 
-                # If we have a screen object, update its profiling status
-                if screen_obj:
-                    screen_obj.is_profiled = True
-                    screen_obj.profile_status = 'PROFILED'
-                    screen_obj.save()
-                    
-            except Exception as save_error:
-                # Log but don't fail the main request if DB save fails
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.error(f"Error saving ScreenProfile to database: {save_error}")
+                # Raw place archive is persisted, not returned to the client
+                raw_places = profile.pop("rawPlaces", None)
+                
+                # Save results to Database
+                with profile_stage("db_save"):
+                    save_screen_profile(screen_obj, latitude, longitude, mode, profile, raw_places)
+                return profile
+            
+            # The run spans analyze + save; the service methods join it
+            with profiling_run(mode, screen_id=screen_obj.pk if screen_obj else None) as trace:
+                if screen_obj is not None:
+                    # Concurrent requests for this screen wait for and share one analyze + save
+                    location_key = coalescer.coordinate_key(
+                        latitude, longitude, mode, indoor, height_from_ground_ft, address_hint
+                    )
+                    profile, screen_shared = coalescer.profile_screen(screen_obj.pk, location_key, profile_and_save)
+                else:
+                    profile, screen_shared = profile_and_save(), False
+                if trace is not None:
+                    trace.shared = "screen" if screen_shared else profile.get("metadata", {}).get("sharedAnalysis") or ""
             
             return Response({
                 'status': 'success',
@@ -225,6 +296,113 @@ class ScreenProfileAPIView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class ScreenProfileBatchAPIView(APIView):
+    """
+    Batch profiling for onboarding many screens at once.
+
+    POST /api/screen-profiles/batch/
+      Body: {"screen_ids": [1, 2, ...], "mode": "hybrid"|"rules"}
+
+    Hybrid LLM resolutions are packed several screens per Gemini call
+    (see AreaContextService.analyze_screen_locations_batch).
+
+    Screens are analysed in chunks of SCREEN_PROFILE_BATCH_CHUNK and saved
+    chunk by chunk: if a chunk fails (e.g. RateLimitExceeded) its screens
+    are reported as errors and the profiles already finished are kept.
+    Authenticated only - every call spends paid Maps / Gemini quota.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        from console.models import ScreenSpec
+
+        screen_ids = request.data.get('screen_ids') or []
+        mode = request.data.get('mode', 'hybrid')
+        max_batch = getattr(settings, 'SCREEN_PROFILE_BATCH_MAX', 200)
+
+        if mode not in ['rules', 'hybrid']:
+            return Response({
+                'status': 'error',
+                'error': {
+                    'code': 'INVALID_MODE',
+                    'message': 'mode must be "rules" or "hybrid"'
+                }
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            screen_ids = list(dict.fromkeys(int(sid) for sid in screen_ids))
+        except (TypeError, ValueError):
+            screen_ids = []
+        if not screen_ids or len(screen_ids) > max_batch:
+            return Response({
+                'status': 'error',
+                'error': {
+                    'code': 'INVALID_INPUT',
+                    'message': f'screen_ids must be a list of 1-{max_batch} screen IDs'
+                }
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        screens = ScreenSpec.objects.in_bulk(screen_ids)
+        results = []
+        batch = []
+        for screen_id in screen_ids:
+            screen_obj = screens.get(screen_id)
+            if screen_obj is None:
+                results.append({'screen_id': screen_id, 'status': 'error', 'error': 'SCREEN_NOT_FOUND'})
+            elif screen_obj.latitude is None or screen_obj.longitude is None:
+                results.append({'screen_id': screen_id, 'status': 'error', 'error': 'MISSING_COORDINATES'})
+            else:
+                batch.append(screen_obj)
+
+        from .area_context_service import get_area_context_service
+        from .rate_limiter import RateLimitExceeded
+
+        service = get_area_context_service()
+        chunk_size = max(1, getattr(settings, 'SCREEN_PROFILE_BATCH_CHUNK', 25))
+        for start in range(0, len(batch), chunk_size):
+            chunk = batch[start:start + chunk_size]
+            try:
+                profiles = service.analyze_screen_locations_batch([
+                    {
+                        'latitude': screen_obj.latitude,
+                        'longitude': screen_obj.longitude,
+                        'indoor': screen_obj.environment == 'Indoor',
+                        'height_from_ground_ft': float(screen_obj.mounting_height_ft or 0.0),
+                        'address': screen_obj.full_address or None,
+                    }
+                    for screen_obj in chunk
+                ], mode=mode)
+            except Exception as e:
+                code = 'RATE_LIMITED' if isinstance(e, RateLimitExceeded) else 'COMPUTATION_ERROR'
+                logger.error(f"Batch profiling chunk failed ({len(chunk)} screens): {e}")
+                results.extend(
+                    {'screen_id': screen_obj.pk, 'status': 'error', 'error': code, 'message': str(e)}
+                    for screen_obj in chunk
+                )
+                continue
+
+            for screen_obj, profile in zip(chunk, profiles):
+                if 'error' in profile:
+                    results.append({'screen_id': screen_obj.pk, 'status': 'error', 'error': profile['error']})
+                    continue
+                raw_places = profile.pop("rawPlaces", None)
+                save_screen_profile(screen_obj, screen_obj.latitude, screen_obj.longitude, mode, profile, raw_places)
+                results.append({
+                    'screen_id': screen_obj.pk,
+                    'status': 'success',
+                    'primary_type': profile.get('primaryType'),
+                    'llm_used': profile.get('llmEnhancement', {}).get('used', False),
+                })
+
+        return Response({
+            'status': 'success',
+            'mode': mode,
+            'total': len(results),
+            'profiled': sum(1 for r in results if r['status'] == 'success'),
+            'results': results,
+        }, status=status.HTTP_200_OK)
+
+
 class ScreenProfileListView(APIView):
     """
     GET endpoint to list all screen AI profiles with optional filters.
@@ -237,13 +415,20 @@ class ScreenProfileListView(APIView):
       - movement_type: filter by movement type (e.g. SLOW_FLOW)
       - dwell_category: filter by dwell category (e.g. MEDIUM_WAIT)
       - state: filter by state (case-insensitive partial match)
+      - updated_since: ISO datetime, only profiles written at/after it (XIA incremental sync)
     """
     permission_classes = [AllowAny]
 
     def get(self, request):
         from .models import ScreenProfile
 
-        profiles = ScreenProfile.objects.all().order_by('-created_at')
+        # One joined query; the list never returns the heavy JSON columns
+        profiles = (
+            ScreenProfile.objects
+            .select_related('screen')
+            .defer(*ScreenProfile.deferred_fields())
+            .order_by('-created_at')
+        )
 
         # Optional filters
         screen_id = request.query_params.get('screen_id')
@@ -274,6 +459,14 @@ class ScreenProfileListView(APIView):
         if dwell_category:
             profiles = profiles.filter(dwell_category__icontains=dwell_category)
 
+        try:
+            updated_since = parse_updated_since(request)
+        except ValueError as e:
+            return Response({'status': 'error', 'error': {'code': 'INVALID_INPUT', 'message': str(e)}},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if updated_since:
+            profiles = profiles.filter(updated_at__gte=updated_since)
+
         # Build response
         data = []
         for profile in profiles:
@@ -311,3 +504,116 @@ class ScreenProfileListView(APIView):
             "total": len(data),
             "profiles": data,
         }, status=status.HTTP_200_OK)
+
+
+class ScreenProfileExportView(APIView):
+    """
+    Bulk export of full AI profiles (the GET /screens/{id}/profile/ shape)
+    so consumers such as the XIA sync fetch every profile in a few requests.
+
+    GET /api/screen-profiles/export/
+      - updated_since: ISO datetime, only profiles written at/after it
+      - screen_ids: comma-separated screen ids (max one page)
+      - after: screen id cursor, return screens with a larger id
+      - limit: page size (default 500, max 2000)
+
+    Ordered by screen id; "next" is the cursor for the following page
+    (null on the last page).
+    """
+    permission_classes = [AllowAny]
+
+    DEFAULT_LIMIT = 500
+    MAX_LIMIT = 2000
+
+    def get(self, request):
+        from .models import ScreenProfile
+
+        try:
+            limit = min(max(int(request.query_params.get('limit', self.DEFAULT_LIMIT)), 1), self.MAX_LIMIT)
+            after = int(request.query_params.get('after', 0))
+            raw_ids = request.query_params.get('screen_ids', '')
+            screen_ids = [int(i) for i in raw_ids.split(',') if i.strip()]
+            updated_since = parse_updated_since(request)
+        except ValueError as e:
+            return Response({'status': 'error', 'error': {'code': 'INVALID_INPUT', 'message': str(e)}},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(screen_ids) > limit:
+            return Response({
+                'status': 'error',
+                'error': {'code': 'INVALID_INPUT', 'message': f'At most {limit} screen_ids per request'}
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        # raw_places is not part of the response shape
+        profiles = ScreenProfile.objects.filter(screen_id__gt=after).defer('raw_places').order_by('screen_id')
+        if screen_ids:
+            profiles = profiles.filter(screen_id__in=screen_ids)
+        if updated_since:
+            profiles = profiles.filter(updated_at__gte=updated_since)
+
+        # One extra row tells whether another page follows
+        page = list(profiles[:limit + 1])
+        has_more = len(page) > limit
+        page = page[:limit]
+
+        return Response({
+            'count': len(page),
+            'next': page[-1].screen_id if has_more else None,
+            'profiles': [
+                {
+                    'screen_id': profile.screen_id,
+                    'updated_at': profile.updated_at,
+                    'profile': profile.to_response_dict(),
+                }
+                for profile in page
+            ],
+        }, status=status.HTTP_200_OK)
+
+
+class ProfileTelemetryView(APIView):
+    """
+    Per-stage profiling latency over a time window.
+
+    GET /api/screen-profiles/telemetry/
+      - hours: window size (default 24, max 720)
+      - mode: only runs of this mode (rules, hybrid, full_llm, research, hybrid_batch)
+
+    Returns p50/p95/p99 for the whole run and per stage (geo, ring1, ring1_5,
+    ring2, ring3, enrich, llm, research.*, db_save), LLM invocation rate
+    and LLM / Maps cache hit ratios.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        from datetime import timedelta
+        from django.utils import timezone
+        from .models import ProfileTelemetry
+        from .telemetry import summarize
+
+        try:
+            hours = min(max(float(request.query_params.get('hours', 24)), 0.1), 720)
+        except ValueError:
+            return Response({
+                'status': 'error',
+                'error': {'code': 'INVALID_INPUT', 'message': 'hours must be a number'}
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        since = timezone.now() - timedelta(hours=hours)
+        rows = ProfileTelemetry.objects.filter(created_at__gte=since)
+        mode = request.query_params.get('mode')
+        if mode:
+            rows = rows.filter(mode=mode)
+
+        # Newest runs first; the cap keeps very busy windows cheap to aggregate
+        max_rows = getattr(settings, 'PROFILE_TELEMETRY_MAX_ROWS', 20000)
+        rows = rows.order_by('-created_at').values(
+            'mode', 'total_ms', 'network_calls', 'maps_cached', 'llm_used', 'llm_calls',
+            'llm_cache_hits', 'llm_cache_misses', 'shared', 'error', 'stages',
+        )[:max_rows]
+
+        summary = summarize(rows)
+        return Response({
+            'status': 'success',
+            'window': {'hours': hours, 'since': since.isoformat(), 'mode': mode or None},
+            'truncated': summary['runs'] >= max_rows,
+            'data': summary,
+        }, status=status.HTTP_200_OK)
@@ -0,0 +1,350 @@
+"""
+Console Tests
+-------------
+"""
+
+from django.test import SimpleTestCase, TestCase
+
+
+class StartupImportTest(SimpleTestCase):
+    """Worker cold start does not pull in the LLM SDKs (time/memory budgets: manage.py startup_benchmark)."""
+
+    def test_lazy_sdks_not_imported(self):
+        from console.management.commands.startup_benchmark import _run_child
+        report, _ = _run_child('time')
+        self.assertEqual(report['heavy_loaded'], [])
+
+
+class BatchAmbiguityParseTest(SimpleTestCase):
+    """Batched Gemini responses are validated item by item."""
+
+    def _parse(self, response, expected):
+        from console.screen_profiler.llm_profiler import GeminiAdapter, LLMConfig
+        adapter = GeminiAdapter.__new__(GeminiAdapter)
+        adapter.config = LLMConfig()
+        return adapter._parse_batch_ambiguity_response(response, expected)
+
+    def test_malformed_items_are_left_for_single_calls(self):
+        response = """```json
+[
+  {"id": 1, "should_override": true, "final_type": "HEALTHCARE", "final_context": "AIIMS Zone", "rationale": "AIIMS"},
+  {"id": 0, "should_override": "maybe", "final_type": "RETAIL", "final_context": "x"},
+  {"id": 2, "should_override": false, "final_type": "NOT_A_TYPE", "final_context": "x"},
+  {"id": 1, "should_override": false, "final_type": "RETAIL", "final_context": "dup"}
+]
+```"""
+        results = self._parse(response, 3)
+        self.assertIsNone(results[0])
+        self.assertEqual(results[1]["final_type"], "HEALTHCARE")
+        self.assertIsNone(results[2])
+
+    def test_unparseable_response(self):
+        self.assertEqual(self._parse("not json", 2), [None, None])
+
+
+class ProfileCoalescerTest(SimpleTestCase):
+    """Concurrent and repeated profiling of one location runs the analysis once."""
+
+    def test_concurrent_and_recent_calls_share_one_analysis(self):
+        import threading
+        from console.screen_profiler.profile_coalescer import ProfileCoalescer
+
+        coalescer = ProfileCoalescer(reuse_window=60, precision=4, cache_alias='default')
+        calls = []
+        started = threading.Event()
+        release = threading.Event()
+
+        def analyze():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return {"primaryType": "RETAIL", "metadata": {}}
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(
+            coalescer.profile_location(13.00001, 80.20001, "rules-test", analyze)))
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(target=lambda: results.append(
+            coalescer.profile_location(13.00002, 80.20002, "rules-test", analyze)))
+        follower.start()
+        release.set()
+        leader.join(5)
+        follower.join(5)
+
+        recent, shared = coalescer.profile_location(13.00003, 80.20003, "rules-test", analyze)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(shared, "recent")
+        self.assertEqual(recent["primaryType"], "RETAIL")
+        self.assertIsNot(results[0][0], results[1][0])
+
+    def test_address_is_part_of_the_key(self):
+        from console.screen_profiler.profile_coalescer import ProfileCoalescer
+
+        coalescer = ProfileCoalescer(reuse_window=60, precision=4, cache_alias='default')
+        key = coalescer.coordinate_key(13.0, 80.2, "rules", address_hint="Anna Salai, Chennai")
+        self.assertEqual(key, coalescer.coordinate_key(13.0, 80.2, "rules", address_hint="  anna salai,  CHENNAI "))
+        self.assertNotEqual(key, coalescer.coordinate_key(13.0, 80.2, "rules", address_hint="Mount Road, Chennai"))
+        self.assertNotEqual(key, coalescer.coordinate_key(13.0, 80.2, "rules"))
+
+
+class SharedRateLimitTest(SimpleTestCase):
+    """Shared mode counts its one-second windows in RATE_LIMIT_CACHE_ALIAS, not the per-process default."""
+
+    def test_shared_window_uses_configured_alias(self):
+        from unittest import mock
+        from django.core.cache import caches
+        from django.test import override_settings
+        from console.screen_profiler.rate_limiter import RateLimitExceeded, TokenBucketLimiter
+
+        locmem = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+        with override_settings(CACHES={'default': dict(locmem, LOCATION='d'), 'shared': dict(locmem, LOCATION='s')},
+                               RATE_LIMIT_CACHE_ALIAS='shared'), \
+                mock.patch('console.screen_profiler.rate_limiter.time.time', return_value=1000.0):
+            limiter = TokenBucketLimiter(rate=1, capacity=5, max_wait=0, shared=True, cache_prefix='t')
+            limiter.acquire()
+            with self.assertRaises(RateLimitExceeded):
+                limiter.acquire()
+            self.assertEqual(caches['shared'].get('t_1000'), 2)
+            self.assertIsNone(caches['default'].get('t_1000'))
+
+
+class DedupeMemoTest(SimpleTestCase):
+    """The dedupe memo is keyed on names and coordinates, not just place ids."""
+
+    def test_same_ids_different_coordinates(self):
+        from console.screen_profiler.area_context_service import PlaceTypeNormalizer
+
+        def place(place_id, lat):
+            return {'place_id': place_id, 'name': 'Cafe Coffee Day', 'geometry': {'location': {'lat': lat, 'lng': 80.2}}}
+
+        normalizer = PlaceTypeNormalizer()
+        self.assertEqual(len(normalizer.dedupe_places([place('a', 13.0), place('b', 13.0)])), 1)
+        self.assertEqual(len(normalizer.dedupe_places([place('a', 13.0), place('b', 13.01)])), 2)
+
+
+class ReprofileFieldDiffTest(SimpleTestCase):
+    """Only location-relevant edits trigger a reprofile."""
+
+    def test_location_changes(self):
+        from decimal import Decimal
+        from types import SimpleNamespace
+        from console.screen_profiler.reprofile import location_changes
+
+        screen = SimpleNamespace(
+            latitude=Decimal('13.0827000'), longitude=Decimal('80.2707000'),
+            environment='Indoor', mounting_height_ft=Decimal('12.00'), full_address='Anna Salai',
+        )
+        self.assertEqual(location_changes(screen, {
+            'base_price_per_slot_inr': Decimal('500'),
+            'latitude': Decimal('13.0827'),
+            'full_address': 'Anna Salai ',
+        }), {})
+        self.assertEqual(
+            set(location_changes(screen, {'longitude': Decimal('80.2708'), 'environment': 'Outdoor'})),
+            {'longitude', 'environment'},
+        )
+
+    def test_archive_keeps_capture_origin(self):
+        from console.screen_profiler.place_archive import RecordingMapsSource, StoredMapsSource
+
+        archive = RecordingMapsSource(None).export(origin=(13.0827, 80.2707))
+        archive['queries']['13.0827,80.2707|75|20'] = []
+        self.assertEqual(archive['origin'], [13.0827, 80.2707])
+        # A moved screen is answered from the data recorded at the archive's origin
+        places, _ = StoredMapsSource(archive).places_nearby_all(13.0829, 80.2707, radius=75, max_results=20)
+        self.assertEqual(places, [])
+
+
+class ReprofileEditRaceTest(TestCase):
+    """An edit landing while a reprofile runs keeps the screen in REPROFILE for the queued rerun."""
+
+    def test_edit_during_reprofile(self):
+        from decimal import Decimal
+        from unittest import mock
+        from console.models import ScreenSpec
+        from console.screen_profiler.models import ScreenProfile
+        from console.screen_profiler.reprofile import reprofile_screen
+
+        screen = ScreenSpec.objects.create(
+            latitude=Decimal('13.0827000'), longitude=Decimal('80.2707000'), profile_status='REPROFILE',
+        )
+        analyzed_at = []
+
+        def analyze(latitude, longitude, **kwargs):
+            analyzed_at.append((latitude, longitude))
+            if len(analyzed_at) == 1:
+                # Admin moves the screen while the first run is computing
+                ScreenSpec.objects.filter(pk=screen.pk).update(
+                    latitude=Decimal('13.0900000'), profile_status='REPROFILE',
+                )
+            return {'geoContext': {'city': 'Chennai'}, 'metadata': {}}
+
+        service = mock.Mock(analyze_screen_location_hybrid=analyze)
+        with mock.patch('console.screen_profiler.area_context_service.get_area_context_service', return_value=service):
+            reprofile_screen(ScreenSpec.objects.get(pk=screen.pk))
+            screen.refresh_from_db()
+            self.assertEqual(screen.profile_status, 'REPROFILE')
+            self.assertFalse(ScreenProfile.objects.filter(screen=screen).exists())
+
+            # The rerun queued by the edit profiles the new coordinates
+            reprofile_screen(ScreenSpec.objects.get(pk=screen.pk, profile_status='REPROFILE'))
+        screen.refresh_from_db()
+        self.assertEqual(screen.profile_status, 'PROFILED')
+        self.assertEqual(analyzed_at[1][0], 13.09)
+        self.assertEqual(float(ScreenProfile.objects.get(screen=screen).latitude), 13.09)
+
+
+class PlaceDetailsCacheTest(SimpleTestCase):
+    """Only successful Place Details are cached, and only in the place_details alias."""
+
+    def test_failed_lookup_not_cached(self):
+        from unittest import mock
+        from django.core.cache import caches
+        from django.test import override_settings
+        from console.screen_profiler.google_maps_utils import GoogleMapsAreaContextService
+
+        locmem = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+        with override_settings(CACHES={'default': dict(locmem, LOCATION='d'), 'details': dict(locmem, LOCATION='p')},
+                               GOOGLE_PLACES_CACHE_ALIAS='details'):
+            service = GoogleMapsAreaContextService()
+            with mock.patch.object(service, '_throttled', return_value={'status': 'NOT_FOUND'}):
+                self.assertEqual(service._fetch_place_details(None, 'p1', 'place_details_p1'), {})
+            self.assertIsNone(caches['details'].get('place_details_p1'))
+
+            ok = {'status': 'OK', 'result': {'name': 'Cafe'}}
+            with mock.patch.object(service, '_throttled', return_value=ok):
+                service._fetch_place_details(None, 'p1', 'place_details_p1')
+            self.assertEqual(caches['details'].get('place_details_p1'), {'name': 'Cafe'})
+            self.assertIsNone(caches['default'].get('place_details_p1'))
+
+
+class AdminBoundaryIndexTest(SimpleTestCase):
+    """Offline geoContext picks the smallest containing polygon and respects holes."""
+
+    def test_lookup(self):
+        import os
+        from console.screen_profiler.admin_boundaries import AdminBoundaryIndex
+
+        path = os.path.join(os.path.dirname(__file__), 'fixtures', 'admin_boundaries_sample.geojson')
+        index = AdminBoundaryIndex.from_geojson(path, cell_deg=0.1)
+
+        self.assertEqual(index.lookup(13.08, 80.27)["city"], "Chennai")
+        self.assertEqual(index.lookup(13.08, 80.27)["cityTier"], "TIER_1")
+        self.assertEqual(index.lookup(13.03, 80.26)["city"], "Mylapore")
+        self.assertEqual(index.lookup(12.7, 79.7)["city"], "Kanchipuram")
+        self.assertIsNone(index.lookup(12.92, 80.12))  # hole
+        self.assertIsNone(index.lookup(28.6, 77.2))
+
+    def test_unmapped_district_has_no_tier(self):
+        from console.screen_profiler.admin_boundaries import city_tier_for
+
+        self.assertEqual(city_tier_for("Chennai District"), "TIER_1")
+        self.assertIsNone(city_tier_for("Kanchipuram"))
+
+
+class FixtureStoreTest(SimpleTestCase):
+    """Recorded responses replay by key, as copies, and unknown keys fail loudly."""
+
+    def test_record_then_replay(self):
+        import os
+        import tempfile
+        from console.screen_profiler.replay_harness import FixtureMiss, FixtureStore
+
+        path = os.path.join(tempfile.mkdtemp(), 'corpus.json.gz')
+        recorder = FixtureStore(path, mode='record')
+        recorder.call('google', 'maps.place_details', 'k1', lambda: {'result': {'name': 'Cafe'}})
+        recorder.save()
+
+        replay = FixtureStore(path, latency_ms={'google': 0})
+        first = replay.call('google', 'maps.place_details', 'k1', lambda: self.fail('live call in replay'))
+        first['result']['name'] = 'mutated'
+        self.assertEqual(replay.call('google', 'maps.place_details', 'k1', None)['result']['name'], 'Cafe')
+        self.assertEqual(replay.snapshot()['maps.place_details']['calls'], 2)
+        with self.assertRaises(FixtureMiss):
+            replay.call('google', 'maps.place_details', 'missing', None)
+
+
+class ProfileTelemetryTest(SimpleTestCase):
+    """Nested runs collapse into one row and summaries report per-stage percentiles."""
+
+    def test_nested_run_and_summary(self):
+        from unittest import mock
+        from console.screen_profiler import telemetry
+
+        recorded = []
+        with mock.patch.object(telemetry, 'record_trace', recorded.append):
+            with telemetry.profiling_run('hybrid', screen_id=7):
+                with telemetry.profiling_run('rules'):
+                    with telemetry.profile_stage('ring2') as stage:
+                        stage.network({'network_calls': 1, 'cached': False})
+                        stage.network({'network_calls': 0, 'cached': True})
+                telemetry.note_llm_cache(False)
+                telemetry.note_llm_call()
+
+        self.assertEqual(len(recorded), 1)
+        row = recorded[0].to_row()
+        self.assertEqual((row['mode'], row['screen_id'], row['network_calls']), ('hybrid', 7, 1))
+        self.assertEqual(row['stages']['ring2'][1:], [2, 1])
+        self.assertTrue(row['llm_used'])
+        self.assertFalse(row['maps_cached'])
+
+        rows = [dict(row, total_ms=ms, stages={'ring2': [ms, 1, 0]}) for ms in range(1, 101)]
+        summary = telemetry.summarize(rows + [dict(row, llm_used=False, llm_calls=0, llm_cache_hits=1)])
+        self.assertEqual(summary['runs'], 101)
+        self.assertEqual(summary['stages']['ring2']['p50'], 50)
+        self.assertEqual(summary['stages']['ring2']['p99'], 99)
+        self.assertEqual(summary['llm']['cacheHitRatio'], round(1 / 102, 4))
+
+
+class ProfileSummaryTest(SimpleTestCase):
+    """The compact profile never touches deferred heavy columns."""
+
+    def test_summary_skips_heavy_fields(self):
+        from console.screen_profiler.models import ScreenProfile
+
+        profile = ScreenProfile(latitude=13.08, longitude=80.27, city='Chennai', primary_type='COMMERCIAL',
+                                movement_type='SLOW_FLOW', dwell_category='MEDIUM_WAIT')
+        for name in ScreenProfile.HEAVY_FIELDS:
+            profile.__dict__.pop(name, None)  # what .defer() leaves behind
+
+        summary = profile.to_summary_dict()
+        self.assertEqual(summary['area']['primaryType'], 'COMMERCIAL')
+        self.assertEqual(summary['movement']['type'], 'SLOW_FLOW')
+        self.assertNotIn('ringAnalysis', summary)
+        self.assertEqual(profile.get_deferred_fields(), set(ScreenProfile.HEAVY_FIELDS))
+        self.assertEqual(ScreenProfile.deferred_fields('ai_profile__')[0], 'ai_profile__ring1_analysis')
+
+
+class UpdatedSinceParamTest(SimpleTestCase):
+    """?updated_since= accepts ISO datetimes, including an un-encoded '+' offset."""
+
+    def _parse(self, value):
+        from types import SimpleNamespace
+        from console.utils import parse_updated_since
+        return parse_updated_since(SimpleNamespace(query_params={'updated_since': value} if value else {}))
+
+    def test_parse(self):
+        self.assertIsNone(self._parse(None))
+        self.assertEqual(self._parse('2026-01-02T03:04:05 05:30').utcoffset().total_seconds(), 19800)
+        self.assertEqual(self._parse('2026-01-02T03:04:05').utcoffset().total_seconds(), 0)
+        with self.assertRaises(ValueError):
+            self._parse('yesterday')
+
+
+class DensityBaselineRadiusTest(SimpleTestCase):
+    """The baseline records the radius a location needed, so it can move down."""
+
+    def test_smallest_sufficient_radius(self):
+        from console.screen_profiler.area_context_service import RING2_CONFIG
+        from console.screen_profiler.density_baseline import smallest_sufficient_radius
+
+        def place(metres_north):
+            return {'geometry': {'location': {'lat': 13.0 + metres_north / 111195.0, 'lng': 80.0}}}
+
+        dense = [place(100 + i * 20) for i in range(20)]  # 15th place at ~380m
+        # Search started at a predicted 1100m but 500m already had enough places
+        self.assertEqual(smallest_sufficient_radius(13.0, 80.0, dense, 500, 1100, RING2_CONFIG), 500)
+        sparse = [place(100 + i * 60) for i in range(20)]  # 15th place at ~940m
+        self.assertEqual(smallest_sufficient_radius(13.0, 80.0, sparse, 500, 1100, RING2_CONFIG), 1100)
+        self.assertEqual(smallest_sufficient_radius(13.0, 80.0, dense[:10], 500, 1400, RING2_CONFIG), 1400)
@@ -1,4 +1,4 @@
-from .models import AuditLog
+from .models import AuditLog, ReplicationOutbox
 
 def log_action(user, action, component, target_id=None, payload=None, request=None):
     """
@@ -20,3 +20,57 @@ def log_action(user, action, component, target_id=None, payload=None, request=No
         payload=payload or {},
         ip_address=ip_address
     )
+
+
+def parse_updated_since(request):
+    """
+    Read the ?updated_since=<ISO datetime> filter used by incremental sync.
+    Returns an aware datetime or None; raises ValueError if it does not parse.
+    """
+    import re
+    from datetime import timezone as dt_timezone
+    from django.utils import timezone
+    from django.utils.dateparse import parse_datetime
+
+    raw = request.query_params.get('updated_since')
+    if not raw:
+        return None
+    # A '+hh:mm' offset arrives as ' hh:mm' when the client did not URL-encode it
+    value = parse_datetime(re.sub(r'(:\d{2}(?:\.\d+)?) (\d{2}:?\d{2})$', r'\1+\2', raw.strip()))
+    if value is None:
+        raise ValueError(f"updated_since must be an ISO 8601 datetime, got {raw!r}")
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value, dt_timezone.utc)
+    return value
+
+
+def outbox_enabled():
+    """True when XIA is replicated through ReplicationOutbox (XIA_REPLICATION='outbox')."""
+    from django.conf import settings
+    return getattr(settings, 'XIA_REPLICATION', 'outbox') == 'outbox'
+
+
+def record_outbox_changes(entity, object_ids, op='upsert'):
+    """
+    Append XIA replication events for rows written without model signals
+    (queryset .update(), bulk_update). Call inside the writing transaction.
+    """
+    object_ids = list(object_ids)
+    if not object_ids or not outbox_enabled():
+        return
+    ReplicationOutbox.objects.bulk_create([
+        ReplicationOutbox(entity=entity, object_id=object_id, op=op) for object_id in object_ids
+    ])
+
+
+def update_with_outbox(queryset, entity, **fields):
+    """queryset.update(**fields) plus outbox events for the rows it touched, atomically."""
+    from django.db import transaction
+
+    with transaction.atomic():
+        ids = list(queryset.select_for_update().values_list('id', flat=True))
+        if not ids:
+            return 0
+        count = queryset.model.objects.filter(id__in=ids).update(**fields)
+        record_outbox_changes(entity, ids)
+    return count
@@ -18,7 +18,7 @@ import mimetypes
 import json
 import os
 from datetime import date
-from .utils import log_action
+from .utils import log_action, parse_updated_since, update_with_outbox
 # from .services.area_context_service import get_area_context_service  # Temporarily commented - services folder missing
 
 class AdminLoginView(views.APIView):
@@ -187,6 +187,15 @@ class ScreenInventoryView(views.APIView):
             screens = ScreenSpec.objects.filter(status=status_filter)
         else:
             screens = ScreenSpec.objects.all()
+
+        # Incremental sync: only screens changed at/after the caller's high-water mark
+        try:
+            updated_since = parse_updated_since(request)
+        except ValueError as e:
+            return response.Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if updated_since:
+            screens = screens.filter(updated_at__gte=updated_since).order_by('updated_at')
+
         serializer = ScreenSpecSerializer(screens, many=True)
         return response.Response(serializer.data)
 
@@ -392,10 +401,14 @@ class ScreenSpecViewset(viewsets.ModelViewSet):
     permission_classes = [permissions.AllowAny]
 
     def perform_update(self, serializer):
-        instance = self.get_object()
-        # If the screen was already profiled, any update puts it into 'REPROFILE' state
-        if instance.profile_status in ['PROFILED', 'REPROFILE']:
-            serializer.save(profile_status='REPROFILE')
+        from .screen_profiler.reprofile import location_changes, schedule_reprofile
+
+        instance = serializer.instance
+        # Only location-relevant edits (coordinates, environment, height, address)
+        # put a profiled screen into 'REPROFILE'; it is then reprofiled in the background
+        if instance.profile_status in ['PROFILED', 'REPROFILE'] and location_changes(instance, serializer.validated_data):
+            screen = serializer.save(profile_status='REPROFILE')
+            schedule_reprofile(screen.pk)
         else:
             serializer.save()
 
@@ -486,7 +499,8 @@ class ExternalScreenSubmissionView(views.APIView):
         _today = _date.today()
         expired = screens.filter(status='SCHEDULED_BLOCK', scheduled_block_date__lte=_today)
         if expired.exists():
-            expired.update(status='BLOCKED', scheduled_block_date=None)
+            update_with_outbox(expired, 'screen', status='BLOCKED', scheduled_block_date=None,
+                               updated_at=timezone.now())
             # Re-fetch to get updated data
             screens = ScreenSpec.objects.all()
 
@@ -663,12 +677,13 @@ def _expire_stale_hold_bookings():
     """
     from datetime import timedelta
     expiry_cutoff = timezone.now() - timedelta(minutes=10)
-    SlotBooking.objects.filter(
+    stale = SlotBooking.objects.filter(
         status='HOLD',
         payment='UNPAID',
         source='XIGI',          # ← PARTNER bookings are NEVER auto-expired
         created_at__lte=expiry_cutoff
-    ).update(status='EXPIRED')
+    )
+    update_with_outbox(stale, 'booking', status='EXPIRED', updated_at=timezone.now())
 
 
 def _calculate_screen_availability(screen, start_date, end_date):
@@ -705,6 +720,7 @@ class ScreenDiscoveryView(views.APIView):
       - start_date: campaign start date (required)
       - end_date: campaign end date (required)
       - budget_range: max total budget in INR (required)
+      - profile_detail: "summary" (default) or "full" ai_profile
     
     Filters (applied in order):
       1. Only VERIFIED + AI-profiled screens
@@ -712,7 +728,9 @@ class ScreenDiscoveryView(views.APIView):
       3. Available slots > 0 (total_slots - reserved_slots - booked_slots > 0)
       4. Budget check: base_price_per_slot × number_of_days <= budget_range
     
-    Returns matching screens with all relevant details + ai_profile.
+    Returns matching screens with all relevant details + ai_profile
+    (compact summary; pass profile_detail="full" for the ring analysis, or
+    fetch it per screen from GET /api/console/screens/<pk>/profile/).
     """
     authentication_classes = []
     permission_classes = [permissions.AllowAny]
@@ -722,6 +740,8 @@ class ScreenDiscoveryView(views.APIView):
         start_date = request.data.get('start_date', '')
         end_date = request.data.get('end_date', '')
         budget_range = request.data.get('budget_range', '')
+        # "summary" (default): area / movement / dwell only; "full": ring analysis + reasoning too
+        full_profile = request.data.get('profile_detail', 'summary') == 'full'
 
         # ── Normalize location to a list of entries ──
         # Each entry is one location query (could be a city or a full address)
@@ -835,6 +855,11 @@ class ScreenDiscoveryView(views.APIView):
             profile_status__in=['PROFILED', 'REPROFILE'],
         ).distinct()  # Avoid duplicates from JOIN across ai_profile
 
+        # Profile rides along in the same query; ring/reasoning JSON only when asked for
+        screens = screens.select_related('ai_profile')
+        if not full_profile:
+            screens = screens.defer(*ScreenProfile.deferred_fields('ai_profile__'))
+
         # ── Check Availability + Budget for each screen ──
         all_screen_data = []  # (screen, estimated_cost, available_slots, is_available, reason, extra)
         for screen in screens:
@@ -886,7 +911,7 @@ class ScreenDiscoveryView(views.APIView):
             # Attach AI profile data
             try:
                 ai_profile = screen_obj.ai_profile
-                combined['ai_profile'] = ai_profile.to_response_dict()
+                combined['ai_profile'] = ai_profile.to_response_dict() if full_profile else ai_profile.to_summary_dict()
             except Exception:
                 combined['ai_profile'] = None
             result.append(combined)
@@ -1231,6 +1256,7 @@ class SlotBookingView(views.APIView):
       - screen: filter by screen ID
       - status: filter by status
       - source: filter by source
+      - updated_since: ISO datetime, only bookings changed at/after it
     """
     authentication_classes = []
     permission_classes = [permissions.AllowAny]
@@ -1239,12 +1265,13 @@ class SlotBookingView(views.APIView):
         # Auto-expire HOLD bookings older than 10 minutes (only XIGI, never PARTNER)
         from datetime import timedelta
         expiry_cutoff = timezone.now() - timedelta(minutes=10)
-        SlotBooking.objects.filter(
+        stale = SlotBooking.objects.filter(
             status='HOLD',
             payment='UNPAID',
             source='XIGI',
             created_at__lte=expiry_cutoff
-        ).update(status='EXPIRED')
+        )
+        update_with_outbox(stale, 'booking', status='EXPIRED', updated_at=timezone.now())
 
         bookings = SlotBooking.objects.all()
 
@@ -1273,6 +1300,13 @@ class SlotBookingView(views.APIView):
         if payment_filter:
             bookings = bookings.filter(payment__iexact=payment_filter)
 
+        try:
+            updated_since = parse_updated_since(request)
+        except ValueError as e:
+            return response.Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if updated_since:
+            bookings = bookings.filter(updated_at__gte=updated_since)
+
         serializer = SlotBookingSerializer(bookings, many=True)
         return response.Response({
             "total": bookings.count(),
@@ -0,0 +1,55 @@
+"""
+Management command: check_drift
+--------------------------------
+Compares console ScreenSpec with XIA ScreenMaster using id-range hash
+trees and reports the rows that drifted; --repair rewrites only those
+rows. Cheap enough to run before (or instead of) a full sync_screens.
+
+Usage:
+    python manage.py check_drift
+    python manage.py check_drift --repair
+    python manage.py check_drift --leaf-size 128 --json drift.json
+"""
+
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from xia.services.drift_check import DEFAULT_LEAF_SIZE, DriftChecker
+
+
+class Command(BaseCommand):
+    help = 'Detect (and optionally repair) drift between ScreenSpec and ScreenMaster'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repair', action='store_true', help='Rewrite the drifted rows')
+        parser.add_argument('--leaf-size', type=int, default=DEFAULT_LEAF_SIZE, help='Screen ids per leaf range')
+        parser.add_argument('--json', dest='json_path', help='Also write the report to this file')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        checker = DriftChecker(leaf_size=options['leaf_size'])
+        report = checker.check()
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            f"Compared {report['source_rows']} source / {report['master_rows']} master rows "
+            f"in {elapsed:.1f}s ({report['nodes_compared']} tree nodes)"
+        )
+        if report['in_sync']:
+            self.stdout.write(self.style.SUCCESS('✅ ScreenMaster is in sync'))
+        else:
+            self.stdout.write(self.style.WARNING(f"⚠️ {report['ranges']} id ranges drifted"))
+            for label in ('missing', 'extra', 'changed'):
+                ids = report[label]
+                preview = ', '.join(str(i) for i in ids[:20]) + (' …' if len(ids) > 20 else '')
+                self.stdout.write(f"   → {label}: {len(ids)}" + (f" [{preview}]" if ids else ''))
+
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as fh:
+                json.dump(dict(report, seconds=round(elapsed, 2)), fh, indent=2)
+
+        if options['repair'] and not report['in_sync']:
+            repaired = checker.repair(report)
+            self.stdout.write(self.style.SUCCESS(f'✅ Repaired {repaired} rows'))
@@ -0,0 +1,64 @@
+"""
+Management command: replicate_outbox
+-------------------------------------
+Worker that applies console change events (ReplicationOutbox) to XIA's
+ScreenMaster / SlotBooking in batches. Runs until stopped, polling every
+--interval seconds; several workers can run side by side.
+
+- --once: drain what is queued and exit (cron / tests)
+- --enqueue-all: queue every screen, profile and booking first
+  (in-process full resync, no HTTP)
+
+Usage:
+    python manage.py replicate_outbox
+    python manage.py replicate_outbox --once
+    python manage.py replicate_outbox --enqueue-all --once
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from xia.services.replicator import OutboxReplicator
+
+
+class Command(BaseCommand):
+    help = 'Apply console change events from the replication outbox to XIA tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain the outbox once and exit')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds between polls when idle')
+        parser.add_argument('--batch-size', type=int, help='Events per batch (default XIA_REPLICATION_BATCH_SIZE)')
+        parser.add_argument('--enqueue-all', action='store_true',
+                            help='Queue every screen, profile and booking before draining')
+
+    def handle(self, *args, **options):
+        replicator = OutboxReplicator(batch_size=options['batch_size'])
+
+        if options['enqueue_all']:
+            queued = replicator.enqueue_all()
+            self.stdout.write(f'Queued {queued} rows for replication')
+
+        while True:
+            try:
+                totals = replicator.drain()
+            except Exception as e:
+                # Failed batch rolled back - its events stay queued for the next poll
+                self.stderr.write(self.style.ERROR(f'Replication batch failed: {e}'))
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
+                continue
+            if totals['events']:
+                self.stdout.write(self.style.SUCCESS(
+                    f"✅ Replicated {totals['events']} events in {totals['batches']} batches"
+                ))
+                self.stdout.write(
+                    f"   → {totals['screens']} screens, {totals['profiles']} profiles, "
+                    f"{totals['bookings']} bookings, {totals['deleted']} deleted"
+                )
+            if options['once']:
+                if not totals['events']:
+                    self.stdout.write(self.style.SUCCESS('✅ Outbox empty'))
+                break
+            time.sleep(options['interval'])
@@ -1,10 +1,12 @@
 """
 Management Command: sync_bookings
 ----------------------------------
-Fetches all slot bookings from API #3 and upserts into xia_slot_booking.
+Fetches slot bookings from API #3 and upserts into xia_slot_booking.
+Only bookings changed since the last run unless --full.
 
 Usage:
     python manage.py sync_bookings
+    python manage.py sync_bookings --full
 """
 
 from django.core.management.base import BaseCommand
@@ -15,10 +17,20 @@ from xia.services.sync_service import ScreenSyncService
 class Command(BaseCommand):
     help = 'Sync slot bookings from the console API into xia_slot_booking'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Refetch every booking instead of only those changed since the last run',
+        )
+
     def handle(self, *args, **options):
         self.stdout.write('Starting bookings sync...')
         svc = ScreenSyncService()
-        created, updated, errors = svc.sync_bookings()
+        try:
+            created, updated, errors = svc.sync_bookings(full=options['full'])
+        except Exception as e:
+            self.stderr.write(self.style.ERROR(f'Bookings sync failed: {e}'))
+            return
         self.stdout.write(
             self.style.SUCCESS(
                 f'Sync complete — {created} created, {updated} updated, {errors} errors'
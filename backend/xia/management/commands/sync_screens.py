@@ -1,41 +1,65 @@
 """
 Management command: sync_screens
 ---------------------------------
-Fetches all screens + profiles + bookings from the console API
+Fetches screens + profiles + bookings from the console API
 and syncs everything into XIA tables in one shot.
 
+The Call #1 filter menu is rebuilt (pre-warmed) after the screen sync.
+
+Incremental by default (only rows changed since the last run's
+watermark); --full refetches everything and removes screens deleted
+upstream (schedule nightly).
+
 Usage:
     python manage.py sync_screens
+    python manage.py sync_screens --full
 """
 
 from django.core.management.base import BaseCommand
 
+from xia.services.filter_menu import build_filter_menu
 from xia.services.sync_service import ScreenSyncService
 
 
 class Command(BaseCommand):
     help = 'Sync screens + profiles + bookings from console API into XIA tables'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Full reconciliation instead of an incremental (watermark) sync',
+        )
+
     def handle(self, *args, **options):
         service = ScreenSyncService()
+        full = options['full']
 
         # ── API #1 + #2: Screens + Profiles ──────────────────────────
         self.stdout.write('Starting screen sync...')
         try:
-            created, updated, errors = service.sync()
+            created, updated, errors = service.sync(full=full)
             self.stdout.write(
                 self.style.SUCCESS(
-                    f'Screens — {created} created, {updated} updated, {errors} errors'
+                    f'Screens ({service.last_run["mode"]}) — {created} created, '
+                    f'{updated} updated, {errors} errors'
                 )
             )
+            self.stdout.write(
+                f'   → {service.last_run["profile_only_updates"]} profile-only updates, '
+                f'{service.last_run["deleted"]} deleted, '
+                f'{service.last_run["requests"]} API requests'
+            )
         except Exception as e:
             self.stderr.write(self.style.ERROR(f'Screen sync failed: {e}'))
             return
 
+        # Pre-warm the Call #1 filter menu for the new screen data version
+        build_filter_menu()
+
         # ── API #3: Slot Bookings ─────────────────────────────────────
         self.stdout.write('Starting bookings sync...')
         try:
-            bc, bu, be = service.sync_bookings()
+            bc, bu, be = service.sync_bookings(full=full)
             self.stdout.write(
                 self.style.SUCCESS(
                     f'Bookings — {bc} created, {bu} updated, {be} errors'
@@ -0,0 +1,73 @@
+# Generated by Django 6.0.1 on 2026-10-19 18:40
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.utils.dateparse import parse_datetime
+
+
+def copy_messages(apps, schema_editor):
+    """Move each session's `messages` JSON array into ChatMessage rows."""
+    db = schema_editor.connection.alias
+    ChatSession = apps.get_model('xia', 'ChatSession')
+    ChatMessage = apps.get_model('xia', 'ChatMessage')
+
+    for session in ChatSession.objects.using(db).exclude(messages=[]).iterator(chunk_size=200):
+        rows = []
+        for message in session.messages or []:
+            timestamp = message.get('timestamp')
+            timestamp = (parse_datetime(timestamp) if isinstance(timestamp, str) else None) or session.updated_at
+            rows.append(ChatMessage(
+                session_id=session.session_id,
+                role=message.get('role', ''),
+                content=message.get('content', ''),
+                timestamp=timestamp,
+                metadata={k: v for k, v in message.items() if k not in ('role', 'content', 'timestamp')},
+            ))
+        ChatMessage.objects.using(db).bulk_create(rows, batch_size=1000)
+
+
+def restore_messages(apps, schema_editor):
+    db = schema_editor.connection.alias
+    ChatSession = apps.get_model('xia', 'ChatSession')
+    ChatMessage = apps.get_model('xia', 'ChatMessage')
+
+    for session in ChatSession.objects.using(db).iterator(chunk_size=200):
+        session.messages = [
+            {**(m.metadata or {}), 'role': m.role, 'content': m.content, 'timestamp': m.timestamp.isoformat()}
+            for m in ChatMessage.objects.using(db).filter(session_id=session.session_id).order_by('timestamp', 'id')
+        ]
+        session.save(update_fields=['messages'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('xia', '0015_dataversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(help_text='user or assistant', max_length=20)),
+                ('content', models.TextField(blank=True, default='')),
+                ('timestamp', models.DateTimeField(default=django.utils.timezone.now)),
+                ('metadata', models.JSONField(blank=True, default=dict)),
+                ('session', models.ForeignKey(db_column='session_id', on_delete=django.db.models.deletion.CASCADE, related_name='chat_messages', to='xia.chatsession', to_field='session_id')),
+            ],
+            options={
+                'verbose_name': 'Chat Message',
+                'verbose_name_plural': 'Chat Messages',
+                'db_table': 'xia_chat_message',
+                'ordering': ['timestamp', 'id'],
+                'indexes': [models.Index(fields=['session', 'timestamp'], name='xia_chat_msg_session_ts')],
+            },
+        ),
+        migrations.RunPython(copy_messages, restore_messages),
+        migrations.RemoveField(
+            model_name='chatsession',
+            name='messages',
+        ),
+    ]
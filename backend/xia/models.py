@@ -5,6 +5,8 @@ Single source of truth tables for the Xigi Platform.
 """
 
 from django.db import models
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
 
 class ScreenMaster(models.Model):
@@ -248,9 +250,13 @@ class ChatSession(models.Model):
     """
     XIA chat session — one row per session.
     session_id is generated by XIA on the first message.
-    All messages stored as a JSON array in the `messages` field.
+    Holds conversation state only; messages live in ChatMessage
+    (append-only), so saving a session never rewrites the history.
     """
 
+    # Messages of history passed to the LLM prompts
+    HISTORY_LIMIT = 20
+
     session_id = models.UUIDField(
         unique=True, editable=False,
         help_text='Auto-generated by XIA on first message',
@@ -356,13 +362,6 @@ class ChatSession(models.Model):
         help_text='Full debug meta from the most recent turn (call1/2/3 meta, discover, screens, etc.)',
     )
 
-    # All messages in this session — single JSON array
-    # Format: [{"role": "user"|"assistant", "content": "...", "timestamp": "...", "screens_returned": [...], "filters_applied": {...}}]
-    messages = models.JSONField(
-        default=list, blank=True,
-        help_text='Conversation history as JSON array',
-    )
-
     # ── Live Mode fields ─────────────────────────────────────────
     mode = models.CharField(
         max_length=10, default='normal',
@@ -384,3 +383,129 @@ class ChatSession(models.Model):
 
     def __str__(self):
         return f'[{self.session_id}] user={self.user_id} campaign={self.campaign_id}'
+
+    # ── Messages (ChatMessage rows) ──────────────────────────────
+
+    def add_messages(self, *messages):
+        """
+        Append messages in one INSERT. Each message is a dict in the
+        {"role", "content", "timestamp", ...extra} shape; extra keys go to metadata.
+        """
+        ChatMessage.objects.bulk_create([ChatMessage.from_dict(self, m) for m in messages])
+
+    def recent_messages(self, limit=HISTORY_LIMIT) -> list:
+        """The last `limit` messages (oldest first) as dicts."""
+        latest = self.chat_messages.order_by('-timestamp', '-id')[:limit]
+        return [m.to_dict() for m in reversed(list(latest))]
+
+    def history(self) -> list:
+        """Full conversation as [{role, content}] (session restore / UI)."""
+        return [
+            {'role': role, 'content': content}
+            for role, content in self.chat_messages.order_by('timestamp', 'id').values_list('role', 'content')
+        ]
+
+    def message_count(self) -> int:
+        return self.chat_messages.count()
+
+    def user_messages_since(self, since) -> int:
+        """Rate limiting: user messages sent at or after `since`."""
+        return self.chat_messages.filter(role='user', timestamp__gte=since).count()
+
+
+class ChatMessage(models.Model):
+    """
+    One message of a XIA chat session. Rows are only ever inserted.
+    Per-message extras (screens_returned, intent, filters_snapshot, ...)
+    are kept in `metadata`.
+    """
+
+    session = models.ForeignKey(
+        ChatSession,
+        to_field='session_id',
+        db_column='session_id',
+        on_delete=models.CASCADE,
+        related_name='chat_messages',
+    )
+    role = models.CharField(max_length=20, help_text='user or assistant')
+    content = models.TextField(blank=True, default='')
+    timestamp = models.DateTimeField(default=timezone.now)
+    metadata = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        db_table = 'xia_chat_message'
+        ordering = ['timestamp', 'id']
+        indexes = [
+            models.Index(fields=['session', 'timestamp'], name='xia_chat_msg_session_ts'),
+        ]
+        verbose_name = 'Chat Message'
+        verbose_name_plural = 'Chat Messages'
+
+    def __str__(self):
+        return f'[{self.session_id}] {self.role}: {self.content[:50]}'
+
+    @classmethod
+    def from_dict(cls, session, message: dict) -> 'ChatMessage':
+        extra = {k: v for k, v in message.items() if k not in ('role', 'content', 'timestamp')}
+        timestamp = message.get('timestamp') or timezone.now()
+        if isinstance(timestamp, str):
+            timestamp = parse_datetime(timestamp) or timezone.now()
+        return cls(
+            session=session,
+            role=message.get('role', ''),
+            content=message.get('content', ''),
+            timestamp=timestamp,
+            metadata=extra,
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            **(self.metadata or {}),
+            'role': self.role,
+            'content': self.content,
+            'timestamp': self.timestamp.isoformat(),
+        }
+
+
+class SyncWatermark(models.Model):
+    """
+    High-water mark per synced entity (screens, profiles, bookings).
+    Incremental sync asks the console for rows with updated_at >= high_water.
+    """
+
+    entity = models.CharField(max_length=50, unique=True)
+    high_water = models.DateTimeField(
+        null=True, blank=True,
+        help_text='Largest source updated_at seen so far (None = never synced)',
+    )
+    last_full_sync_at = models.DateTimeField(null=True, blank=True)
+    last_run_at = models.DateTimeField(null=True, blank=True)
+    last_run_rows = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'xia_sync_watermark'
+        verbose_name = 'Sync Watermark'
+        verbose_name_plural = 'Sync Watermarks'
+
+    def __str__(self):
+        return f'{self.entity} @ {self.high_water}'
+
+
+class DataVersion(models.Model):
+    """
+    Monotonic version counter per cached data set (e.g. 'discover').
+    Bumped whenever the underlying rows change; cache keys embed it, so a
+    bump invalidates every cached result at once.
+    """
+
+    name = models.CharField(max_length=50, unique=True)
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'xia_data_version'
+        verbose_name = 'Data Version'
+        verbose_name_plural = 'Data Versions'
+
+    def __str__(self):
+        return f'{self.name} v{self.version}'
@@ -6,16 +6,30 @@ using XIA's local tables (xia_screen_master + xia_slot_booking).
 
 Accepts: start_date, end_date, location (list), budget_range
 Returns: all matching screens with availability + budget flags.
+
+Runs a constant number of queries per call (hold expiry + one screen
+query): booked slots and the next freeing booking come from correlated
+subqueries over xia_slot_booking.
+
+Results are cached per (locations, dates, budget, filters, excludes,
+text search) under the current 'discover' DataVersion. Screen / booking
+writes (sync, outbox replication, signal sync, hold expiry) bump the
+version, so a cached result is never served after the data changed.
 """
 
+import hashlib
+import json
 import re
 import logging
 from datetime import datetime, timedelta
 
-from django.db.models import Q, Sum
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
-from xia.models import ScreenMaster, SlotBooking
+from xia.models import DataVersion, ScreenMaster, SlotBooking
 
 logger = logging.getLogger('xia.discover')
 
@@ -49,6 +63,19 @@ def _extract_tokens(location_str: str) -> list:
     return tokens
 
 
+DISCOVER_VERSION = 'discover'
+
+
+def get_data_version(name: str = DISCOVER_VERSION) -> int:
+    return DataVersion.objects.filter(name=name).values_list('version', flat=True).first() or 0
+
+
+def bump_data_version(name: str = DISCOVER_VERSION) -> None:
+    """Invalidate every cached result built on this data set."""
+    if not DataVersion.objects.filter(name=name).update(version=F('version') + 1):
+        DataVersion.objects.get_or_create(name=name, defaults={'version': 1})
+
+
 def _expire_stale_holds():
     """Auto-expire HOLD bookings with UNPAID payment older than 10 minutes."""
     cutoff = timezone.now() - timedelta(minutes=10)
@@ -60,6 +87,7 @@ def _expire_stale_holds():
     count = stale.update(status='EXPIRED')
     if count:
         logger.info(f'Auto-expired {count} stale HOLD bookings')
+        bump_data_version()
 
 
 def _build_location_q(locations: list) -> Q:
@@ -87,19 +115,29 @@ def _build_location_q(locations: list) -> Q:
     return location_q
 
 
-def _calculate_availability(screen, start_date, end_date):
+def _annotate_availability(screens, start_date, end_date):
     """
-    Calculate available slots for a screen in a date range.
-    Returns (available_slots, overlapping_bookings_qs).
+    Annotate each screen with its bookings overlapping the date range:
+      - booked_slots: total booked slots (0 when none)
+      - next_free_date / next_free_slots: the overlapping booking that
+        ends first (what frees up soonest)
     """
-    overlapping = screen.bookings.filter(
+    overlapping = SlotBooking.objects.filter(
+        screen_id=OuterRef('screenid'),
         status__in=['ACTIVE', 'HOLD'],
         start_date__lte=end_date,
         end_date__gte=start_date,
     )
-    booked = overlapping.aggregate(total=Sum('booked_num_slots'))['total'] or 0
-    available = screen.total_slots_per_loop - screen.reserved_slots - booked
-    return available, overlapping
+    booked = (
+        overlapping.order_by().values('screen_id')
+        .annotate(total=Sum('booked_num_slots')).values('total')
+    )
+    earliest = overlapping.order_by('end_date', 'pk')
+    return screens.annotate(
+        booked_slots=Coalesce(Subquery(booked, output_field=IntegerField()), Value(0)),
+        next_free_date=Subquery(earliest.values('end_date')[:1]),
+        next_free_slots=Subquery(earliest.values('booked_num_slots')[:1]),
+    )
 
 
 def _build_ai_profile(screen) -> dict:
@@ -192,6 +230,11 @@ def _screen_to_response(screen) -> dict:
     }
 
 
+def _discover_cache_key(version: int, *params) -> str:
+    raw = json.dumps(params, sort_keys=True, default=str)
+    return f'xia:discover:v{version}:{hashlib.sha256(raw.encode("utf-8")).hexdigest()}'
+
+
 def discover_screens(
     locations: list,
     start_date_str: str,
@@ -200,6 +243,42 @@ def discover_screens(
     xia_filters: dict = None,
     exclude_filters: dict = None,
     text_search: str = '',
+) -> dict:
+    """
+    discover_screens with a versioned result cache - see _discover_screens
+    for the arguments and result. Repeat chat turns with unchanged
+    gateway / filters cost the hold expiry, a version read and a cache hit.
+    """
+    # Expiring holds frees slots - bumps the version before it is read
+    _expire_stale_holds()
+
+    version = get_data_version()
+    key = _discover_cache_key(
+        version, locations, start_date_str, end_date_str, budget_range,
+        xia_filters or {}, exclude_filters or {}, (text_search or '').strip(),
+    )
+    cache = caches[getattr(settings, 'XIA_DISCOVER_CACHE_ALIAS', 'default')]
+    result = cache.get(key)
+    if result is not None:
+        logger.info(f'Discover cache hit (v{version}) for locations={locations}')
+        return result
+
+    result = _discover_screens(
+        locations, start_date_str, end_date_str, budget_range,
+        xia_filters=xia_filters, exclude_filters=exclude_filters, text_search=text_search,
+    )
+    cache.set(key, result, getattr(settings, 'XIA_DISCOVER_CACHE_TTL', 900))
+    return result
+
+
+def _discover_screens(
+    locations: list,
+    start_date_str: str,
+    end_date_str: str,
+    budget_range: str,
+    xia_filters: dict = None,
+    exclude_filters: dict = None,
+    text_search: str = '',
 ) -> dict:
     """
     Main discover function.
@@ -238,18 +317,16 @@ def discover_screens(
     budget = float(budget_range)
     daily_budget = budget / num_days
 
-    # Expire stale HOLDs
-    _expire_stale_holds()
-
     # Build location filter
     location_q = _build_location_q(locations)
 
     # Query screens: location + VERIFIED + profiled
+    # (every filter is on ScreenMaster's own columns - no joins, so no .distinct())
     screens = ScreenMaster.objects.filter(
         location_q,
         status__in=['VERIFIED', 'SCHEDULED_BLOCK'],
         profile_status__in=['PROFILED', 'REPROFILE'],
-    ).distinct()
+    )
 
     # ── Apply XIA enum/numeric filters ──────────────────────────
     # These are the fields known to the filter menu
@@ -330,13 +407,16 @@ def discover_screens(
         )
         screens = screens.filter(text_q)
 
+    # One query: screens + booked slots + next freeing booking, reused below
+    screens = list(_annotate_availability(screens, start, end))
+
     # Check availability + budget for each screen
     result = []
     available_count = 0
     unavailable_count = 0
 
     for screen in screens:
-        available_slots, overlapping_bookings = _calculate_availability(screen, start, end)
+        available_slots = screen.total_slots_per_loop - screen.reserved_slots - screen.booked_slots
         base_price = float(screen.base_price_per_slot_inr or 0)
         estimated_cost = base_price * num_days
 
@@ -350,9 +430,8 @@ def discover_screens(
 
         if available_slots <= 0:
             # No slots available
-            earliest = overlapping_bookings.order_by('end_date').first()
-            next_available = str(earliest.end_date) if earliest else None
-            slots_freeing = earliest.booked_num_slots if earliest else 0
+            next_available = str(screen.next_free_date) if screen.next_free_date else None
+            slots_freeing = screen.next_free_slots or 0
 
             screen_data['available_slots'] = 0
             screen_data['is_available'] = False
@@ -406,22 +485,25 @@ def discover_screens(
         logger.info(f'Unavailability breakdown: {reason_counts}')
 
     # ── Determine which requested locations had no matching screens ──
+    # (matched against the screens already in memory - no second query)
+    screen_texts = [
+        (
+            f"{screen.spec_city} {screen.spec_full_address} "
+            f"{screen.spec_nearest_landmark} "
+            f"{screen.profiled_full_address} {screen.profiled_city}"
+        ).lower()
+        for screen in screens
+    ]
     not_available = []
     for loc_entry in locations:
         tokens = _extract_tokens(loc_entry)
         if not tokens:
             tokens = [loc_entry]  # fallback to raw string
         # Check if any screen matches any token from this location
-        loc_matched = False
-        for screen in screens:
-            screen_text = (
-                f"{screen.spec_city} {screen.spec_full_address} "
-                f"{screen.spec_nearest_landmark} "
-                f"{screen.profiled_full_address} {screen.profiled_city}"
-            ).lower()
-            if any(token.lower() in screen_text for token in tokens):
-                loc_matched = True
-                break
+        tokens = [token.lower() for token in tokens]
+        loc_matched = any(
+            token in screen_text for screen_text in screen_texts for token in tokens
+        )
         if not loc_matched:
             not_available.append(loc_entry)
 
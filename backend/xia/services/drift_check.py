@@ -0,0 +1,261 @@
+"""
+ScreenSpec ↔ ScreenMaster Drift Check
+--------------------------------------
+Finds XIA rows that drifted from the console (missed signals, failed
+syncs) without a full sync:
+
+1. Each database hashes its own rows: one GROUP BY over id ranges (leaves
+   of leaf_size ids) returns a hash per leaf, computed over a canonical
+   SQL text form of the mapped columns so type differences between the
+   two schemas do not count as drift. Only leaf hashes cross the wire.
+2. Both sides build a hash tree over their leaves (FANOUT children per
+   node) and walk it from the root, descending only into nodes whose
+   hashes differ, down to the mismatching leaves.
+3. Row hashes are fetched only for ids inside those leaves and diffed:
+   missing in XIA, extra in XIA, changed.
+
+Leaf hashes are order-independent (sum of per-row md5 prefixes plus the
+row count), so no ORDER BY is needed inside the aggregate. The canonical
+expressions use PostgreSQL casts (TRIM_SCALE needs PostgreSQL 13+).
+
+repair() rewrites just those rows (signals.flush_screens). Profile columns
+are not compared - they are owned by the profile sync.
+
+Run with: python manage.py check_drift [--repair]
+"""
+
+import hashlib
+import logging
+
+from django.apps import apps
+from django.conf import settings
+from django.db.models import BigIntegerField, Count, F, Func, Q, Sum, TextField, Value
+from django.db.models.functions import MD5, Cast, Coalesce, Concat, Round
+
+from xia.signals import EXCLUDED_FIELDS, RENAME_MAP, SCREEN_MASTER_FIELDS, flush_screens
+
+logger = logging.getLogger('xia.drift')
+
+DEFAULT_LEAF_SIZE = 256
+FANOUT = 16
+# Leaves per row-hash query when drilling into drifted ranges
+DRILL_BATCH = 64
+
+NUMERIC_TYPES = {
+    'DecimalField', 'FloatField', 'IntegerField', 'BigIntegerField', 'SmallIntegerField',
+    'PositiveIntegerField', 'PositiveSmallIntegerField', 'PositiveBigIntegerField',
+}
+BOOLEAN_TYPES = {'BooleanField', 'NullBooleanField'}
+DATETIME_TYPES = {'DateTimeField'}
+JSON_TYPES = {'JSONField'}
+
+
+def _digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+class _Numeric(Func):
+    template = '(%(expressions)s)::numeric'
+
+
+class _TrimScale(Func):
+    function = 'TRIM_SCALE'
+
+
+class _Epoch(Func):
+    template = 'EXTRACT(EPOCH FROM %(expressions)s)'
+
+
+class _Jsonb(Func):
+    template = '(%(expressions)s)::jsonb'
+
+
+class _HashPrefix(Func):
+    """First 60 bits of an md5 hex digest as a bigint."""
+    template = "('x' || SUBSTR(%(expressions)s, 1, 15))::bit(60)::bigint"
+    output_field = BigIntegerField()
+
+
+def _kind(field) -> str:
+    internal = field.get_internal_type()
+    for kind, types in (
+        ('numeric', NUMERIC_TYPES), ('boolean', BOOLEAN_TYPES),
+        ('datetime', DATETIME_TYPES), ('json', JSON_TYPES),
+    ):
+        if internal in types:
+            return kind
+    return 'text'
+
+
+def _canonical(column: str, kind: str, decimal_places=None):
+    """Schema-independent SQL text form of one column (NULL -> '')."""
+    expr = F(column)
+    if kind == 'numeric':
+        expr = _Numeric(expr)
+        if decimal_places is not None:
+            expr = Round(expr, decimal_places)
+        expr = _TrimScale(expr)
+    elif kind == 'boolean':
+        expr = Cast(expr, BigIntegerField())
+    elif kind == 'datetime':
+        expr = _TrimScale(_Numeric(_Epoch(expr)))
+    elif kind == 'json':
+        expr = _Jsonb(expr)
+    return Coalesce(Cast(expr, TextField()), Value(''), output_field=TextField())
+
+
+class HashTree:
+    """Hash tree over {leaf index: leaf digest} (leaf = id range)."""
+
+    def __init__(self, leaf_digests: dict):
+        # levels[0] = leaves; each level up groups FANOUT nodes of the one below,
+        # until a single root at index 0 remains
+        self.levels = [dict(leaf_digests)]
+        while len(self.levels[-1]) > 1 or 0 < next(iter(self.levels[-1]), 0):
+            parents = {}
+            for index in sorted(self.levels[-1]):
+                parents.setdefault(index // FANOUT, []).append(index.to_bytes(8, 'big', signed=True) + self.levels[-1][index])
+            self.levels.append({index: _digest(b''.join(parts)) for index, parts in parents.items()})
+
+    @property
+    def root(self) -> bytes:
+        return next(iter(self.levels[-1].values()), b'')
+
+    def node(self, level: int, index: int):
+        if level >= len(self.levels):
+            return self.root if index == 0 else None
+        return self.levels[level].get(index)
+
+
+def diff_trees(source: HashTree, target: HashTree):
+    """
+    Leaves whose hashes differ, found top-down.
+    Returns (mismatching leaf indices, nodes compared).
+    """
+    top = max(len(source.levels), len(target.levels)) - 1
+    frontier = [0]
+    compared = 0
+    for level in range(top, -1, -1):
+        differing = []
+        for index in frontier:
+            compared += 1
+            if source.node(level, index) != target.node(level, index):
+                differing.append(index)
+        if level == 0:
+            return differing, compared
+        frontier = [
+            child
+            for index in differing
+            for child in range(index * FANOUT, (index + 1) * FANOUT)
+            if source.node(level - 1, child) is not None or target.node(level - 1, child) is not None
+        ]
+    return [], compared
+
+
+class DriftChecker:
+    """Compares the console source screen table with ScreenMaster."""
+
+    def __init__(self, leaf_size: int = DEFAULT_LEAF_SIZE):
+        from xia.models import ScreenMaster
+
+        self.leaf_size = leaf_size
+        self.source_model = apps.get_model(settings.XIA_SCREEN_SOURCE_MODEL)
+        self.master_model = ScreenMaster
+
+        # (source column, ScreenMaster column) pairs, as _map_source_to_master maps them
+        self.pairs = []
+        for field in self.source_model._meta.fields:
+            if field.name in EXCLUDED_FIELDS or field.primary_key:
+                continue
+            target = RENAME_MAP.get(field.name, field.name)
+            if target in SCREEN_MASTER_FIELDS and target != 'screenid':
+                self.pairs.append((field, ScreenMaster._meta.get_field(target)))
+
+    def _row_expression(self, side: int):
+        """Canonical row text for side 0 (source) or 1 (ScreenMaster)."""
+        parts = []
+        for source, target in self.pairs:
+            kind = _kind(source) if _kind(source) == _kind(target) else 'text'
+            # Compare decimals at ScreenMaster's precision (what a sync can store)
+            places = getattr(target, 'decimal_places', None) if kind == 'numeric' else None
+            if parts:
+                parts.append(Value('\x1f'))
+            parts.append(_canonical((source, target)[side].attname, kind, places))
+        if not parts:
+            return Value('')
+        return Concat(*parts, output_field=TextField()) if len(parts) > 1 else parts[0]
+
+    def _sides(self):
+        return (
+            (self.source_model.objects.all(), self.source_model._meta.pk.name, self._row_expression(0)),
+            (self.master_model.objects.all(), 'screenid', self._row_expression(1)),
+        )
+
+    def _leaf_digests(self, queryset, key: str, row) -> tuple:
+        """({leaf: digest}, row count) - hashed and grouped in the database."""
+        leaves = (
+            queryset.annotate(leaf=F(key) / self.leaf_size, row_hash=_HashPrefix(MD5(row)))
+            .order_by()
+            .values('leaf')
+            .annotate(total=Sum('row_hash'), rows=Count('*'))
+            .values_list('leaf', 'total', 'rows')
+        )
+        digests, rows = {}, 0
+        for leaf, total, count in leaves:
+            digests[leaf] = _digest(f'{count}:{total}'.encode())
+            rows += count
+        return digests, rows
+
+    def _row_hashes(self, queryset, key: str, row, leaves) -> dict:
+        """{id: md5} for the rows inside the given leaves only."""
+        hashes = {}
+        leaves = sorted(leaves)
+        for i in range(0, len(leaves), DRILL_BATCH):
+            ranges = Q()
+            for leaf in leaves[i:i + DRILL_BATCH]:
+                start = leaf * self.leaf_size
+                ranges |= Q(**{f'{key}__gte': start, f'{key}__lt': start + self.leaf_size})
+            hashes.update(
+                queryset.filter(ranges).annotate(row_hash=MD5(row)).values_list(key, 'row_hash')
+            )
+        return hashes
+
+    def check(self) -> dict:
+        """Returns {"missing", "extra", "changed", "ranges", "nodes_compared", ...}."""
+        (src_qs, src_key, src_row), (dst_qs, dst_key, dst_row) = self._sides()
+        src_leaves, source_rows = self._leaf_digests(src_qs, src_key, src_row)
+        dst_leaves, master_rows = self._leaf_digests(dst_qs, dst_key, dst_row)
+        source, target = HashTree(src_leaves), HashTree(dst_leaves)
+
+        leaves, compared = diff_trees(source, target)
+        missing, extra, changed = [], [], []
+        if leaves:
+            src_rows = self._row_hashes(src_qs, src_key, src_row, leaves)
+            dst_rows = self._row_hashes(dst_qs, dst_key, dst_row, leaves)
+            missing = [i for i in src_rows if i not in dst_rows]
+            extra = [i for i in dst_rows if i not in src_rows]
+            changed = [i for i in src_rows if i in dst_rows and src_rows[i] != dst_rows[i]]
+
+        report = {
+            'source_rows': source_rows,
+            'master_rows': master_rows,
+            'in_sync': source.root == target.root,
+            'ranges': len(leaves),
+            'nodes_compared': compared,
+            'missing': sorted(missing),
+            'extra': sorted(extra),
+            'changed': sorted(changed),
+        }
+        logger.info(
+            f'Drift check: {report["source_rows"]} source / {report["master_rows"]} master rows, '
+            f'{len(leaves)} drifted ranges, {len(missing)} missing, {len(extra)} extra, {len(changed)} changed'
+        )
+        return report
+
+    def repair(self, report: dict) -> int:
+        """Rewrite only the drifted rows. Returns the number of rows touched."""
+        saved = set(report['missing']) | set(report['changed'])
+        deleted = set(report['extra'])
+        if saved or deleted:
+            flush_screens(saved, deleted)
+        return len(saved) + len(deleted)
@@ -4,13 +4,23 @@ Filter Menu Generator
 Builds the dynamic filter menu string for Call #1's prompt.
 Queries ScreenMaster for actual distinct values — no hardcoding.
 
+The enum values are read in one pass (one DISTINCT query over the enum
+columns) and the finished menu is cached under the 'filter_menu'
+DataVersion, which every ScreenMaster write path bumps. A chat turn
+costs one version read; sync_screens pre-warms the new version.
+
 Usage:
     from xia.services.filter_menu import build_filter_menu
     menu_str = build_filter_menu()
 """
 
 import logging
+
+from django.conf import settings
+from django.core.cache import caches
+
 from xia.models import ScreenMaster
+from xia.services.discover_service import get_data_version
 
 logger = logging.getLogger('xia.filter_menu')
 
@@ -77,52 +87,57 @@ GATEWAY_FIELDS = [
 ]
 
 
-def _get_distinct_values(field_name: str) -> list:
+FILTER_MENU_VERSION = 'filter_menu'
+
+
+def _get_distinct_values() -> dict:
     """
-    Query ScreenMaster for distinct non-empty values of a field.
-    Returns sorted list of unique values.
+    Distinct non-empty values of every enum field, in one query.
+    Returns {field_name: sorted list of unique values}, or None if the
+    query failed.
     """
+    fields = [field_name for field_name, _ in ENUM_FIELDS]
+    values = {field_name: set() for field_name in fields}
     try:
-        qs = ScreenMaster.objects.exclude(**{field_name: None})
-
-        # BooleanFields can't be excluded with empty string
-        field_obj = ScreenMaster._meta.get_field(field_name)
-        is_bool = field_obj.get_internal_type() == 'BooleanField'
-
-        if not is_bool:
-            qs = qs.exclude(**{field_name: ''})
-
-        values = (
-            qs.values_list(field_name, flat=True)
-            .distinct()
-            .order_by(field_name)
-        )
-
-        # Convert to strings and filter empties
-        result = sorted(set(
-            str(v).strip() for v in values
-            if v is not None and str(v).strip()
-        ))
-        return result
+        # Distinct value combinations; order_by() drops the default screenid ordering
+        rows = ScreenMaster.objects.values_list(*fields).distinct().order_by()
+        for row in rows:
+            for field_name, value in zip(fields, row):
+                if value is not None and str(value).strip():
+                    values[field_name].add(str(value).strip())
     except Exception as e:
-        logger.warning(f'Could not query distinct values for {field_name}: {e}')
-        return []
+        logger.warning(f'Could not query distinct filter values: {e}')
+        return None
+    return {field_name: sorted(found) for field_name, found in values.items()}
 
 
 def build_filter_menu() -> str:
     """
     Build the complete filter menu string for Call #1's prompt.
-    Queries ScreenMaster for actual enum values — stays in sync with DB.
+    Queries ScreenMaster for actual enum values — stays in sync with DB
+    (cached per data version).
 
     Returns:
         Multi-line string ready to inject into the system prompt.
     """
+    cache = caches[getattr(settings, 'XIA_FILTER_MENU_CACHE_ALIAS', 'default')]
+    key = f'xia:filter_menu:v{get_data_version(FILTER_MENU_VERSION)}'
+    menu = cache.get(key)
+    if menu is None:
+        enum_values = _get_distinct_values()
+        menu = _render_filter_menu(enum_values or {})
+        if enum_values is not None:
+            cache.set(key, menu, None)
+    return menu
+
+
+def _render_filter_menu(enum_values: dict) -> str:
     lines = []
 
     # ── Enum filters ──
     lines.append('ENUM FILTERS (use exact values):')
     for field_name, display_name in ENUM_FIELDS:
-        values = _get_distinct_values(field_name)
+        values = enum_values.get(field_name)
         if values:
             values_str = ', '.join(values)
             lines.append(f'  {display_name}: {values_str}')
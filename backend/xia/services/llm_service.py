@@ -10,7 +10,10 @@ import json
 import time
 import logging
 
-from groq import Groq
+from Main.lazy_imports import lazy_import
+
+# Imported on first LLMService() - keeps groq out of worker boot / manage.py
+groq = lazy_import('groq')
 
 logger = logging.getLogger('xia.llm')
 
@@ -39,7 +42,7 @@ class LLMService:
         if not api_key:
             raise ValueError('GROQ_API_KEY not set in environment.')
 
-        self.client = Groq(api_key=api_key)
+        self.client = groq.Groq(api_key=api_key)
         self.model = model or self.DEFAULT_MODEL
 
     # ─── Call #1: Understanding + Extraction ─────────────────────
@@ -0,0 +1,186 @@
+"""
+Outbox Replicator
+------------------
+Applies console change events (console.ReplicationOutbox) to XIA's
+ScreenMaster / SlotBooking in batches, reading the current console rows
+in-process - no HTTP hop, no writes to xia_db on the request path.
+
+Each batch runs in one 'default' transaction: the events are locked
+(SKIP LOCKED, so several workers can drain together), collapsed to the
+last op per row, applied to xia_db with bulk upserts, then deleted. If
+applying fails the transaction rolls back and the events are retried;
+applying is idempotent because it always copies current state.
+
+Run with: python manage.py replicate_outbox
+"""
+
+import logging
+
+from django.conf import settings
+from django.db import transaction
+
+from xia.services.discover_service import bump_data_version
+from xia.services.filter_menu import FILTER_MENU_VERSION
+from xia.services.sync_service import ScreenSyncService
+from xia.signals import _map_source_to_master
+
+logger = logging.getLogger('xia.replicator')
+
+DEFAULT_BATCH_SIZE = 500
+
+
+class ReplicationError(Exception):
+    """A batch could not be applied to xia_db; its events stay queued."""
+
+
+def collapse_events(events) -> dict:
+    """{entity: {object_id: op}} keeping the last op per row (events in id order)."""
+    ops = {'screen': {}, 'profile': {}, 'booking': {}}
+    for event in events:
+        ops[event.entity][event.object_id] = event.op
+    return ops
+
+
+class OutboxReplicator:
+    """Drains console.ReplicationOutbox into XIA tables."""
+
+    def __init__(self, batch_size=None):
+        self.batch_size = batch_size or getattr(settings, 'XIA_REPLICATION_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+        self.sync = ScreenSyncService()
+        self.sync.batch_size = self.batch_size
+
+    # ── Queue ────────────────────────────────────────────────────────
+
+    def enqueue_all(self) -> int:
+        """Queue every screen, profile and booking (in-process full resync)."""
+        from console.models import ScreenSpec, SlotBooking
+        from console.screen_profiler.models import ScreenProfile
+        from console.utils import record_outbox_changes
+
+        total = 0
+        for entity, queryset, field in (
+            ('screen', ScreenSpec.objects.all(), 'id'),
+            ('profile', ScreenProfile.objects.all(), 'screen_id'),
+            ('booking', SlotBooking.objects.all(), 'id'),
+        ):
+            ids = list(queryset.values_list(field, flat=True))
+            for i in range(0, len(ids), self.batch_size):
+                record_outbox_changes(entity, ids[i:i + self.batch_size])
+            total += len(ids)
+        return total
+
+    def drain(self, max_batches=None) -> dict:
+        """Apply batches until the outbox is empty (or max_batches). Returns totals."""
+        totals = {'events': 0, 'screens': 0, 'profiles': 0, 'bookings': 0, 'deleted': 0, 'batches': 0}
+        while max_batches is None or totals['batches'] < max_batches:
+            stats = self.replicate_batch()
+            if not stats['events']:
+                break
+            for key, value in stats.items():
+                totals[key] += value
+            totals['batches'] += 1
+        return totals
+
+    def replicate_batch(self) -> dict:
+        """Lock, apply and delete one batch of events."""
+        from console.models import ReplicationOutbox
+
+        with transaction.atomic():
+            events = list(
+                ReplicationOutbox.objects.select_for_update(skip_locked=True).order_by('id')[:self.batch_size]
+            )
+            if not events:
+                return {'events': 0, 'screens': 0, 'profiles': 0, 'bookings': 0, 'deleted': 0}
+
+            ops = collapse_events(events)
+            stats = {'events': len(events)}
+            stats['screens'], screen_deletes = self._apply_screens(ops['screen'])
+            stats['profiles'] = self._apply_profiles(
+                [sid for sid in ops['profile'] if sid not in ops['screen']]
+            )
+            stats['bookings'], booking_deletes = self._apply_bookings(ops['booking'])
+            stats['deleted'] = screen_deletes + booking_deletes
+
+            ReplicationOutbox.objects.filter(id__in=[e.id for e in events]).delete()
+
+        bump_data_version()
+        if stats['screens'] or stats['profiles'] or screen_deletes:
+            bump_data_version(FILTER_MENU_VERSION)
+
+        logger.info(
+            f'Replicated {stats["events"]} events: {stats["screens"]} screens, '
+            f'{stats["profiles"]} profiles, {stats["bookings"]} bookings, {stats["deleted"]} deleted'
+        )
+        return stats
+
+    # ── Apply ────────────────────────────────────────────────────────
+
+    def _profiles_for(self, screen_ids) -> dict:
+        from console.screen_profiler.models import ScreenProfile
+        profiles = ScreenProfile.objects.filter(screen_id__in=list(screen_ids)).defer('raw_places')
+        return {p.screen_id: {'profile': p.to_response_dict()} for p in profiles}
+
+    def _apply_screens(self, ops: dict):
+        from console.models import ScreenSpec
+        from xia.models import ScreenMaster
+
+        upsert_ids = [sid for sid, op in ops.items() if op == 'upsert']
+        rows = {}
+        for screen in ScreenSpec.objects.filter(id__in=upsert_ids):
+            mapped = _map_source_to_master(screen)
+            rows[mapped.pop('screenid')] = mapped
+        for screenid, profile in self._profiles_for(rows).items():
+            rows[screenid].update(self.sync.map_profile_fields(profile['profile']))
+
+        if rows:
+            _, _, errors = self.sync._bulk_upsert(ScreenMaster, 'screenid', rows, 'screens')
+            if errors:
+                raise ReplicationError(f'{errors} screens failed to upsert')
+
+        # Deleted, or gone again before the event was applied
+        delete_ids = [sid for sid in ops if sid not in rows]
+        if delete_ids:
+            ScreenMaster.objects.filter(screenid__in=delete_ids).delete()
+        return len(rows), len(delete_ids)
+
+    def _apply_profiles(self, screen_ids) -> int:
+        if not screen_ids:
+            return 0
+        return self.sync._update_profiles(self._profiles_for(screen_ids))
+
+    def _apply_bookings(self, ops: dict):
+        from console.models import SlotBooking as ConsoleBooking
+        from xia.models import ScreenMaster, SlotBooking
+
+        upsert_ids = [bid for bid, op in ops.items() if op == 'upsert']
+        bookings = list(ConsoleBooking.objects.filter(id__in=upsert_ids).select_related('screen'))
+        known_screens = set(
+            ScreenMaster.objects.filter(screenid__in={b.screen_id for b in bookings})
+            .values_list('screenid', flat=True)
+        )
+        rows = {
+            booking.id: {
+                'screen_id': booking.screen_id if booking.screen_id in known_screens else None,
+                'screen_name': booking.screen.screen_name or '',
+                'booked_num_slots': booking.num_slots,
+                'start_date': booking.start_date,
+                'end_date': booking.end_date,
+                'campaign_id': booking.campaign_id,
+                'user_id': booking.user_id,
+                'status': booking.status,
+                'screen_owner': booking.source,
+                'payment': booking.payment,
+                'created_at': booking.created_at,
+            }
+            for booking in bookings
+        }
+
+        if rows:
+            _, _, errors = self.sync._bulk_upsert(SlotBooking, 'booking_id', rows, 'bookings')
+            if errors:
+                raise ReplicationError(f'{errors} bookings failed to upsert')
+
+        delete_ids = [bid for bid in ops if bid not in rows]
+        if delete_ids:
+            SlotBooking.objects.filter(booking_id__in=delete_ids).delete()
+        return len(rows), len(delete_ids)
@@ -2,23 +2,55 @@
 Screen Sync Service
 --------------------
 API-based sync: fetches screens + AI profile + bookings data and
-upserts into XIA's tables.
+upserts into XIA's tables. Live changes reach XIA through the
+replication outbox (services/replicator.py); this is the reconciliation
+path (incremental catch-up and nightly full runs).
 
 APIs used:
   API #1: GET /api/console/screens/               — all screens
   API #2: GET /api/console/screens/{id}/profile/  — per-screen AI profile
   API #3: GET /api/console/slot-bookings/         — all slot bookings
+  API #4: GET /api/console/screen-profiles/export/ — full profiles in bulk (paged)
+
+Incremental (default): each entity keeps a high-water mark in
+SyncWatermark and the console is asked only for rows with
+updated_at >= that mark minus XIA_SYNC_WATERMARK_LAG_SECONDS
+(?updated_since=). auto_now stamps updated_at before commit, so a
+transaction committing after a sync can carry an older timestamp than the
+mark; the lag re-reads that window on every run. Re-fetched rows are
+harmless since upserts are idempotent. A run with row errors (or a failed
+fetch) does not advance its mark.
+
+Full (full=True, nightly): everything is fetched and upserted, screens
+missing upstream are removed, and the marks are reset to what was seen.
+The first run of an entity is always full.
+
+Screens and their profiles are merged in memory (profiles come from the
+bulk export, a few paged requests instead of one per screen) and written
+with batched bulk_create(update_conflicts=True) upserts.
 """
 
 import logging
 
 import requests
 from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from xia.services.discover_service import bump_data_version
+from xia.services.filter_menu import FILTER_MENU_VERSION
 
 logger = logging.getLogger('xia.sync')
 
 DEFAULT_SCREENS_API = 'http://localhost:8000/api/console/screens/'
 DEFAULT_BOOKINGS_API = 'http://localhost:8000/api/console/slot-bookings/'
+DEFAULT_PROFILES_EXPORT_API = 'http://localhost:8000/api/console/screen-profiles/export/'
+
+# Rows per bulk upsert statement / profiles per export page
+DEFAULT_BATCH_SIZE = 500
+
+# Incremental runs re-read this window behind the mark (late commits)
+DEFAULT_WATERMARK_LAG_SECONDS = 300
 
 # API #1 field mapping: API key -> ScreenMaster field
 SCREEN_RENAME_MAP = {
@@ -44,17 +76,27 @@ class ScreenSyncService:
         self.base_url = getattr(
             settings, 'XIA_SCREENS_API_URL', DEFAULT_SCREENS_API,
         ).rstrip('/')
+        self.batch_size = getattr(settings, 'XIA_SYNC_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+        self.last_run = {}
+        self.requests_made = 0
 
     # ── API Fetchers ─────────────────────────────────────────────────
 
-    def fetch_screens(self):
-        """Fetch all screens from API #1."""
+    @staticmethod
+    def _since_params(updated_since):
+        return {'updated_since': updated_since.isoformat()} if updated_since else None
+
+    def fetch_screens(self, updated_since=None):
+        """Fetch all screens (or those changed since updated_since) from API #1."""
         url = self.base_url + '/'
         try:
-            response = requests.get(url, timeout=30)
+            response = requests.get(url, params=self._since_params(updated_since), timeout=30)
             response.raise_for_status()
             data = response.json()
-            logger.info(f'Fetched {len(data)} screens from API #1')
+            logger.info(
+                f'Fetched {len(data)} screens from API #1'
+                + (f' (updated since {updated_since.isoformat()})' if updated_since else '')
+            )
             return data
         except requests.RequestException as e:
             logger.error(f'Failed to fetch screens: {e}')
@@ -71,11 +113,45 @@ class ScreenSyncService:
             logger.warning(f'Profile fetch failed for screenid={screen_id}: {e}')
             return {}
 
-    def fetch_bookings(self) -> list:
-        """Fetch all slot bookings from API #3."""
+    def fetch_profiles_bulk(self, updated_since=None, screen_ids=None) -> dict:
+        """
+        Fetch full profiles from the bulk export (API #4), following pages.
+        Limited to updated_since and/or screen_ids when given.
+        Returns {screen_id: {"screen_id", "updated_at", "profile"}}; raises
+        on HTTP errors so a sync never writes screens with missing profiles.
+        """
+        export_url = getattr(settings, 'XIA_PROFILES_EXPORT_API_URL', DEFAULT_PROFILES_EXPORT_API)
+        base_params = self._since_params(updated_since) or {}
+        if screen_ids is not None:
+            ids = sorted(screen_ids)
+            chunks = [ids[i:i + self.batch_size] for i in range(0, len(ids), self.batch_size)]
+        else:
+            chunks = [None]
+
+        profiles = {}
+        for chunk in chunks:
+            params = dict(base_params, limit=self.batch_size)
+            if chunk is not None:
+                params['screen_ids'] = ','.join(str(i) for i in chunk)
+            while True:
+                response = requests.get(export_url, params=params, timeout=60)
+                response.raise_for_status()
+                page = response.json()
+                for row in page.get('profiles', []):
+                    profiles[row['screen_id']] = row
+                self.requests_made += 1
+                if page.get('next') is None:
+                    break
+                params['after'] = page['next']
+
+        logger.info(f'Fetched {len(profiles)} profiles from API #4')
+        return profiles
+
+    def fetch_bookings(self, updated_since=None) -> list:
+        """Fetch all slot bookings (or those changed since updated_since) from API #3."""
         bookings_url = getattr(settings, 'XIA_BOOKINGS_API_URL', DEFAULT_BOOKINGS_API)
         try:
-            response = requests.get(bookings_url, timeout=30)
+            response = requests.get(bookings_url, params=self._since_params(updated_since), timeout=30)
             response.raise_for_status()
             data = response.json()
             bookings = data.get('bookings', data) if isinstance(data, dict) else data
@@ -83,7 +159,50 @@ class ScreenSyncService:
             return bookings
         except requests.RequestException as e:
             logger.error(f'Failed to fetch bookings: {e}')
-            return []
+            raise
+
+    # ── Watermarks ───────────────────────────────────────────────────
+
+    def get_watermark(self, entity: str):
+        """
+        updated_since for an incremental run: the entity's high-water mark
+        minus the safety lag, or None if it was never synced.
+        """
+        from datetime import timedelta
+        from xia.models import SyncWatermark
+
+        high_water = (
+            SyncWatermark.objects.filter(entity=entity)
+            .values_list('high_water', flat=True)
+            .first()
+        )
+        if high_water is None:
+            return None
+        lag = getattr(settings, 'XIA_SYNC_WATERMARK_LAG_SECONDS', DEFAULT_WATERMARK_LAG_SECONDS)
+        return high_water - timedelta(seconds=lag)
+
+    def save_watermark(self, entity: str, rows: list, full: bool, field: str = 'updated_at'):
+        """
+        Advance the mark to the newest source updated_at in rows (never
+        backwards on incremental runs; reset to what was seen on full runs).
+        """
+        from xia.models import SyncWatermark
+
+        seen = [parse_datetime(str(r[field])) for r in rows if r.get(field)]
+        newest = max((ts for ts in seen if ts is not None), default=None)
+
+        mark, _ = SyncWatermark.objects.get_or_create(entity=entity)
+        if newest is not None and (full or mark.high_water is None or newest > mark.high_water):
+            mark.high_water = newest
+        now = timezone.now()
+        if full:
+            mark.last_full_sync_at = now
+            if mark.high_water is None:
+                # Empty source: later rows are still caught, nothing predates now
+                mark.high_water = now
+        mark.last_run_at = now
+        mark.last_run_rows = len(rows)
+        mark.save()
 
 
     # ── Field Mappers ────────────────────────────────────────────────
@@ -164,110 +283,220 @@ class ScreenSyncService:
 
     # ── Sync ─────────────────────────────────────────────────────────
 
-    def sync(self):
+    def _bulk_upsert(self, model, unique_field: str, rows: dict, label: str, update_fields=None):
         """
-        Full sync: fetch screens + profiles and upsert into ScreenMaster.
-        Returns (created_count, updated_count, error_count).
+        Batched upsert of {unique value: field dict} into model, keyed on
+        unique_field. Conflicting rows get update_fields (default: every
+        column) overwritten. Returns (created, updated, errors); a failed
+        batch counts all its rows as errors.
+        """
+        update_fields = update_fields or [
+            f.name for f in model._meta.concrete_fields
+            if not f.primary_key and f.name != unique_field
+        ]
+        keys = list(rows)
+        created = updated = errors = 0
+
+        for i in range(0, len(keys), self.batch_size):
+            batch = keys[i:i + self.batch_size]
+            try:
+                existing = set(
+                    model.objects.filter(**{f'{unique_field}__in': batch})
+                    .values_list(unique_field, flat=True)
+                )
+                model.objects.bulk_create(
+                    [model(**{unique_field: key}, **rows[key]) for key in batch],
+                    update_conflicts=True,
+                    unique_fields=[unique_field],
+                    update_fields=update_fields,
+                )
+                created += len(batch) - len(existing)
+                updated += len(existing)
+                logger.info(
+                    f'Upserted {label} batch {i // self.batch_size + 1} '
+                    f'({min(i + len(batch), len(keys))}/{len(keys)})'
+                )
+            except Exception as e:
+                logger.error(f'Error upserting {label} batch starting {unique_field}={batch[0]}: {e}')
+                errors += len(batch)
+        return created, updated, errors
+
+    def _delete_missing(self, model, unique_field: str, keep) -> int:
+        """Delete rows whose unique_field is not in keep, in batches."""
+        stale = list(set(model.objects.values_list(unique_field, flat=True)) - set(keep))
+        for i in range(0, len(stale), self.batch_size):
+            model.objects.filter(**{f'{unique_field}__in': stale[i:i + self.batch_size]}).delete()
+        if stale:
+            logger.info(f'Deleted {len(stale)} {model._meta.db_table} rows missing upstream')
+        return len(stale)
+
+    def _update_profiles(self, profiles: dict) -> int:
+        """Write profile columns for screens whose screen row did not change."""
+        from xia.models import ScreenMaster
+
+        now = timezone.now()
+        screens = list(ScreenMaster.objects.filter(screenid__in=list(profiles)))
+        fields = set()
+        for screen in screens:
+            mapped = self.map_profile_fields(profiles[screen.screenid]['profile'])
+            fields.update(mapped)
+            for name, value in mapped.items():
+                setattr(screen, name, value)
+            screen.synced_at = now
+        if screens:
+            ScreenMaster.objects.bulk_update(screens, sorted(fields) + ['synced_at'], batch_size=self.batch_size)
+        return len(screens)
+
+    def sync(self, full: bool = False):
+        """
+        Sync screens + profiles into ScreenMaster.
+        Incremental unless full=True (or nothing was synced before).
+        Returns (created_count, updated_count, error_count); details of the
+        run (mode, profile-only updates, deletions, HTTP requests) are left
+        in self.last_run.
         """
         from xia.models import ScreenMaster
 
-        screens_data = self.fetch_screens()
+        self.requests_made = 0
+        screens_since = None if full else self.get_watermark('screens')
+        full = full or screens_since is None
+        profiles_since = None if full else (self.get_watermark('profiles') or screens_since)
 
-        created = 0
-        updated = 0
-        errors = 0
+        screens_data = self.fetch_screens(updated_since=screens_since)
+        self.requests_made += 1
+        profiles = self.fetch_profiles_bulk(updated_since=profiles_since)
 
+        errors = 0
+        rows = {}
         for item in screens_data:
+            mapped = self.map_screen_fields(item)
+            screenid = mapped.pop('screenid', None)
+            if screenid is None:
+                logger.warning(f'Skipping screen with no id: {item}')
+                errors += 1
+                continue
+            rows[screenid] = mapped
+
+        if not full:
+            # Changed screens whose profile did not change still need it for the upsert
+            missing = set(rows) - set(profiles)
+            if missing:
+                profiles.update(self.fetch_profiles_bulk(screen_ids=missing))
+
+        # Merge in memory; a screen without a profile gets empty profile columns
+        for screenid, mapped in rows.items():
+            profile = profiles.get(screenid)
+            if profile:
+                mapped.update(self.map_profile_fields(profile['profile']))
+
+        created, updated, upsert_errors = self._bulk_upsert(ScreenMaster, 'screenid', rows, 'screens')
+        errors += upsert_errors
+
+        # Profiles rewritten without a screen change (re-score, background re-profile)
+        profile_only = 0
+        if not full:
             try:
-                mapped = self.map_screen_fields(item)
-                screenid = mapped.pop('screenid', None)
-
-                if screenid is None:
-                    logger.warning(f'Skipping screen with no id: {item}')
-                    errors += 1
-                    continue
-
-                # Fetch and merge profile data (API #2)
-                profile = self.fetch_profile(screenid)
-                profile_mapped = self.map_profile_fields(profile)
-                mapped.update(profile_mapped)
-
-                _, was_created = ScreenMaster.objects.update_or_create(
-                    screenid=screenid,
-                    defaults=mapped,
+                profile_only = self._update_profiles(
+                    {sid: row for sid, row in profiles.items() if sid not in rows}
                 )
-
-                if was_created:
-                    created += 1
-                else:
-                    updated += 1
-
-                logger.info(f'Synced screenid={screenid} (profile: {"yes" if profile else "no"})')
-
             except Exception as e:
-                logger.error(f'Error syncing screen {item.get("id", "?")}: {e}')
+                logger.error(f'Error updating changed profiles: {e}')
                 errors += 1
 
+        # Reconcile: screens deleted upstream (never inferred from an empty response)
+        deleted = 0
+        if full and rows and not errors:
+            deleted = self._delete_missing(ScreenMaster, 'screenid', rows)
+
+        if created or updated or profile_only or deleted:
+            bump_data_version()
+            bump_data_version(FILTER_MENU_VERSION)
+
+        if not errors:
+            self.save_watermark('screens', screens_data, full)
+            self.save_watermark('profiles', list(profiles.values()), full)
+        else:
+            logger.warning(f'Screen sync had {errors} errors - watermarks not advanced')
+
+        self.last_run = {
+            'mode': 'full' if full else 'incremental',
+            'since': screens_since.isoformat() if screens_since else None,
+            'fetched': len(screens_data),
+            'profiles_fetched': len(profiles),
+            'profile_only_updates': profile_only,
+            'deleted': deleted,
+            'requests': self.requests_made,
+        }
         logger.info(
-            f'Sync complete: {created} created, {updated} updated, {errors} errors'
+            f'Sync complete ({self.last_run["mode"]}): {created} created, {updated} updated, '
+            f'{profile_only} profile-only, {deleted} deleted, {errors} errors, '
+            f'{self.requests_made} API requests'
         )
         return created, updated, errors
 
-    def sync_bookings(self):
+    def sync_bookings(self, full: bool = False):
         """
-        Sync all slot bookings from API #3 into SlotBooking table.
+        Sync slot bookings from API #3 into SlotBooking table
+        (only bookings changed since the last run unless full=True).
+        Bookings are built in memory and upserted in batches; a full run
+        also deletes bookings that no longer exist upstream.
         Returns (created_count, updated_count, error_count).
         """
         from xia.models import SlotBooking, ScreenMaster
 
-        bookings_data = self.fetch_bookings()
+        since = None if full else self.get_watermark('bookings')
+        full = full or since is None
+        bookings_data = self.fetch_bookings(updated_since=since)
 
-        created = 0
-        updated = 0
-        errors = 0
+        # SlotBooking.screen points at ScreenMaster.screenid - one query
+        # for the known ids instead of a lookup per booking
+        known_screens = set(ScreenMaster.objects.values_list('screenid', flat=True))
 
+        errors = 0
+        unresolved = 0
+        rows = {}
         for item in bookings_data:
-            try:
-                booking_id = item.get('id')
-                if booking_id is None:
-                    errors += 1
-                    continue
-
-                # Resolve ForeignKey — screen field references ScreenMaster.screenid
-                screen_ref = item.get('screen')
-                screen_obj = None
-                if screen_ref:
-                    screen_obj = ScreenMaster.objects.filter(screenid=screen_ref).first()
-
-                fields = {
-                    'screen': screen_obj,
-                    'screen_name': item.get('screen_name', ''),
-                    'booked_num_slots': item.get('num_slots', 0),
-                    'start_date': item.get('start_date'),
-                    'end_date': item.get('end_date'),
-                    'campaign_id': item.get('campaign_id', ''),
-                    'user_id': item.get('user_id', ''),
-                    'status': item.get('status', ''),
-                    'screen_owner': item.get('source', ''),
-                    'payment': item.get('payment', ''),
-                    'created_at': item.get('created_at'),
-                }
-
-                _, was_created = SlotBooking.objects.update_or_create(
-                    booking_id=booking_id,
-                    defaults=fields,
-                )
-
-                if was_created:
-                    created += 1
-                else:
-                    updated += 1
-
-            except Exception as e:
-                logger.error(f'Error syncing booking id={item.get("id", "?")}: {e}')
+            booking_id = item.get('id')
+            if booking_id is None:
                 errors += 1
+                continue
+
+            screen_ref = item.get('screen')
+            if screen_ref and screen_ref not in known_screens:
+                unresolved += 1
+            rows[booking_id] = {
+                'screen_id': screen_ref if screen_ref in known_screens else None,
+                'screen_name': item.get('screen_name', ''),
+                'booked_num_slots': item.get('num_slots', 0),
+                'start_date': item.get('start_date'),
+                'end_date': item.get('end_date'),
+                'campaign_id': item.get('campaign_id', ''),
+                'user_id': item.get('user_id', ''),
+                'status': item.get('status', ''),
+                'screen_owner': item.get('source', ''),
+                'payment': item.get('payment', ''),
+                'created_at': item.get('created_at'),
+            }
+
+        if unresolved:
+            logger.warning(f'{unresolved} bookings reference screens not in ScreenMaster (screen left empty)')
+
+        created, updated, upsert_errors = self._bulk_upsert(SlotBooking, 'booking_id', rows, 'bookings')
+        errors += upsert_errors
+
+        # Reconcile: bookings deleted upstream (never inferred from an empty response)
+        deleted = 0
+        if full and rows and not errors:
+            deleted = self._delete_missing(SlotBooking, 'booking_id', rows)
+
+        if created or updated or deleted:
+            bump_data_version()
+
+        if not errors:
+            self.save_watermark('bookings', bookings_data, full)
 
         logger.info(
-            f'Bookings sync complete: {created} created, {updated} updated, {errors} errors'
+            f'Bookings sync complete ({"full" if full else "incremental"}): '
+            f'{created} created, {updated} updated, {deleted} deleted, {errors} errors'
         )
         return created, updated, errors
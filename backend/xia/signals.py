@@ -6,11 +6,20 @@ Real-time sync from source tables to XIA's ScreenMaster.
 Django Signals fire automatically when the source Screen model
 is created, updated, or deleted — keeping XIA's table in perfect sync.
 
+XIA_REPLICATION = 'outbox' (default): screen, profile and booking writes
+only append a ReplicationOutbox event in the writer's transaction; the
+replicate_outbox worker applies them to xia_db in batches.
+XIA_REPLICATION = 'signals': the handlers below collect the saved screen
+ids per transaction and write ScreenMaster once on commit (one bulk
+upsert); a rolled-back transaction never reaches XIA.
+
 Connection: These handlers are connected in xia/apps.py -> ready().
 """
 
 import logging
+import threading
 
+from django.db import transaction
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
@@ -80,43 +89,143 @@ def _map_source_to_master(instance):
     return data
 
 
-def screen_post_save_handler(sender, instance, created, **kwargs):
+# ── Deferred, coalesced ScreenMaster sync ───────────────────────────
+
+class _PendingScreens:
+    """Screen ids saved / deleted in one transaction, flushed once on commit."""
+
+    def __init__(self, using):
+        self.using = using
+        self.saved = set()
+        self.deleted = set()
+
+    def flush(self):
+        _pending.batches.pop(self.using, None)
+        try:
+            flush_screens(self.saved - self.deleted, self.deleted)
+        except Exception as e:
+            # The console write is committed - the next sync_screens run repairs XIA
+            logger.error(f'Deferred ScreenMaster sync failed for {len(self.saved | self.deleted)} screens: {e}')
+
+
+_pending = threading.local()
+
+
+def _pending_for(using):
     """
-    Fired on post_save of the source Screen model.
-    Creates or updates the corresponding ScreenMaster row.
+    The batch of the current transaction, registering its on_commit flush
+    on first use. A batch whose flush is no longer queued belonged to a
+    rolled-back transaction and is dropped, so nothing leaks into XIA.
     """
+    batches = getattr(_pending, 'batches', None)
+    if batches is None:
+        batches = _pending.batches = {}
+    connection = transaction.get_connection(using)
+    batch = batches.get(using)
+    if batch is not None and connection.in_atomic_block and any(
+        entry[1] == batch.flush for entry in connection.run_on_commit
+    ):
+        return batch
+
+    batch = batches[using] = _PendingScreens(using)
+    if connection.in_atomic_block:
+        transaction.on_commit(batch.flush, using=using)
+    return batch
+
+
+def flush_screens(saved_ids, deleted_ids):
+    """Copy the current source rows for saved_ids into ScreenMaster (one bulk upsert) and drop deleted_ids."""
+    from django.apps import apps
+    from django.conf import settings
     from xia.models import ScreenMaster
+    from xia.services.discover_service import bump_data_version
+    from xia.services.filter_menu import FILTER_MENU_VERSION
+    from xia.services.sync_service import ScreenSyncService
+
+    rows = {}
+    if saved_ids:
+        SourceModel = apps.get_model(settings.XIA_SCREEN_SOURCE_MODEL)
+        for instance in SourceModel.objects.filter(pk__in=list(saved_ids)):
+            mapped = _map_source_to_master(instance)
+            rows[mapped.pop('screenid')] = mapped
+    if rows:
+        # Screen columns only - profile columns are owned by the profile sync
+        screen_fields = sorted((SCREEN_MASTER_FIELDS - {'screenid'}) | {'synced_at'})
+        created, updated, errors = ScreenSyncService()._bulk_upsert(
+            ScreenMaster, 'screenid', rows, 'screens', update_fields=screen_fields,
+        )
+        logger.info(f'Synced {len(rows)} ScreenMaster rows ({created} created, {updated} updated, {errors} errors)')
+    if deleted_ids:
+        deleted_count, _ = ScreenMaster.objects.filter(screenid__in=list(deleted_ids)).delete()
+        logger.info(f'Deleted {deleted_count} ScreenMaster rows for screenids={sorted(deleted_ids)}')
+    if rows or deleted_ids:
+        bump_data_version()
+        bump_data_version(FILTER_MENU_VERSION)
 
-    mapped = _map_source_to_master(instance)
-    screenid = mapped.pop('screenid', None)
 
-    if screenid is None:
+def screen_post_save_handler(sender, instance, created, using=None, **kwargs):
+    """
+    Fired on post_save of the source Screen model.
+    Queues the screen; ScreenMaster is written once when the transaction
+    commits (immediately in autocommit), however often it was saved.
+    """
+    if instance.pk is None:
         logger.warning('Signal received but source instance has no id — skipping.')
         return
 
-    _, was_created = ScreenMaster.objects.update_or_create(
-        screenid=screenid,
-        defaults=mapped,
-    )
+    batch = _pending_for(using or 'default')
+    batch.saved.add(instance.pk)
+    batch.deleted.discard(instance.pk)
+    if not transaction.get_connection(batch.using).in_atomic_block:
+        batch.flush()
 
-    action = 'Created' if was_created else 'Updated'
-    logger.info(f'{action} ScreenMaster row for screenid={screenid}')
 
-
-def screen_post_delete_handler(sender, instance, **kwargs):
+def screen_post_delete_handler(sender, instance, using=None, **kwargs):
     """
     Fired on post_delete of the source Screen model.
-    Deletes the corresponding ScreenMaster row.
+    Deletes the corresponding ScreenMaster row once the transaction commits.
     """
-    from xia.models import ScreenMaster
+    batch = _pending_for(using or 'default')
+    batch.deleted.add(instance.pk)
+    if not transaction.get_connection(batch.using).in_atomic_block:
+        batch.flush()
 
-    source_id = instance.id
-    deleted_count, _ = ScreenMaster.objects.filter(screenid=source_id).delete()
 
-    if deleted_count:
-        logger.info(f'Deleted ScreenMaster row for screenid={source_id}')
-    else:
-        logger.warning(f'No ScreenMaster row found for screenid={source_id}')
+# ── Outbox handlers ─────────────────────────────────────────────────
+
+def _outbox_handler(entity, op, id_attr='id'):
+    def handler(sender, instance, **kwargs):
+        from console.utils import record_outbox_changes
+        record_outbox_changes(entity, [getattr(instance, id_attr)], op=op)
+    return handler
+
+
+OUTBOX_SOURCES = (
+    # (model, entity, id attribute)
+    ('console.ScreenSpec', 'screen', 'id'),
+    ('screen_profiler.ScreenProfile', 'profile', 'screen_id'),
+    ('console.SlotBooking', 'booking', 'id'),
+)
+
+
+def connect_outbox_signals():
+    """Append outbox events on every save/delete of the replicated console models."""
+    from django.apps import apps
+
+    for model_path, entity, id_attr in OUTBOX_SOURCES:
+        model = apps.get_model(model_path)
+        # A deleted profile only changes the screen's profile columns
+        delete_op = 'upsert' if entity == 'profile' else 'delete'
+        post_save.connect(
+            _outbox_handler(entity, 'upsert', id_attr), sender=model, weak=False,
+            dispatch_uid=f'xia_outbox_{entity}_post_save',
+        )
+        post_delete.connect(
+            _outbox_handler(entity, delete_op, id_attr), sender=model, weak=False,
+            dispatch_uid=f'xia_outbox_{entity}_post_delete',
+        )
+
+    logger.info('XIA outbox replication connected')
 
 
 def connect_screen_signals():
@@ -131,6 +240,10 @@ def connect_screen_signals():
     from django.apps import apps
     from django.conf import settings
 
+    if getattr(settings, 'XIA_REPLICATION', 'outbox') == 'outbox':
+        connect_outbox_signals()
+        return
+
     source_model_path = getattr(settings, 'XIA_SCREEN_SOURCE_MODEL', None)
 
     if not source_model_path:
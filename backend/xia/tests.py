@@ -3,7 +3,10 @@ XIA Tests
 ---------
 """
 
-from django.test import TestCase
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase
 
 
 class XiaAppTest(TestCase):
@@ -22,3 +25,237 @@ class XiaAppTest(TestCase):
         data = response.json()
         self.assertEqual(data['status'], 'ok')
         self.assertEqual(data['app'], 'xia')
+
+
+class ProfileExportFetchTest(SimpleTestCase):
+    """The sync pulls every profile page from the bulk export, not one request per screen."""
+
+    def test_follows_pages(self):
+        from xia.services.sync_service import ScreenSyncService
+
+        pages = [
+            {'next': 2, 'profiles': [{'screen_id': 1, 'profile': {}}, {'screen_id': 2, 'profile': {}}]},
+            {'next': None, 'profiles': [{'screen_id': 3, 'profile': {}}]},
+        ]
+        service = ScreenSyncService()
+        service.batch_size = 2
+        with mock.patch('xia.services.sync_service.requests.get') as get:
+            get.return_value.json.side_effect = pages
+            profiles = service.fetch_profiles_bulk()
+
+        self.assertEqual(sorted(profiles), [1, 2, 3])
+        self.assertEqual(service.requests_made, 2)
+        self.assertEqual(get.call_args_list[1].kwargs['params']['after'], 2)
+
+
+class SyncWatermarkLagTest(TestCase):
+    """Incremental runs re-read a window behind the mark; failed fetches do not stamp a full run."""
+
+    def test_lag_and_failed_bookings_fetch(self):
+        from datetime import datetime, timedelta, timezone as dt_timezone
+
+        import requests
+        from django.test import override_settings
+
+        from xia.models import SyncWatermark
+        from xia.services.sync_service import ScreenSyncService
+
+        mark = datetime(2030, 1, 1, 12, 0, tzinfo=dt_timezone.utc)
+        SyncWatermark.objects.create(entity='bookings', high_water=mark)
+        service = ScreenSyncService()
+        with override_settings(XIA_SYNC_WATERMARK_LAG_SECONDS=120):
+            self.assertEqual(service.get_watermark('bookings'), mark - timedelta(minutes=2))
+        self.assertIsNone(service.get_watermark('screens'))
+
+        with mock.patch('xia.services.sync_service.requests.get', side_effect=requests.ConnectionError('down')):
+            with self.assertRaises(requests.ConnectionError):
+                service.sync_bookings(full=True)
+        self.assertIsNone(SyncWatermark.objects.get(entity='bookings').last_full_sync_at)
+
+
+class OutboxCollapseTest(SimpleTestCase):
+    """Several events for one row apply once, with the last op."""
+
+    def test_last_op_wins(self):
+        from types import SimpleNamespace
+        from xia.services.replicator import collapse_events
+
+        events = [
+            SimpleNamespace(entity='screen', object_id=1, op='upsert'),
+            SimpleNamespace(entity='booking', object_id=7, op='upsert'),
+            SimpleNamespace(entity='screen', object_id=1, op='delete'),
+            SimpleNamespace(entity='booking', object_id=7, op='upsert'),
+        ]
+        ops = collapse_events(events)
+        self.assertEqual(ops['screen'], {1: 'delete'})
+        self.assertEqual(ops['booking'], {7: 'upsert'})
+        self.assertEqual(ops['profile'], {})
+
+
+class CoalescedScreenSyncTest(SimpleTestCase):
+    """Repeated saves in one transaction flush once; a rolled-back batch is dropped."""
+
+    def test_coalesces_per_transaction(self):
+        from types import SimpleNamespace
+        from xia import signals
+
+        connection = SimpleNamespace(in_atomic_block=True, run_on_commit=[])
+
+        def on_commit(func, using=None):
+            connection.run_on_commit.append((set(), func, False))
+
+        with mock.patch.object(signals.transaction, 'get_connection', return_value=connection), \
+                mock.patch.object(signals.transaction, 'on_commit', side_effect=on_commit), \
+                mock.patch.object(signals, 'flush_screens') as flush:
+            for pk in (1, 1, 2, 3):
+                signals.screen_post_save_handler(None, SimpleNamespace(pk=pk), created=False, using='default')
+            signals.screen_post_delete_handler(None, SimpleNamespace(pk=3), using='default')
+            self.assertEqual(len(connection.run_on_commit), 1)
+
+            connection.run_on_commit[0][1]()
+            flush.assert_called_once_with({1, 2}, {3})
+
+            # Rolled back: the queued flush is gone, the next save starts a new batch
+            signals.screen_post_save_handler(None, SimpleNamespace(pk=4), created=False, using='default')
+            connection.run_on_commit.clear()
+            signals.screen_post_save_handler(None, SimpleNamespace(pk=5), created=False, using='default')
+            connection.run_on_commit[0][1]()
+            flush.assert_called_with({5}, set())
+
+
+class DriftHashTreeTest(SimpleTestCase):
+    """Only the id ranges whose hashes differ are reported."""
+
+    def test_finds_drifted_ranges(self):
+        from xia.services.drift_check import HashTree, _digest, diff_trees
+
+        source = {leaf: _digest(str(leaf).encode()) for leaf in range(1000)}
+        master = dict(source)
+        master[42] = _digest(b'stale')
+        del master[900]
+        master[2000] = _digest(b'orphan')
+
+        src_tree, dst_tree = HashTree(source), HashTree(master)
+        leaves, compared = diff_trees(src_tree, dst_tree)
+        self.assertEqual(sorted(leaves), [42, 900, 2000])
+        self.assertLess(compared, len(source))
+
+        leaves, _ = diff_trees(src_tree, HashTree(dict(source)))
+        self.assertEqual(leaves, [])
+
+    def test_single_leaf_away_from_zero(self):
+        from xia.services.drift_check import HashTree, _digest, diff_trees
+
+        leaves, _ = diff_trees(HashTree({5: _digest(b'a')}), HashTree({5: _digest(b'b')}))
+        self.assertEqual(leaves, [5])
+        leaves, _ = diff_trees(HashTree({}), HashTree({}))
+        self.assertEqual(leaves, [])
+
+
+class DiscoverQueryCountTest(TestCase):
+    """discover_screens costs the same number of queries for 1 or many screens, and fewer when cached."""
+
+    def test_constant_queries(self):
+        from datetime import date
+        from xia.models import ScreenMaster, SlotBooking
+        from xia.services.discover_service import discover_screens
+
+        for screenid in range(1, 6):
+            screen = ScreenMaster.objects.create(
+                screenid=screenid, spec_city='Chennai', status='VERIFIED', profile_status='PROFILED',
+                total_slots_per_loop=4, base_price_per_slot_inr=100,
+            )
+            SlotBooking.objects.create(
+                booking_id=screenid, screen=screen, booked_num_slots=4, status='ACTIVE',
+                start_date=date(2030, 1, 1), end_date=date(2030, 1, 9 + screenid),
+            )
+
+        caches['default'].clear()
+        args = (['Chennai, Tamil Nadu'], '2030-01-02', '2030-01-05', '10000')
+
+        # Hold expiry UPDATE + version read + one annotated screen query
+        with self.assertNumQueries(3):
+            result = discover_screens(*args)
+        # Repeat turn: served from the cache
+        with self.assertNumQueries(2):
+            self.assertEqual(discover_screens(*args), result)
+
+        self.assertEqual(result['total_screens_found'], 5)
+        first = next(s for s in result['screens'] if s['id'] == 1)
+        self.assertFalse(first['is_available'])
+        self.assertEqual(first['next_available_date'], '2030-01-10')
+        self.assertEqual(first['slots_freeing_up'], 4)
+        self.assertEqual(result['not_available_locations'], [])
+
+
+class DiscoverCacheVersionTest(TestCase):
+    """A data version bump invalidates cached discover results."""
+
+    def test_bump_changes_key(self):
+        from xia.services.discover_service import _discover_cache_key, bump_data_version, get_data_version
+
+        self.assertEqual(get_data_version(), 0)
+        bump_data_version()
+        bump_data_version()
+        self.assertEqual(get_data_version(), 2)
+        params = (['Chennai'], '2030-01-02', '2030-01-05', '10000', {'environment': 'Outdoor'}, {}, '')
+        self.assertNotEqual(_discover_cache_key(1, *params), _discover_cache_key(2, *params))
+        self.assertEqual(
+            _discover_cache_key(2, *params),
+            _discover_cache_key(2, ['Chennai'], '2030-01-02', '2030-01-05', '10000', {'environment': 'Outdoor'}, {}, ''),
+        )
+
+
+class FilterMenuCacheTest(TestCase):
+    """The filter menu is one query to build, then a version read per turn."""
+
+    def test_single_query_and_invalidation(self):
+        from xia.models import ScreenMaster
+        from xia.services.discover_service import bump_data_version
+        from xia.services.filter_menu import FILTER_MENU_VERSION, build_filter_menu
+
+        caches['default'].clear()
+        ScreenMaster.objects.create(screenid=1, spec_city='Chennai', environment='Outdoor')
+        ScreenMaster.objects.create(screenid=2, spec_city='Madurai', environment='Outdoor')
+
+        with self.assertNumQueries(2):  # version read + one DISTINCT query
+            menu = build_filter_menu()
+        self.assertIn('  spec_city: Chennai, Madurai', menu)
+        self.assertIn('  environment: Outdoor', menu)
+        with self.assertNumQueries(1):
+            self.assertEqual(build_filter_menu(), menu)
+
+        ScreenMaster.objects.create(screenid=3, spec_city='Salem')
+        bump_data_version(FILTER_MENU_VERSION)
+        self.assertIn('  spec_city: Chennai, Madurai, Salem', build_filter_menu())
+
+
+class ChatMessageStorageTest(TestCase):
+    """Messages are appended as rows; prompts read only the latest ones."""
+
+    def test_append_and_recent(self):
+        import uuid
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        from xia.models import ChatSession
+
+        session = ChatSession.objects.create(session_id=uuid.uuid4(), user_id='u1', campaign_id='c1')
+        start = timezone.now() - timedelta(hours=1)
+        for i in range(30):
+            session.add_messages({
+                'role': 'user' if i % 2 == 0 else 'assistant',
+                'content': f'm{i}',
+                'timestamp': (start + timedelta(minutes=i)).isoformat(),
+                'intent': 'search',
+            })
+
+        with self.assertNumQueries(1):
+            recent = session.recent_messages(4)
+        self.assertEqual([m['content'] for m in recent], ['m26', 'm27', 'm28', 'm29'])
+        self.assertEqual(recent[0]['intent'], 'search')
+
+        self.assertEqual(session.message_count(), 30)
+        self.assertEqual(session.history()[0], {'role': 'user', 'content': 'm0'})
+        self.assertEqual(session.user_messages_since(start + timedelta(minutes=20)), 5)
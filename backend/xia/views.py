@@ -54,26 +54,33 @@ class ScreenMasterListView(ListAPIView):
 class SyncScreensView(APIView):
     """
     POST /xia/sync/screens/
-    Triggers a full sync from the console screens API.
+    Triggers a sync from the console screens API.
+    Incremental by default; {"full": true} forces a full reconciliation.
     """
 
     def post(self, request):
         service = ScreenSyncService()
+        full = str(request.data.get('full', '')).lower() in ('1', 'true', 'yes')
 
         try:
-            created, updated, errors = service.sync()
+            created, updated, errors = service.sync(full=full)
         except Exception as e:
             return Response(
                 {'status': 'error', 'message': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
+        # Pre-warm the Call #1 filter menu for the new screen data version
+        from .services.filter_menu import build_filter_menu
+        build_filter_menu()
+
         return Response(
             {
                 'status': 'ok',
                 'created': created,
                 'updated': updated,
                 'errors': errors,
+                **service.last_run,
             },
             status=status.HTTP_200_OK,
         )
@@ -260,14 +267,9 @@ class XIAChatView(APIView):
         now = timezone.now().isoformat()
 
         # ── Rate limiting (50 messages per 15 minutes per session) ──
-        if session_id and hasattr(session, 'messages'):
-            recent_cutoff = (timezone.now() - timezone.timedelta(minutes=15)).isoformat()
-            recent_user_msgs = [
-                m for m in session.messages
-                if m.get('role') == 'user'
-                and m.get('timestamp', '') >= recent_cutoff
-            ]
-            if len(recent_user_msgs) >= 50:
+        if session_id:
+            recent_cutoff = timezone.now() - timezone.timedelta(minutes=15)
+            if session.user_messages_since(recent_cutoff) >= 50:
                 return Response({
                     'session_id': str(session.session_id),
                     'reply': "You're sending messages too quickly. Please wait a moment before continuing.",
@@ -275,12 +277,13 @@ class XIAChatView(APIView):
                     'rate_limited': True,
                 }, status=status.HTTP_429_TOO_MANY_REQUESTS)
 
-        # ── Append user message to session ─────────────────────────
-        session.messages.append({
+        # ── User message (stored with the reply at the end of the turn) ──
+        history = session.recent_messages()
+        user_entry = {
             'role': 'user',
             'content': message,
             'timestamp': now,
-        })
+        }
 
         # ── CALL #1: Understanding + Extraction ────────────────────
         from .services.llm_service import LLMService
@@ -306,7 +309,7 @@ class XIAChatView(APIView):
         # Build system prompt with current state + pipeline hint
         system_prompt = build_call1_prompt(
             user_message=message,
-            history=session.messages[:-1],
+            history=history,
             filter_menu=filter_menu,
             active_filters=session.active_filters,
             gateway={
@@ -321,7 +324,7 @@ class XIAChatView(APIView):
         # Prepare conversation history for LLM (role + content only)
         history_for_llm = [
             {'role': m['role'], 'content': m['content']}
-            for m in session.messages[:-1]  # exclude the just-appended message
+            for m in history
         ]
 
         # ── Warnings tracker (surfaced in response for Studio) ─────
@@ -888,7 +891,7 @@ class XIAChatView(APIView):
                 persona=session.detected_persona,
                 screens=screens_data,
                 user_message=message,
-                conversation_history=session.messages,
+                conversation_history=history + [user_entry],
                 ad_category=session.ad_category,
                 product_category=session.product_category,
                 brand_objective=session.brand_objective,
@@ -924,9 +927,9 @@ class XIAChatView(APIView):
         if c3_meta_check.get('fallback') and f'Response:' not in ' '.join(warnings):
             warnings.append(f'Response: {c3_meta_check.get("error", "unknown error")}. Using fallback reply')
 
-        # ── Append assistant reply to session ───────────────────────
+        # ── Append user message + assistant reply to session ───────
         screen_ids = [s['id'] for s in screens_data]
-        session.messages.append({
+        session.add_messages(user_entry, {
             'role': 'assistant',
             'content': reply,
             'timestamp': timezone.now().isoformat(),
@@ -934,6 +937,7 @@ class XIAChatView(APIView):
             'intent': intent,
             'filters_snapshot': dict(session.active_filters),
         })
+        history = session.history()
 
         # ── Persist restore fields for GET /xia/chat/<session_id>/ ───
         session.last_intent = intent
@@ -943,10 +947,14 @@ class XIAChatView(APIView):
         # ── Persist debug data for live monitoring ───────────────────
         # IMPORTANT: deep copy meta because the response builder strips
         # system_prompt / messages_sent / raw_response for non-debug requests.
+        # messages_sent is not persisted: it repeats the conversation, which
+        # is already stored in ChatMessage.
         import copy
         c1_full = copy.deepcopy(call1_result.get('_meta', {}))
         c2_full = copy.deepcopy(call2_result.get('_meta', {})) if call2_result else {}
         c3_full = copy.deepcopy(call3_result.get('_meta', {}))
+        for meta in [c1_full, c2_full, c3_full]:
+            meta.pop('messages_sent', None)
         session.last_turn_debug = {
             'call1_meta': c1_full,
             'call2_meta': c2_full,
@@ -981,7 +989,7 @@ class XIAChatView(APIView):
             'quick_replies': quick_replies,
             'warnings': warnings,
             'gateway_updated': gateway_updated,
-            'message_count': len(session.messages),
+            'message_count': len(history),
             'timestamp': timezone.now().isoformat(),
         }
 
@@ -1040,10 +1048,7 @@ class XIAChatView(APIView):
                 },
                 'raw_result': discover_result,
             } if debug_mode else {},
-            'history': [
-                {'role': m['role'], 'content': m['content']}
-                for m in session.messages
-            ],
+            'history': history,
         }, status=status.HTTP_200_OK)
 
 
@@ -1100,6 +1105,8 @@ class XIAChatRestoreView(APIView):
         except Exception as e:
             logger.error(f'Discover failed during session restore: {e}')
 
+        history = session.history()
+
         # ── Build response ────────────────────────────────────────
         return Response({
             'session_id': str(session.session_id),
@@ -1146,12 +1153,9 @@ class XIAChatRestoreView(APIView):
             'brand_objective': session.brand_objective,
             'target_audience': session.target_audience,
 
-            'history': [
-                {'role': m['role'], 'content': m['content']}
-                for m in session.messages
-            ],
+            'history': history,
 
-            'message_count': len(session.messages),
+            'message_count': len(history),
             'last_turn_debug': session.last_turn_debug or {},
         }, status=status.HTTP_200_OK)
 
@@ -1278,9 +1282,10 @@ class XIAChatOpenView(APIView):
             "Generate a proactive, contextual greeting referencing what they see."
         ) if is_init else message
 
-        # Append user message to session (skip [LIVE_MODE_INIT] from visible history)
+        # User message (skip [LIVE_MODE_INIT] from visible history)
+        new_messages = []
         if not is_init:
-            session.messages.append({
+            new_messages.append({
                 'role': 'user',
                 'content': message,
                 'timestamp': now,
@@ -1301,7 +1306,7 @@ class XIAChatOpenView(APIView):
         result = llm.context_help(
             system_prompt=system_prompt,
             user_message=llm_message,
-            conversation_history=session.messages if not is_init else None,
+            conversation_history=session.recent_messages() + new_messages if not is_init else None,
         )
 
         # ── Append assistant reply to session ──────────────────────
@@ -1309,12 +1314,13 @@ class XIAChatOpenView(APIView):
         quick_replies = result.get('quick_replies', ['Explain this page', 'Guide me', 'What can I do here?'])
         redirect = result.get('redirect', None)
 
-        session.messages.append({
+        new_messages.append({
             'role': 'assistant',
             'content': reply,
             'timestamp': timezone.now().isoformat(),
         })
 
+        session.add_messages(*new_messages)
         session.save()
 
         # ── Response ───────────────────────────────────────────────
@@ -1338,12 +1344,13 @@ class XIAChatOpenView(APIView):
     def _handle_normal_mode(self, session, message, now):
         """Handle mode='normal' — conversational gateway collection."""
 
-        # Append user message to session
-        session.messages.append({
+        # User message (stored with the reply at the end of the turn)
+        history = session.recent_messages()
+        user_entry = {
             'role': 'user',
             'content': message,
             'timestamp': now,
-        })
+        }
 
         # ── Determine collected vs missing gateway fields ──────────
         collected = {}
@@ -1376,14 +1383,14 @@ class XIAChatOpenView(APIView):
         system_prompt = build_gateway_system_prompt(
             collected=collected,
             missing=missing,
-            conversation_history=session.messages,
+            conversation_history=history + [user_entry],
         )
 
         llm = LLMService()
         result = llm.gateway_collect(
             system_prompt=system_prompt,
             user_message=message,
-            conversation_history=session.messages[:-1],
+            conversation_history=history,
         )
 
         # ── Extract and save gateway values ────────────────────────
@@ -1406,7 +1413,7 @@ class XIAChatOpenView(APIView):
         reply = result.get('reply', "Which city would you like to advertise in?")
         quick_replies = result.get('quick_replies', ['Chennai', 'Mumbai', 'Bengaluru'])
 
-        session.messages.append({
+        session.add_messages(user_entry, {
             'role': 'assistant',
             'content': reply,
             'timestamp': timezone.now().isoformat(),
@@ -1696,8 +1703,8 @@ class XIACreativeSuggestionView(APIView):
             'last_turn_debug': dict(session.last_turn_debug or {}),
 
             # Messages (full conversation history)
-            'messages': list(session.messages or []),
-            'message_count': len(session.messages or []),
+            'messages': [m.to_dict() for m in session.chat_messages.all()],
+            'message_count': session.message_count(),
 
             # Timestamps
             'created_at': session.created_at.isoformat() if session.created_at else None,